@@ -0,0 +1,64 @@
+"""
+Authentication Overhead Benchmark.
+
+Measures the per-request cost of resolving the current user through
+`get_current_user` with the principal cache disabled (JWT decode, user lookup and
+model validation on every call) and enabled (a hot session served from memory),
+reporting latency percentiles, MongoDB round trips per call and the cache hit ratio.
+
+Usage::
+
+    python -m app.benchmarks.auth_overhead --iterations 2000
+"""
+
+import asyncio
+from datetime import timedelta
+
+from app.benchmarks.common import Timer, base_parser, connect, print_report, summarize
+from app.core.security import create_access_token, get_current_user, principal_cache
+
+
+async def main():
+    parser = base_parser(__doc__)
+    parser.set_defaults(iterations=2000)
+    args = parser.parse_args()
+
+    client, db, counter = connect(args.uri, args.db)
+    try:
+        await client.drop_database(args.db)
+        await db["users"].create_index("username", unique=True)
+        await db["users"].insert_one({
+            "username": "bench_admin",
+            "email": "bench_admin@example.com",
+            "hashed_password": "x",
+            "role": "admin",
+        })
+        token = create_access_token({"sub": "bench_admin", "role": "admin"}, timedelta(minutes=30))
+
+        report = []
+        for name, cached in (("cache off", False), ("cache on", True)):
+            principal_cache.clear()
+            principal_cache.hits = principal_cache.misses = 0
+            latencies = []
+            counter.reset()
+            for _ in range(args.iterations):
+                if not cached:
+                    principal_cache.clear()
+                with Timer() as timer:
+                    await get_current_user(token, db)
+                latencies.append(timer.elapsed_ms)
+            report.append({
+                "mode": name,
+                "requests": args.iterations,
+                "round_trips_per_request": round(counter.reset() / args.iterations, 3),
+                "hit_ratio": principal_cache.stats()["hit_ratio"],
+                **summarize(latencies),
+            })
+        print_report(report, args.json)
+    finally:
+        await client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,156 @@
+"""
+Benchmark Helpers Module.
+
+This module provides the shared plumbing for the scripts in the `benchmarks` package:
+a command listener that counts MongoDB round trips, latency percentile helpers, and
+a factory for the scratch database the benchmarks seed and drop.
+
+Benchmarks are run from the directory that contains the `app` package, e.g.::
+
+    python -m app.benchmarks.users_listing --uri mongodb://localhost:27017
+"""
+
+import argparse
+import json
+import math
+import time
+from typing import Dict, List
+
+from pymongo import monitoring
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.core.config import settings
+
+
+class RoundTripCounter(monitoring.CommandListener):
+    """
+    Command listener that counts the commands sent to the server.
+
+    Every started command (`find`, `getMore`, `aggregate`, `insert`, ...) is one
+    network round trip, which is the number the benchmarks compare.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def reset(self) -> int:
+        """
+        Reset the counter.
+
+        Returns:
+            int: The number of round trips counted before the reset.
+        """
+        count, self.count = self.count, 0
+        return count
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Return the nearest-rank percentile of `samples`.
+
+    Args:
+        samples (List[float]): The measured values.
+        pct (float): The percentile to compute, between 0 and 100.
+
+    Returns:
+        float: The percentile value, or 0.0 when there are no samples.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """
+    Summarize latency samples expressed in milliseconds.
+
+    Args:
+        samples_ms (List[float]): The measured latencies.
+
+    Returns:
+        Dict[str, float]: Mean, p50, p95 and p99 latencies rounded to microseconds.
+    """
+    mean = sum(samples_ms) / len(samples_ms) if samples_ms else 0.0
+    return {
+        "mean_ms": round(mean, 3),
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+    }
+
+
+class Timer:
+    """
+    Context manager measuring wall-clock time in milliseconds.
+    """
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed_ms = (time.perf_counter() - self.start) * 1000
+
+
+def base_parser(description: str) -> argparse.ArgumentParser:
+    """
+    Build an argument parser with the options shared by every benchmark.
+
+    Args:
+        description (str): The description shown by `--help`.
+
+    Returns:
+        argparse.ArgumentParser: The parser, ready for benchmark-specific options.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--uri", default=settings.MONGODB_URI, help="MongoDB connection URI")
+    parser.add_argument("--db", default="bench_bazzy_ecommerce", help="Scratch database name (dropped afterwards)")
+    parser.add_argument("--iterations", type=int, default=20, help="Measured iterations per scenario")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser
+
+
+def connect(uri: str, db_name: str):
+    """
+    Connect to MongoDB with a round-trip counter attached.
+
+    Args:
+        uri (str): The MongoDB connection URI.
+        db_name (str): The scratch database name.
+
+    Returns:
+        tuple: The client, the database and the `RoundTripCounter`.
+    """
+    counter = RoundTripCounter()
+    client = AsyncIOMotorClient(uri, event_listeners=[counter])
+    return client, client[db_name], counter
+
+
+def print_report(report, as_json: bool = False) -> None:
+    """
+    Print a benchmark report as aligned rows or as JSON.
+
+    Args:
+        report (List[dict]): One dictionary per measured scenario.
+        as_json (bool): Whether to print JSON instead of a table.
+    """
+    if as_json:
+        print(json.dumps(report, indent=2))
+        return
+    if not report:
+        return
+    columns = list(report[0].keys())
+    widths = {c: max(len(c), *(len(str(row.get(c, ""))) for row in report)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in report:
+        print("  ".join(str(row.get(c, "")).ljust(widths[c]) for c in columns))
@@ -0,0 +1,144 @@
+"""
+Flash Sale Benchmark.
+
+Drives the ASGI app in-process with `httpx` and fires `--buyers` concurrent
+`POST /sales/sales` requests at a single good with `--stock` units. Every buyer can
+afford the good, so exactly `--stock` purchases must succeed; the run fails if the
+good is oversold, a wallet goes negative or the purchase log disagrees. Reports
+sales/sec, request latency percentiles and the number of `purchases` inserts, once per
+`PURCHASE_WRITE_MODE`: "inline" pays one insert per sale, the group-commit modes one
+per batch. With `--slots` the good's stock is split across that many stock slots, so
+concurrent sales stop contending on a single document. Requests arriving after the
+good has sold out are rejected by the stock gate; `gate_rejected` counts them.
+
+Run it against a replica set to exercise the transactional path; on a standalone
+server sales fall back to compensation.
+
+Usage::
+
+    python -m app.benchmarks.flash_sale --buyers 500 --stock 100 --modes inline,flush,async
+    python -m app.benchmarks.flash_sale --buyers 2000 --stock 1000 --modes flush --slots 16
+"""
+
+import asyncio
+
+import httpx
+
+from app.benchmarks.common import Timer, base_parser, connect, print_report, summarize
+from app.core.config import settings
+from app.core.stock_gate import stock_gate
+from app.db.database import get_database
+from app.db.rollups import sales_rollups
+from app.db.write_buffer import purchase_writes
+from app.main import app
+from app.services import sales
+from app.services.sales import SalesService
+
+PRICE = 10.0
+
+
+async def seed(db, buyers: int, stock: int) -> None:
+    """
+    Create the good and one funded buyer per request.
+    """
+    await db["goods"].insert_one({"name": "flash_good", "price": PRICE, "count": stock, "description": ""})
+    result = await db["users"].insert_many([
+        {"username": f"buyer_{i}", "email": f"buyer_{i}@example.com", "role": "user"}
+        for i in range(buyers)
+    ])
+    await db["wallets"].insert_many([
+        {"user_id": str(user_id), "balance": PRICE, "currency": "USD"} for user_id in result.inserted_ids
+    ])
+
+
+async def run_scenario(client: httpx.AsyncClient, buyers: int) -> dict:
+    """
+    Fire one purchase per buyer concurrently and time each request.
+    """
+    async def buy(i: int):
+        with Timer() as timer:
+            response = await client.post(
+                "/sales/sales", json={"username": f"buyer_{i}", "good_name": "flash_good"}
+            )
+        return response.status_code, timer.elapsed_ms
+
+    with Timer() as total:
+        results = await asyncio.gather(*[buy(i) for i in range(buyers)])
+
+    statuses = [code for code, _ in results]
+    sold = statuses.count(200)
+    return {
+        "sold": sold,
+        "rejected": statuses.count(400),
+        "errors": len(statuses) - sold - statuses.count(400),
+        "sales_per_s": round(sold / (total.elapsed_ms / 1000), 1),
+        **summarize([elapsed for _, elapsed in results]),
+    }
+
+
+async def check_invariants(db, stock: int, sold: int) -> None:
+    """
+    Assert the good, the wallets and the purchase log agree with the responses.
+    """
+    good = await SalesService.get_good_details(db, "flash_good")
+    purchases = await db["purchases"].count_documents({"good_name": "flash_good"})
+    overdrawn = await db["wallets"].count_documents({"balance": {"$lt": 0}})
+    charged = await db["wallets"].count_documents({"balance": 0})
+    assert sold == stock, f"expected {stock} sales, got {sold}"
+    assert good["count"] == 0, f"stock left at {good['count']}"
+    assert purchases == sold, f"{purchases} purchases recorded for {sold} sales"
+    assert overdrawn == 0, f"{overdrawn} wallets overdrawn"
+    assert charged == sold, f"{charged} wallets charged for {sold} sales"
+
+
+async def main():
+    parser = base_parser(__doc__)
+    parser.add_argument("--buyers", type=int, default=500, help="Concurrent purchase requests")
+    parser.add_argument("--stock", type=int, default=100, help="Units of the good on sale")
+    parser.add_argument("--slots", type=int, default=1, help="Stock slots the good is split across")
+    parser.add_argument(
+        "--modes", default="inline,flush,async", help="Comma-separated PURCHASE_WRITE_MODE values to compare"
+    )
+    args = parser.parse_args()
+
+    client, db, _ = connect(args.uri, args.db)
+    app.dependency_overrides[get_database] = lambda: db
+    try:
+        report = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            for write_mode in args.modes.split(","):
+                settings.PURCHASE_WRITE_MODE = write_mode
+                await client.drop_database(args.db)
+                await seed(db, args.buyers, args.stock)
+                if args.slots > 1:
+                    await SalesService.set_stock_slots(db, "flash_good", args.slots)
+                await stock_gate.refresh(db)
+                rejected = stock_gate.rejected
+
+                batches = purchase_writes.batches
+                result = await run_scenario(http, args.buyers)
+                await purchase_writes.drain()
+                await sales_rollups.drain()
+                await check_invariants(db, args.stock, result["sold"])
+
+                inserts = result["sold"] if write_mode == "inline" else purchase_writes.batches - batches
+                report.append({
+                    "sale": "transaction" if sales._transactions_supported else "compensation",
+                    "purchase_writes": write_mode,
+                    "buyers": args.buyers,
+                    "stock": args.stock,
+                    "slots": args.slots,
+                    "purchase_inserts": inserts,
+                    "gate_rejected": stock_gate.rejected - rejected,
+                    **result,
+                })
+        print_report(report, args.json)
+    finally:
+        app.dependency_overrides.clear()
+        await client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
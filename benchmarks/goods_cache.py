@@ -0,0 +1,102 @@
+"""
+Goods Cache Benchmark.
+
+Drives the ASGI app in-process with `httpx` and has `--concurrency` clients read
+`GET /sales/goods/{good_name}` for random goods out of `--goods` seeded ones, with the
+goods read-through cache disabled and enabled. Reports requests/sec, latency
+percentiles, MongoDB round trips per request and the cache hit ratio. With the cache
+on, round trips come only from cold goods and from re-reading counts older than
+`GOODS_CACHE_COUNT_SECONDS`.
+
+Usage::
+
+    python -m app.benchmarks.goods_cache --goods 100 --concurrency 50 --iterations 200
+"""
+
+import asyncio
+import random
+
+import httpx
+
+from app.benchmarks.common import Timer, base_parser, connect, print_report, summarize
+from app.core.config import settings
+from app.db.database import get_database
+from app.main import app
+from app.services.sales import goods_cache
+
+
+async def seed(db, goods: int) -> None:
+    """
+    Create the goods read by the clients.
+    """
+    await db["goods"].create_index("name", unique=True)
+    await db["goods"].insert_many([
+        {"name": f"good_{i:05d}", "price": 10.0, "count": 100, "description": f"Description of good {i}"}
+        for i in range(goods)
+    ])
+
+
+async def run_scenario(http: httpx.AsyncClient, goods: int, concurrency: int, iterations: int) -> dict:
+    """
+    Run `concurrency` clients that each read `iterations` random goods, timing each request.
+    """
+    async def browse():
+        latencies = []
+        for _ in range(iterations):
+            with Timer() as timer:
+                response = await http.get(f"/sales/goods/good_{random.randrange(goods):05d}")
+            assert response.status_code == 200, response.text
+            latencies.append(timer.elapsed_ms)
+        return latencies
+
+    with Timer() as total:
+        results = await asyncio.gather(*[browse() for _ in range(concurrency)])
+
+    latencies = [elapsed for client_latencies in results for elapsed in client_latencies]
+    return {
+        "requests": len(latencies),
+        "req_per_s": round(len(latencies) / (total.elapsed_ms / 1000), 1),
+        **summarize(latencies),
+    }
+
+
+async def main():
+    parser = base_parser(__doc__)
+    parser.set_defaults(iterations=200)
+    parser.add_argument("--goods", type=int, default=100, help="Goods in the catalog")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent clients")
+    args = parser.parse_args()
+
+    client, db, counter = connect(args.uri, args.db)
+    app.dependency_overrides[get_database] = lambda: db
+    try:
+        await client.drop_database(args.db)
+        await seed(db, args.goods)
+
+        report = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            for name, ttl in (("cache off", 0), ("cache on", settings.GOODS_CACHE_TTL_SECONDS)):
+                goods_cache.ttl = ttl
+                goods_cache.clear()
+                goods_cache.hits = goods_cache.misses = 0
+                counter.reset()
+                result = await run_scenario(http, args.goods, args.concurrency, args.iterations)
+                report.append({
+                    "mode": name,
+                    "goods": args.goods,
+                    "concurrency": args.concurrency,
+                    "round_trips_per_request": round(counter.reset() / result["requests"], 3),
+                    "hit_ratio": goods_cache.stats()["hit_ratio"],
+                    **result,
+                })
+        print_report(report, args.json)
+    finally:
+        goods_cache.ttl = settings.GOODS_CACHE_TTL_SECONDS
+        app.dependency_overrides.clear()
+        await client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
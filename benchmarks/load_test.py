@@ -0,0 +1,303 @@
+"""
+Load Test Scenario Runner.
+
+Drives `app.main:app` in-process through `httpx.AsyncClient` with `--concurrency`
+closed-loop clients per scenario, each sending its next request as soon as the previous
+one completes, for `--duration` seconds (or until `--iterations` requests have been
+sent, when given). Every scenario seeds a fresh scratch database first. Reports, per
+scenario, the requests sent, throughput, latency percentiles, the error rate and the
+responses per status code. A request is an error when it raises or its status code is
+not one the scenario expects; a flash sale that sells out, for example, expects 400s.
+
+Scenarios:
+
+- `browse`: catalog browsing; one in four requests pages through `GET /sales/goods`,
+  the others read `GET /sales/goods/{good_name}` for random goods.
+- `login`: a login storm of `POST /auth/login` across `--users` accounts.
+- `flash_sale`: `POST /sales/sales` contention on one good with `--stock` units, one
+  funded buyer per request; reports the units sold and fails on overselling.
+- `admin_list`: `GET /users/` pages with an admin token.
+
+`--backend mongod` (the default) runs against the server at `--uri`; `--backend memory`
+runs against an in-process `mongomock_motor` stand-in, which needs no server. The
+stand-in has no transactions and no compatible `bulk_write`, so sales fall back to
+compensation, the `sales_daily` rollups are switched off and round trips are not counted.
+
+Usage::
+
+    python -m app.benchmarks.load_test --scenarios browse,login --concurrency 50 --duration 10
+    python -m app.benchmarks.load_test --backend memory --iterations 2000 --output report.json
+"""
+
+import abc
+import asyncio
+import itertools
+import json
+import random
+from collections import Counter
+from datetime import timedelta
+from typing import Callable, Dict
+
+import httpx
+
+from app.benchmarks.common import Timer, base_parser, connect, print_report, summarize
+from app.core.config import settings
+from app.core.security import create_access_token, get_password_hash, principal_cache
+from app.core.stock_gate import stock_gate
+from app.db.database import get_database
+from app.db.rollups import sales_rollups
+from app.db.write_buffer import purchase_writes
+from app.main import app
+from app.services.sales import goods_cache, goods_pages
+
+PRICE = 10.0
+
+
+class Scenario(abc.ABC):
+    """
+    A seeded workload: `request` is called with the client, the request number and the
+    calling client's state, and returns the response.
+
+    Attributes:
+        name (str): The name selected with `--scenarios`.
+        expected (set): The status codes that do not count as errors.
+    """
+
+    name = ""
+    expected = {200}
+
+    def __init__(self, args):
+        self.args = args
+
+    async def seed(self, db) -> None:
+        pass
+
+    @abc.abstractmethod
+    async def request(self, http: httpx.AsyncClient, i: int, state: dict) -> httpx.Response:
+        pass
+
+    async def check(self, db, statuses: Counter) -> dict:
+        """
+        Return scenario-specific report fields once the run is over.
+        """
+        return {}
+
+
+class Browse(Scenario):
+    name = "browse"
+
+    async def seed(self, db) -> None:
+        await db["goods"].create_index("name", unique=True)
+        await db["goods"].insert_many([
+            {"name": f"good_{i:05d}", "price": PRICE, "count": 100, "description": f"Description of good {i}"}
+            for i in range(self.args.goods)
+        ])
+
+    async def request(self, http, i, state):
+        if i % 4:
+            return await http.get(f"/sales/goods/good_{random.randrange(self.args.goods):05d}")
+        params = {"limit": 20}
+        if state.get("cursor"):
+            params["cursor"] = state["cursor"]
+        response = await http.get("/sales/goods", params=params)
+        state["cursor"] = response.headers.get("X-Next-Cursor")
+        return response
+
+
+class Login(Scenario):
+    name = "login"
+
+    async def seed(self, db) -> None:
+        hashed_password = get_password_hash("bench_password")
+        await db["users"].insert_many([
+            {"username": f"user_{i}", "email": f"user_{i}@example.com", "hashed_password": hashed_password, "role": "user"}
+            for i in range(self.args.users)
+        ])
+
+    async def request(self, http, i, state):
+        return await http.post(
+            "/auth/login", data={"username": f"user_{i % self.args.users}", "password": "bench_password"}
+        )
+
+
+class FlashSale(Scenario):
+    name = "flash_sale"
+    # Requests after the good sells out are rejected with 400
+    expected = {200, 400}
+
+    async def seed(self, db) -> None:
+        await db["goods"].insert_one({"name": "flash_good", "price": PRICE, "count": self.args.stock, "description": ""})
+        result = await db["users"].insert_many([
+            {"username": f"buyer_{i}", "email": f"buyer_{i}@example.com", "role": "user"}
+            for i in range(self.args.buyers)
+        ])
+        await db["wallets"].insert_many([
+            {"user_id": str(user_id), "balance": PRICE, "currency": "USD"} for user_id in result.inserted_ids
+        ])
+        await stock_gate.refresh(db)
+
+    async def request(self, http, i, state):
+        return await http.post(
+            "/sales/sales", json={"username": f"buyer_{i % self.args.buyers}", "good_name": "flash_good"}
+        )
+
+    async def check(self, db, statuses):
+        await purchase_writes.drain()
+        await sales_rollups.drain()
+        sold = statuses.get("200", 0)
+        assert sold <= self.args.stock, f"oversold: {sold} sales of {self.args.stock} units"
+        return {"stock": self.args.stock, "sold": sold}
+
+
+class AdminList(Scenario):
+    name = "admin_list"
+
+    async def seed(self, db) -> None:
+        await db["users"].insert_one({
+            "username": "bench_admin",
+            "email": "bench_admin@example.com",
+            "hashed_password": get_password_hash("bench_password"),
+            "role": "admin",
+        })
+        await db["users"].insert_many([
+            {"username": f"user_{i:05d}", "email": f"user_{i}@example.com", "role": "user"}
+            for i in range(self.args.users)
+        ])
+        token = create_access_token({"sub": "bench_admin", "role": "admin"}, timedelta(minutes=30))
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    async def request(self, http, i, state):
+        pages = max(1, -(-self.args.users // 50))
+        params = {"limit": 50, "page": random.randint(1, pages)}
+        return await http.get("/users/", params=params, headers=self.headers)
+
+
+SCENARIOS: Dict[str, Callable[..., Scenario]] = {
+    scenario.name: scenario for scenario in (Browse, Login, FlashSale, AdminList)
+}
+
+
+def reset_caches() -> None:
+    """
+    Empty the process-local caches so a scenario does not start warm from the previous one.
+    """
+    for cache in (goods_cache, goods_pages, principal_cache):
+        cache.clear()
+
+
+async def run_scenario(
+    http: httpx.AsyncClient, scenario: Scenario, concurrency: int, duration: float, max_requests: int
+) -> dict:
+    """
+    Run `concurrency` closed-loop clients until `duration` seconds have passed or, when
+    `max_requests` is positive, that many requests have been sent.
+    """
+    numbers = itertools.count()
+    statuses: Counter = Counter()
+    latencies = []
+    errors = 0
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+
+    async def client():
+        nonlocal errors
+        state: dict = {}
+        while loop.time() < deadline:
+            i = next(numbers)
+            if max_requests and i >= max_requests:
+                return
+            try:
+                with Timer() as timer:
+                    response = await scenario.request(http, i, state)
+                status = str(response.status_code)
+                failed = response.status_code not in scenario.expected
+            except Exception as e:
+                status = type(e).__name__
+                failed = True
+            latencies.append(timer.elapsed_ms)
+            statuses[status] += 1
+            errors += failed
+
+    with Timer() as total:
+        await asyncio.gather(*[client() for _ in range(concurrency)])
+
+    requests = len(latencies)
+    return {
+        "requests": requests,
+        "req_per_s": round(requests / (total.elapsed_ms / 1000), 1),
+        **summarize(latencies),
+        "errors": errors,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+def memory_backend(db_name: str):
+    """
+    Create an in-process MongoDB stand-in.
+
+    Returns:
+        tuple: The client, the database and `None` in place of a round-trip counter.
+    """
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit("--backend memory requires mongomock-motor: pip install mongomock-motor")
+    settings.SALES_USE_TRANSACTIONS = False
+    settings.SALES_ROLLUP_MODE = "off"
+    client = AsyncMongoMockClient()
+    return client, client[db_name], None
+
+
+async def main():
+    parser = base_parser(__doc__)
+    parser.set_defaults(iterations=0)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--backend", choices=["mongod", "memory"], default="mongod", help="Database to run against")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent clients per scenario")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds each scenario runs for")
+    parser.add_argument("--goods", type=int, default=200, help="Goods in the catalog (browse)")
+    parser.add_argument("--users", type=int, default=500, help="User accounts (login, admin_list)")
+    parser.add_argument("--buyers", type=int, default=1000, help="Funded buyers (flash_sale)")
+    parser.add_argument("--stock", type=int, default=100, help="Units of the flash-sale good (flash_sale)")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if args.backend == "memory":
+        client, db, counter = memory_backend(args.db)
+    else:
+        client, db, counter = connect(args.uri, args.db)
+    app.dependency_overrides[get_database] = lambda: db
+    try:
+        report = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            for name in args.scenarios.split(","):
+                scenario = SCENARIOS[name](args)
+                await client.drop_database(args.db)
+                await scenario.seed(db)
+                reset_caches()
+                if counter:
+                    counter.reset()
+                result = await run_scenario(http, scenario, args.concurrency, args.duration, args.iterations)
+                row = {"scenario": name, "backend": args.backend, "concurrency": args.concurrency, **result}
+                if counter and result["requests"]:
+                    row["round_trips_per_request"] = round(counter.reset() / result["requests"], 3)
+                row.update(await scenario.check(db, result["statuses"]))
+                report.append(row)
+        print_report(report, args.json)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+    finally:
+        app.dependency_overrides.clear()
+        await client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
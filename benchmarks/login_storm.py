@@ -0,0 +1,97 @@
+"""
+Login Storm Benchmark.
+
+Drives the ASGI app in-process with `httpx` and measures `GET /sales/goods` latency
+while a storm of concurrent `POST /auth/login` requests is running, once with bcrypt
+on the event loop (`PASSWORD_HASH_EXECUTOR=inline`, the previous behaviour) and once
+with the bounded executor. Blocking bcrypt calls show up directly in the catalog p99.
+
+Usage::
+
+    python -m app.benchmarks.login_storm --logins 200 --iterations 200
+"""
+
+import asyncio
+
+import httpx
+
+from app.benchmarks.common import Timer, base_parser, connect, print_report, summarize
+from app.core import security
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.db.database import get_database
+from app.main import app
+
+
+async def run_scenario(client: httpx.AsyncClient, logins: int, iterations: int) -> dict:
+    """
+    Measure catalog latency while `logins` logins run concurrently.
+    """
+    stop = asyncio.Event()
+    login_count = 0
+
+    async def login_worker():
+        nonlocal login_count
+        while not stop.is_set():
+            response = await client.post(
+                "/auth/login", data={"username": "bench_user", "password": "bench_password"}
+            )
+            if response.status_code == 200:
+                login_count += 1
+
+    workers = [asyncio.create_task(login_worker()) for _ in range(logins)]
+    await asyncio.sleep(0.2)  # let the storm build up
+
+    latencies = []
+    with Timer() as total:
+        for _ in range(iterations):
+            with Timer() as timer:
+                response = await client.get("/sales/goods")
+            response.raise_for_status()
+            latencies.append(timer.elapsed_ms)
+
+    stop.set()
+    await asyncio.gather(*workers, return_exceptions=True)
+    return {
+        "logins_per_s": round(login_count / (total.elapsed_ms / 1000), 1),
+        **summarize(latencies),
+    }
+
+
+async def main():
+    parser = base_parser(__doc__)
+    parser.set_defaults(iterations=200)
+    parser.add_argument("--logins", type=int, default=200, help="Concurrent login requests")
+    args = parser.parse_args()
+
+    client, db, _ = connect(args.uri, args.db)
+    app.dependency_overrides[get_database] = lambda: db
+    try:
+        await client.drop_database(args.db)
+        await db["users"].insert_one({
+            "username": "bench_user",
+            "email": "bench_user@example.com",
+            "hashed_password": get_password_hash("bench_password"),
+            "role": "user",
+        })
+        await db["goods"].insert_many([
+            {"name": f"good_{i}", "price": 10.0, "count": 100, "description": ""} for i in range(50)
+        ])
+
+        report = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            for mode in ("inline", "thread"):
+                settings.PASSWORD_HASH_EXECUTOR = mode
+                security.shutdown_password_executor()
+                report.append({"bcrypt": mode, "logins": args.logins, **await run_scenario(http, args.logins, args.iterations)})
+        print_report(report, args.json)
+    finally:
+        app.dependency_overrides.clear()
+        security.shutdown_password_executor()
+        await client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,175 @@
+"""
+Product Search Benchmark.
+
+Seeds a synthetic catalog of `--products` products (one million by default) with the
+`products` indexes, then drives the ASGI app in-process with `httpx`: for each query
+shape, `--concurrency` clients send `--iterations` requests in total to
+`GET /products/search`, with an admin token. Reports requests/sec, latency percentiles, MongoDB round trips
+per request and the mean number of results per page.
+
+Product names combine a common adjective and noun with a model code shared by about
+ten products, so the shapes cover broad terms (tens of thousands of matches), rare
+terms, multi-term queries, phrases, category and price filters and a deep page.
+
+Seeding a million products takes a few minutes; `--keep` leaves the catalog in place
+afterwards and reuses it on the next run when it has the requested size.
+
+Usage::
+
+    python -m app.benchmarks.product_search --products 1000000 --concurrency 20 --iterations 500 --keep
+"""
+
+import asyncio
+import random
+import sys
+from datetime import timedelta
+
+import httpx
+
+from app.benchmarks.common import Timer, base_parser, connect, print_report, summarize
+from app.core.security import create_access_token
+from app.db.database import get_database
+from app.db.indexes import INDEXES
+from app.main import app
+
+ADJECTIVES = [
+    "classic", "compact", "deluxe", "ergonomic", "foldable", "heavy", "light", "modern", "portable",
+    "premium", "rugged", "slim", "smart", "sturdy", "vintage", "wireless", "waterproof", "quiet",
+]
+NOUNS = [
+    "backpack", "blender", "camera", "chair", "charger", "desk", "drill", "headphones", "heater",
+    "jacket", "kettle", "keyboard", "lamp", "monitor", "mouse", "speaker", "tent", "watch",
+]
+CATEGORIES = [
+    "electronics", "home", "office", "outdoor", "kitchen", "tools", "fashion", "sports", "garden", "toys",
+]
+TAGS = [
+    "bestseller", "eco", "gift", "new", "sale", "bundle", "refurbished", "limited", "travel", "kids",
+    "pro", "budget", "luxury", "handmade", "imported", "seasonal",
+]
+WORDS = ADJECTIVES + NOUNS + [
+    "battery", "cable", "colour", "durable", "easy", "fabric", "finish", "grip", "metal", "steel",
+    "warranty", "weight", "wood", "design", "comfort", "storage", "power", "size", "fit", "daily",
+]
+
+# Products per model code
+MODEL_SHARE = 10
+
+
+def product(rng: random.Random, i: int) -> dict:
+    """
+    Build the `i`-th synthetic product.
+    """
+    return {
+        "name": f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} m{i // MODEL_SHARE}",
+        "description": " ".join(rng.choices(WORDS, k=rng.randint(8, 20))),
+        "price": round(rng.uniform(1, 1000), 2),
+        "quantity": rng.randint(1, 500),
+        "category": rng.choice(CATEGORIES),
+        "tags": rng.sample(TAGS, k=rng.randint(1, 3)),
+    }
+
+
+async def seed(db, products: int, batch_size: int = 10000) -> None:
+    """
+    Insert the synthetic catalog, then build the `products` indexes over it.
+    """
+    rng = random.Random(42)
+    for start in range(0, products, batch_size):
+        await db["products"].insert_many(
+            [product(rng, i) for i in range(start, min(start + batch_size, products))], ordered=False
+        )
+        print(f"Seeded {min(start + batch_size, products)}/{products} products", file=sys.stderr)
+    await db["products"].create_indexes(INDEXES["products"])
+
+
+def query_shapes(products: int):
+    """
+    Return the query shapes, as (name, function building random search parameters).
+    """
+    models = max(1, products // MODEL_SHARE)
+    return [
+        ("broad term", lambda rng: {"q": rng.choice(NOUNS)}),
+        ("rare term", lambda rng: {"q": f"m{rng.randrange(models)}"}),
+        ("two terms", lambda rng: {"q": f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"}),
+        ("phrase", lambda rng: {"q": f'"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"'}),
+        ("category filter", lambda rng: {"q": rng.choice(NOUNS), "category": rng.choice(CATEGORIES)}),
+        ("price filter", lambda rng: {"q": rng.choice(NOUNS), "min_price": 100, "max_price": 200}),
+        ("deep page", lambda rng: {"q": rng.choice(NOUNS), "page": 10}),
+    ]
+
+
+async def run_scenario(http: httpx.AsyncClient, params, concurrency: int, iterations: int) -> dict:
+    """
+    Send `iterations` searches from `concurrency` clients, timing each request.
+    """
+    remaining = iterations
+    latencies = []
+    results = 0
+
+    async def search(rng: random.Random):
+        nonlocal remaining, results
+        while remaining > 0:
+            remaining -= 1
+            with Timer() as timer:
+                response = await http.get("/products/search", params=params(rng))
+            assert response.status_code == 200, response.text
+            latencies.append(timer.elapsed_ms)
+            results += len(response.json()["products"])
+
+    with Timer() as total:
+        await asyncio.gather(*[search(random.Random(i)) for i in range(concurrency)])
+
+    return {
+        "requests": len(latencies),
+        "req_per_s": round(len(latencies) / (total.elapsed_ms / 1000), 1),
+        "results_per_page": round(results / len(latencies), 1),
+        **summarize(latencies),
+    }
+
+
+async def main():
+    parser = base_parser(__doc__)
+    parser.set_defaults(iterations=200)
+    parser.add_argument("--products", type=int, default=1000000, help="Products in the synthetic catalog")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded catalog and reuse it next time")
+    args = parser.parse_args()
+
+    client, db, counter = connect(args.uri, args.db)
+    app.dependency_overrides[get_database] = lambda: db
+    try:
+        if not args.keep or await db["products"].estimated_document_count() != args.products:
+            await client.drop_database(args.db)
+            await seed(db, args.products)
+        await db["users"].update_one(
+            {"username": "bench_admin"},
+            {"$setOnInsert": {"email": "bench_admin@example.com", "hashed_password": "x", "role": "admin"}},
+            upsert=True,
+        )
+        token = create_access_token({"sub": "bench_admin", "role": "admin"}, timedelta(minutes=30))
+
+        report = []
+        transport = httpx.ASGITransport(app=app)
+        headers = {"Authorization": f"Bearer {token}"}
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as http:
+            for name, params in query_shapes(args.products):
+                counter.reset()
+                result = await run_scenario(http, params, args.concurrency, args.iterations)
+                report.append({
+                    "query": name,
+                    "products": args.products,
+                    "concurrency": args.concurrency,
+                    "round_trips_per_request": round(counter.reset() / result["requests"], 3),
+                    **result,
+                })
+        print_report(report, args.json)
+    finally:
+        app.dependency_overrides.clear()
+        if not args.keep:
+            await client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
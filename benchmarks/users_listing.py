@@ -0,0 +1,102 @@
+"""
+User Listing Benchmark.
+
+Compares the former N+1 implementation of `UserService.get_all_users` (one
+`wallets.find_one` per user plus a separate `count_documents`) with the aggregation
+pipeline, reporting MongoDB round trips and latency for 10, 100 and 1000-user pages.
+
+Usage::
+
+    python -m app.benchmarks.users_listing --users 2000 --iterations 20
+"""
+
+import asyncio
+
+from app.benchmarks.common import Timer, base_parser, connect, print_report, summarize
+from app.schemas.users import UserOut, UsersOut
+from app.services.users import UserService
+
+
+async def legacy_get_all_users(db, page: int, limit: int, search: str, role: str) -> UsersOut:
+    """
+    The previous implementation, kept here as the baseline.
+    """
+    skip = (page - 1) * limit
+    query = {}
+    if search:
+        query["username"] = {"$regex": search, "$options": "i"}
+    if role:
+        query["role"] = role
+    cursor = db["users"].find(query).skip(skip).limit(limit)
+    users = []
+    async for user in cursor:
+        wallet = await db["wallets"].find_one({"user_id": str(user["_id"])})
+        if wallet:
+            wallet["id"] = str(wallet["_id"])
+            wallet.pop("_id", None)
+        else:
+            wallet = {"id": None, "balance": 0.0, "transactions": []}
+        user["wallet"] = wallet
+        user["id"] = str(user["_id"])
+        user.pop("_id", None)
+        users.append(UserOut(**user))
+    total = await db["users"].count_documents(query)
+    return UsersOut(users=users, total=total, page=page, limit=limit)
+
+
+async def seed(db, count: int) -> None:
+    """
+    Insert `count` users, each with a wallet.
+    """
+    users = [
+        {
+            "username": f"bench_user_{i:07d}",
+            "email": f"bench_user_{i:07d}@example.com",
+            "hashed_password": "x",
+            "role": "user",
+        }
+        for i in range(count)
+    ]
+    result = await db["users"].insert_many(users)
+    await db["wallets"].insert_many([
+        {"user_id": str(user_id), "balance": 100.0, "transactions": []}
+        for user_id in result.inserted_ids
+    ])
+    await db["wallets"].create_index("user_id")
+
+
+async def main():
+    parser = base_parser(__doc__)
+    parser.add_argument("--users", type=int, default=2000, help="Number of users to seed")
+    args = parser.parse_args()
+
+    client, db, counter = connect(args.uri, args.db)
+    try:
+        await client.drop_database(args.db)
+        await seed(db, args.users)
+
+        report = []
+        for limit in (10, 100, 1000):
+            for name, implementation in (("before", legacy_get_all_users), ("after", UserService.get_all_users)):
+                await implementation(db, 1, limit, "", "user")  # warm up
+                latencies, round_trips = [], []
+                for _ in range(args.iterations):
+                    counter.reset()
+                    with Timer() as timer:
+                        await implementation(db, 1, limit, "", "user")
+                    latencies.append(timer.elapsed_ms)
+                    round_trips.append(counter.reset())
+                report.append({
+                    "page_size": limit,
+                    "implementation": name,
+                    "round_trips": max(round_trips),
+                    **summarize(latencies),
+                })
+        print_report(report, args.json)
+    finally:
+        await client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,340 @@
+"""
+Also-Bought Module.
+
+This module serves "customers who bought this also bought" recommendations from a
+precomputed, memory-mapped index file, and contains the offline job that builds it.
+
+The job reads `purchases` and `orders` in batches, groups them into one basket per
+user, builds the sparse item-item co-occurrence matrix with NumPy/SciPy and keeps the
+top `k` neighbours of every item. It writes the index to a temporary file and renames
+it over `ALSO_BOUGHT_PATH`, so a rebuild replaces the index atomically::
+
+    python -m app.core.also_bought build --k 20
+
+NumPy and SciPy are only needed by the job. Serving a lookup maps the file and binary
+searches its sorted item names with the standard library, without reading it into
+memory, and picks up a rebuilt file on the next lookup.
+
+File layout (little-endian)::
+
+    header      magic "ALSOBUY1", item count n (u32), neighbours per item k (u32),
+                build time (u64, Unix seconds)
+    offsets     n + 1 byte offsets (u64) into the names blob
+    names       the UTF-8 item names, sorted bytewise, concatenated
+    padding     to a multiple of 8 bytes
+    neighbours  n x k records of (item index (u32), score (f32)), best first;
+                unused records hold the index 0xFFFFFFFF
+"""
+
+import argparse
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"ALSOBUY1"
+HEADER = struct.Struct("<8sIIQ")
+OFFSET = struct.Struct("<Q")
+RECORD = struct.Struct("<If")
+NO_NEIGHBOUR = 0xFFFFFFFF
+
+
+def write_index(path: str, names: Sequence[str], k: int, records: bytes) -> None:
+    """
+    Write an index file and atomically replace `path` with it.
+
+    Args:
+        path (str): The index file to replace.
+        names (Sequence[str]): The item names, sorted by their UTF-8 bytes.
+        k (int): The number of neighbour records per item.
+        records (bytes): The n x k packed `RECORD`s, in the order of `names`.
+    """
+    encoded = [name.encode() for name in names]
+    if len(records) != len(encoded) * k * RECORD.size:
+        raise ValueError("records do not match the number of items and k")
+    offsets = [0]
+    for name in encoded:
+        offsets.append(offsets[-1] + len(name))
+    names_end = HEADER.size + OFFSET.size * len(offsets) + offsets[-1]
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(encoded), k, int(time.time())))
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        f.writelines(encoded)
+        f.write(b"\0" * (-names_end % 8))
+        f.write(records)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class AlsoBoughtIndex:
+    """
+    Reads neighbour lists from the memory-mapped index at `ALSO_BOUGHT_PATH`.
+
+    The file is re-opened when it has been replaced since it was mapped, so a rebuild
+    is picked up without restarting the worker.
+    """
+
+    def __init__(self):
+        self._path: Optional[str] = None
+        self._inode: Optional[Tuple[int, int]] = None
+        self._map: Optional[mmap.mmap] = None
+        self._n = 0
+        self._k = 0
+        self._built_at = 0
+        self._names_start = 0
+        self._records_start = 0
+        self.lookups = 0
+        self.reloads = 0
+
+    def _open(self) -> bool:
+        """
+        Map the current index file if it changed. Returns False if there is none.
+        """
+        path = settings.ALSO_BOUGHT_PATH
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._close()
+            return False
+        inode = (stat.st_dev, stat.st_ino)
+        if self._map is not None and path == self._path and inode == self._inode:
+            return True
+
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n, k, built_at = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            mapped.close()
+            raise ValueError(f"{path} is not an also-bought index")
+        self._close()
+        self._map, self._path, self._inode = mapped, path, inode
+        self._n, self._k, self._built_at = n, k, built_at
+        self._names_start = HEADER.size + OFFSET.size * (n + 1)
+        names_end = self._names_start + self._offset(n)
+        self._records_start = names_end + (-names_end % 8)
+        self.reloads += 1
+        return True
+
+    def _close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._inode = None
+
+    def _offset(self, index: int) -> int:
+        return OFFSET.unpack_from(self._map, HEADER.size + OFFSET.size * index)[0]
+
+    def _name(self, index: int) -> bytes:
+        return self._map[self._names_start + self._offset(index):self._names_start + self._offset(index + 1)]
+
+    def _find(self, name: bytes) -> Optional[int]:
+        low, high = 0, self._n
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < name:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self._n and self._name(low) == name else None
+
+    def neighbours(self, name: str, limit: int) -> List[Tuple[str, float]]:
+        """
+        Return the items most often bought by the buyers of `name`.
+
+        Args:
+            name (str): The item name.
+            limit (int): The maximum number of neighbours; at most the index's `k`.
+
+        Returns:
+            List[Tuple[str, float]]: (item name, score) pairs, best first. Empty if
+            there is no index or the item has no co-purchases.
+        """
+        self.lookups += 1
+        if not self._open():
+            return []
+        index = self._find(name.encode())
+        if index is None:
+            return []
+        result = []
+        start = self._records_start + RECORD.size * self._k * index
+        for position in range(min(limit, self._k)):
+            neighbour, score = RECORD.unpack_from(self._map, start + RECORD.size * position)
+            if neighbour == NO_NEIGHBOUR:
+                break
+            result.append((self._name(neighbour).decode(), score))
+        return result
+
+    def stats(self) -> dict:
+        """
+        Return the loaded index's size and the lookup statistics.
+
+        Returns:
+            dict: Items and neighbours per item, build time, lookups and reloads.
+        """
+        return {
+            "path": settings.ALSO_BOUGHT_PATH,
+            "loaded": self._map is not None,
+            "items": self._n,
+            "k": self._k,
+            "built_at": self._built_at or None,
+            "lookups": self.lookups,
+            "reloads": self.reloads,
+        }
+
+
+also_bought = AlsoBoughtIndex()
+
+
+async def read_baskets(
+    db: AsyncIOMotorDatabase, batch_size: int = 10000
+) -> Tuple[List[str], "numpy.ndarray", "numpy.ndarray"]:
+    """
+    Read every (user, item) purchase pair from `purchases` and `orders` in batches.
+
+    Returns:
+        Tuple[List[str], ndarray, ndarray]: The item names sorted bytewise, and the
+        user and item index of every pair.
+    """
+    import numpy as np
+
+    users: Dict[str, int] = {}
+    items: Dict[str, int] = {}
+    user_chunks, item_chunks = [], []
+    sources = (
+        ("purchases", {"username": 1, "good_name": 1}, lambda doc: [doc["good_name"]]),
+        ("orders", {"username": 1, "items.good_name": 1}, lambda doc: [item["good_name"] for item in doc["items"]]),
+    )
+    for collection, projection, names in sources:
+        batch_users, batch_items = [], []
+        async for doc in db[collection].find({}, projection).batch_size(batch_size):
+            user = users.setdefault(doc["username"], len(users))
+            for name in names(doc):
+                batch_users.append(user)
+                batch_items.append(items.setdefault(name, len(items)))
+            if len(batch_users) >= batch_size:
+                user_chunks.append(np.array(batch_users, dtype=np.uint32))
+                item_chunks.append(np.array(batch_items, dtype=np.uint32))
+                batch_users, batch_items = [], []
+        user_chunks.append(np.array(batch_users, dtype=np.uint32))
+        item_chunks.append(np.array(batch_items, dtype=np.uint32))
+
+    # Renumber the items in name order, as the index file stores them
+    names = sorted(items, key=str.encode)
+    order = np.empty(len(items), dtype=np.uint32)
+    order[[items[name] for name in names]] = np.arange(len(names), dtype=np.uint32)
+    return names, np.concatenate(user_chunks), order[np.concatenate(item_chunks)]
+
+
+def top_neighbours(user_ids, item_ids, n_items: int, k: int, score: str = "count") -> bytes:
+    """
+    Compute the top `k` co-purchased items of every item, as packed index records.
+
+    Baskets are the rows of a binary user x item matrix B; the co-occurrence matrix
+    is C = BᵀB with its diagonal removed, so C[i, j] is the number of users who
+    bought both i and j. With `score="cosine"`, C[i, j] is divided by
+    sqrt(C[i, i] * C[j, j]) so that items bought by everyone do not top every list.
+    Selecting the top k per row is a single lexsort over all non-zeros.
+
+    Args:
+        user_ids (ndarray): The user index of every purchase.
+        item_ids (ndarray): The item index of every purchase.
+        n_items (int): The number of items.
+        k (int): The number of neighbours to keep per item.
+        score (str): "count" or "cosine".
+
+    Returns:
+        bytes: n_items x k `RECORD`s.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    n_users = int(user_ids.max()) + 1 if len(user_ids) else 0
+    baskets = sparse.csr_matrix(
+        (np.ones(len(user_ids), dtype=np.float32), (user_ids, item_ids)), shape=(n_users, n_items)
+    )
+    baskets.sum_duplicates()
+    baskets.data[:] = 1  # a user counts once per item, however often they bought it
+    co = (baskets.T @ baskets).tocoo()
+    buyers = np.asarray(baskets.sum(axis=0)).ravel()
+
+    keep = co.row != co.col
+    rows, cols, scores = co.row[keep], co.col[keep], co.data[keep].astype(np.float32)
+    if score == "cosine":
+        scores = scores / np.sqrt(buyers[rows] * buyers[cols]).astype(np.float32)
+
+    order = np.lexsort((cols, -scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    starts = np.searchsorted(rows, np.arange(n_items))
+    rank = np.arange(len(rows)) - starts[rows]
+    top = rank < k
+
+    records = np.zeros((n_items, k), dtype=[("item", "<u4"), ("score", "<f4")])
+    records["item"] = NO_NEIGHBOUR
+    records["item"][rows[top], rank[top]] = cols[top]
+    records["score"][rows[top], rank[top]] = scores[top]
+    return records.tobytes()
+
+
+async def build(db: AsyncIOMotorDatabase, k: int = 20, score: str = "count", batch_size: int = 10000) -> int:
+    """
+    Rebuild the also-bought index at `ALSO_BOUGHT_PATH` from the purchase history.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+        k (int): The number of neighbours to keep per item.
+        score (str): "count" or "cosine"; see `top_neighbours`.
+        batch_size (int): The number of documents read per batch.
+
+    Returns:
+        int: The number of items in the index.
+
+    Raises:
+        RuntimeError: If NumPy or SciPy is not installed.
+    """
+    try:
+        import numpy  # noqa: F401
+        import scipy  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError("Building the also-bought index requires numpy and scipy (pip install numpy scipy)") from e
+
+    names, user_ids, item_ids = await read_baskets(db, batch_size)
+    records = top_neighbours(user_ids, item_ids, len(names), k, score)
+    write_index(settings.ALSO_BOUGHT_PATH, names, k, records)
+    return len(names)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Build the also-bought recommendation index.")
+    parser.add_argument("command", choices=["build"], help="Rebuild the index from purchases and orders")
+    parser.add_argument("--uri", default=settings.MONGODB_URI, help="MongoDB connection URI")
+    parser.add_argument("--db", default=settings.MONGODB_DB_NAME, help="Database name")
+    parser.add_argument("--k", type=int, default=20, help="Neighbours kept per item")
+    parser.add_argument("--score", choices=["count", "cosine"], default="count", help="Neighbour score")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Documents read per batch")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    client = AsyncIOMotorClient(args.uri)
+    try:
+        items = await build(client[args.db], args.k, args.score, args.batch_size)
+        print(f"Wrote {items} items to {settings.ALSO_BOUGHT_PATH}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
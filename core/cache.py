@@ -0,0 +1,157 @@
+"""
+In-Process Cache Module.
+
+This module provides `TTLCache`, a bounded in-memory cache combining a time-to-live
+with least-recently-used eviction. It is used to keep hot, rarely changing data (such
+as authenticated principals) in the worker process instead of reading it from MongoDB
+on every request. Each worker process has its own cache: explicit invalidation only
+reaches the local process, so the TTL bounds how stale other workers can be.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a time-to-live.
+
+    Attributes:
+        maxsize (int): The maximum number of entries. 0 disables the cache.
+        ttl (float): The default time-to-live of an entry, in seconds. 0 disables the cache.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value for `key`, or `default` if absent or expired.
+
+        Args:
+            key (Hashable): The cache key.
+            default (Any): The value returned on a miss.
+
+        Returns:
+            Any: The cached value or `default`.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable) -> Any:
+        """
+        Return the cached value for `key` without counting a lookup or refreshing its recency.
+
+        Used by write paths that patch an entry only if it is cached.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            Any: The cached value, or None if absent or expired.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store `value` under `key`, evicting the least recently used entries if full.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to cache.
+            ttl (Optional[float]): Time-to-live in seconds, capped by the cache's own TTL.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> Any:
+        """
+        Remove `key` from the cache.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            Any: The removed value, or None if the key was not cached.
+        """
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[0] if entry else None
+
+    def discard_where(self, predicate: Callable[[Any], bool]) -> int:
+        """
+        Remove every entry whose value matches `predicate`.
+
+        Args:
+            predicate (Callable[[Any], bool]): Called with each cached value.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        with self._lock:
+            keys = [key for key, (value, _) in self._data.items() if predicate(value)]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        """
+        Remove every entry.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """
+        Return the cache size and hit statistics.
+
+        Returns:
+            dict: Size, bounds, hit/miss counts, hit ratio, evictions and expirations.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
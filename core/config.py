@@ -7,6 +7,7 @@ settings from a `.env` file using `python-dotenv`.
 """
 
 from pydantic import BaseSettings
+from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables from a .env file
@@ -25,12 +26,109 @@ class Settings(BaseSettings):
         SECRET_KEY (str): The secret key for securing the application. Defaults to "your_secret_key".
         ALGORITHM (str): The algorithm used for token signing. Defaults to "HS256".
         ACCESS_TOKEN_EXPIRE_MINUTES (int): Token expiration time in minutes. Defaults to 30.
+        MONGODB_ENSURE_INDEXES (bool): Whether to create the declared indexes at startup. Defaults to True.
+        MONGODB_MAX_POOL_SIZE (int): Maximum number of connections per server. Defaults to 100.
+        MONGODB_MIN_POOL_SIZE (int): Number of connections kept open per server. Defaults to 0.
+        MONGODB_MAX_IDLE_TIME_MS (Optional[int]): Idle time after which a pooled connection is closed.
+            Defaults to None (no limit).
+        MONGODB_WAIT_QUEUE_TIMEOUT_MS (Optional[int]): How long an operation waits for a free connection
+            before failing. Defaults to None (wait indefinitely).
+        MONGODB_COMPRESSORS (str): Comma-separated wire compressors to negotiate, e.g. "zstd,snappy".
+            Requires the `zstandard` / `python-snappy` packages. Defaults to "" (no compression).
+        MONGODB_SERVER_SELECTION_TIMEOUT_MS (int): How long to wait for a suitable server. Defaults to 30000.
+        MONGODB_SLOW_COMMAND_MS (float): Commands taking at least this long are logged as slow. Defaults to 100.
+        AUTH_CACHE_TTL_SECONDS (float): How long a resolved principal is cached per token. 0 disables
+            the cache. Defaults to 30.
+        AUTH_CACHE_MAX_SIZE (int): Maximum number of cached principals per process. Defaults to 10000.
+        AUTH_TRUST_ROLE_CLAIM (bool): Authorize admin endpoints from the signed `role` claim without
+            reading the user. Defaults to True.
+        AUTH_REVOCATION_SYNC_SECONDS (float): How often each worker reloads token revocations. Defaults to 5.
+        PASSWORD_HASH_EXECUTOR (str): Where bcrypt runs: "thread", "process" or "inline" (on the event
+            loop). Defaults to "thread"; bcrypt releases the GIL, so threads hash in parallel.
+        PASSWORD_HASH_MAX_WORKERS (Optional[int]): Maximum concurrent bcrypt jobs. Defaults to the CPU count.
+        PASSWORD_HASH_MAX_QUEUE (int): Maximum jobs waiting for a worker before requests are rejected
+            with 503. Defaults to 1000.
+        SALES_USE_TRANSACTIONS (bool): Commit each sale in a multi-document transaction when the server
+            supports it, instead of compensating failed steps. Defaults to True.
+        IDEMPOTENCY_TTL_SECONDS (float): How long the outcome of a request with an `Idempotency-Key` is
+            replayed to retries. Defaults to 86400 (24 hours).
+        IDEMPOTENCY_LOCK_SECONDS (float): How long a duplicate waits for the original request before
+            failing with 409; also how long a crashed worker's claim blocks the key. Defaults to 30.
+        IDEMPOTENCY_CACHE_TTL_SECONDS (float): How long outcomes stay in the in-process cache. Defaults to 300.
+        IDEMPOTENCY_CACHE_MAX_SIZE (int): Maximum number of cached outcomes per process. Defaults to 10000.
+        PURCHASE_WRITE_MODE (str): How sales write their purchase record: "inline" (inside the sale),
+            "flush" (group-committed; the response waits for the batch and fails with 500 if the record
+            could not be written) or "async" (group-committed, fire-and-forget). Defaults to "flush".
+        PURCHASE_BATCH_SIZE (int): Flush buffered purchase records once this many are waiting. Defaults to 500.
+        PURCHASE_BATCH_INTERVAL_MS (float): Flush buffered purchase records at least this often. Defaults to 5.
+        PURCHASE_RETRY_SECONDS (float): How long buffered purchase records failing with transient errors,
+            such as during a replica set election, are retried with backoff. Defaults to 60.
+        PURCHASE_DEAD_LETTER_PATH (str): The file buffered purchase records that could not be written are
+            appended to, replayed by `python -m app.db.write_buffer replay`. Defaults to
+            "data/purchases.deadletter.jsonl".
+        STOCK_SLOT_CACHE_SECONDS (float): How long a worker remembers that a good's stock is split across
+            stock slots, and its price. Defaults to 5.
+        STOCK_GATE_ENABLED (bool): Reject purchases of goods known to be sold out without database access.
+            Defaults to True.
+        STOCK_GATE_REFRESH_SECONDS (float): How often each worker reconciles its stock gate with the
+            database. Defaults to 5.
+        GOODS_CACHE_TTL_SECONDS (float): How long a worker serves a good's name, price and description
+            from memory. 0 disables the goods cache. Defaults to 60.
+        GOODS_CACHE_MAX_SIZE (int): The maximum number of goods cached per worker. Defaults to 10000.
+        GOODS_CACHE_COUNT_SECONDS (float): How old a cached good's stock count may be before it is read
+            again; sales made by this worker are applied to it immediately. Defaults to 1.
+        GOODS_LISTING_CACHE_SECONDS (float): How long a worker serves a page of the goods listing from
+            memory. 0 disables the listing cache. Defaults to 2.
+        SALES_ROLLUP_MODE (str): How completed sales are added to the `sales_daily` rollups: "buffered"
+            (summed per good and day and written in the background), "inline" (one upsert per sale before
+            the response) or "off". Defaults to "buffered".
+        SALES_ROLLUP_INTERVAL_MS (float): How often buffered rollup increments are written. Defaults to 1000.
+        TOP_SELLERS_REFRESH_SECONDS (float): How often each worker rebuilds its top-seller rankings from the
+            database, picking up other workers' sales. 0 rebuilds them at startup only. Defaults to 300.
+        ALSO_BOUGHT_PATH (str): The memory-mapped also-bought index, written by
+            `python -m app.core.also_bought build`. Defaults to "data/also_bought.idx".
     """
     MONGODB_URI: str
     MONGODB_DB_NAME: str = "edu_platform"
     SECRET_KEY: str = "your_secret_key"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    MONGODB_ENSURE_INDEXES: bool = True
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None
+    MONGODB_COMPRESSORS: str = ""
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 30000
+    MONGODB_SLOW_COMMAND_MS: float = 100
+    AUTH_CACHE_TTL_SECONDS: float = 30
+    AUTH_CACHE_MAX_SIZE: int = 10000
+    AUTH_TRUST_ROLE_CLAIM: bool = True
+    AUTH_REVOCATION_SYNC_SECONDS: float = 5
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_MAX_WORKERS: Optional[int] = None
+    PASSWORD_HASH_MAX_QUEUE: int = 1000
+    SALES_USE_TRANSACTIONS: bool = True
+    IDEMPOTENCY_TTL_SECONDS: float = 86400
+    IDEMPOTENCY_LOCK_SECONDS: float = 30
+    IDEMPOTENCY_CACHE_TTL_SECONDS: float = 300
+    IDEMPOTENCY_CACHE_MAX_SIZE: int = 10000
+    PURCHASE_WRITE_MODE: str = "flush"
+    PURCHASE_BATCH_SIZE: int = 500
+    PURCHASE_BATCH_INTERVAL_MS: float = 5
+    PURCHASE_RETRY_SECONDS: float = 60
+    PURCHASE_DEAD_LETTER_PATH: str = "data/purchases.deadletter.jsonl"
+    STOCK_SLOT_CACHE_SECONDS: float = 5
+    STOCK_GATE_ENABLED: bool = True
+    STOCK_GATE_REFRESH_SECONDS: float = 5
+    GOODS_CACHE_TTL_SECONDS: float = 60
+    GOODS_CACHE_MAX_SIZE: int = 10000
+    GOODS_CACHE_COUNT_SECONDS: float = 1
+    GOODS_LISTING_CACHE_SECONDS: float = 2
+    SALES_ROLLUP_MODE: str = "buffered"
+    SALES_ROLLUP_INTERVAL_MS: float = 1000
+    TOP_SELLERS_REFRESH_SECONDS: float = 300
+    ALSO_BOUGHT_PATH: str = "data/also_bought.idx"
 
 # Instantiate the settings object
 settings = Settings()
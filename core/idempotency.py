@@ -0,0 +1,244 @@
+"""
+Idempotency Module.
+
+This module lets POST endpoints honour an `Idempotency-Key` header. The outcome of the
+first request with a key is stored in the `idempotency_keys` collection, which a TTL
+index expires, and mirrored in a small in-process cache. A retry with the same key gets
+the stored outcome back without running the operation again. A duplicate that arrives
+while the first request is still running waits for it: in the same worker through a
+shared future, across workers by polling the stored record.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_COLLECTION = "idempotency_keys"
+POLL_INTERVAL_SECONDS = 0.05
+
+# Completed outcomes keyed by scoped idempotency key, so hot retries skip MongoDB
+outcome_cache = TTLCache(maxsize=settings.IDEMPOTENCY_CACHE_MAX_SIZE, ttl=settings.IDEMPOTENCY_CACHE_TTL_SECONDS)
+
+# Outcome futures of the requests this worker is currently executing, keyed like the cache
+_in_flight: Dict[str, asyncio.Future] = {}
+
+idempotency_stats = {"executed": 0, "replayed": 0, "waited": 0, "conflicts": 0}
+
+
+def request_fingerprint(payload: Any) -> str:
+    """
+    Hash a request payload so a reused key can be matched against its original request.
+
+    Args:
+        payload (Any): The JSON-serializable request payload.
+
+    Returns:
+        str: The hex SHA-256 digest of the canonical JSON encoding.
+    """
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+async def run_idempotent(
+    db: AsyncIOMotorDatabase,
+    key: str,
+    fingerprint: str,
+    operation: Callable[[], Awaitable[Any]],
+) -> Tuple[Any, bool]:
+    """
+    Run `operation` at most once per `key` and return its recorded outcome.
+
+    Successful results and client errors (4xx) are recorded for
+    `IDEMPOTENCY_TTL_SECONDS` and replayed to retries. Server errors are not
+    recorded, so a retry runs the operation again.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+        key (str): The idempotency key, scoped by the caller (e.g. "sales:<key>").
+        fingerprint (str): The `request_fingerprint` of the request payload.
+        operation (Callable[[], Awaitable[Any]]): Runs the request and returns the response body.
+
+    Returns:
+        Tuple[Any, bool]: The JSON-encoded response body and whether it was replayed.
+
+    Raises:
+        HTTPException: The recorded client error of the original request, 422 if the key
+                       was used with a different payload, or 409 if the original request
+                       is still running in another worker after `IDEMPOTENCY_LOCK_SECONDS`.
+    """
+    outcome = outcome_cache.get(key)
+    if outcome is None:
+        pending = _in_flight.get(key)
+        if pending is None:
+            return await _execute(db, key, fingerprint, operation)
+        idempotency_stats["waited"] += 1
+        outcome = await asyncio.shield(pending)
+    return _replay(outcome, fingerprint)
+
+
+async def _execute(
+    db: AsyncIOMotorDatabase,
+    key: str,
+    fingerprint: str,
+    operation: Callable[[], Awaitable[Any]],
+) -> Tuple[Any, bool]:
+    """
+    Claim `key`, run the operation unless another worker already has, and publish the outcome.
+    """
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        outcome = await _claim(db, key, fingerprint)
+        replayed = outcome is not None
+        if not replayed:
+            outcome = await _run_and_record(db, key, fingerprint, operation)
+        future.set_result(outcome)
+    except BaseException as e:
+        future.set_exception(e)
+        future.exception()  # waiters re-raise it; do not report it as unretrieved
+        raise
+    finally:
+        _in_flight.pop(key, None)
+
+    outcome_cache.set(key, outcome)
+    if replayed:
+        return _replay(outcome, fingerprint)
+    return _unwrap(outcome), False
+
+
+async def _claim(db: AsyncIOMotorDatabase, key: str, fingerprint: str) -> Optional[dict]:
+    """
+    Insert a pending record for `key`, or wait for the worker that holds it.
+
+    Returns:
+        Optional[dict]: None once this worker holds the claim, otherwise the outcome
+        recorded by the worker that ran the request.
+    """
+    collection = db[IDEMPOTENCY_COLLECTION]
+    deadline = time.monotonic() + settings.IDEMPOTENCY_LOCK_SECONDS
+    lock = timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+    waited = False
+    record = None
+    while True:
+        if record is None:
+            try:
+                await collection.insert_one({
+                    "_id": key,
+                    "status": "pending",
+                    "fingerprint": fingerprint,
+                    "expires_at": datetime.utcnow() + lock,
+                })
+                return None
+            except DuplicateKeyError:
+                pass
+        record = await collection.find_one({"_id": key})
+        if record is None:
+            continue  # released or expired since the insert failed; claim it again
+        if record["status"] == "done":
+            return {field: record[field] for field in ("fingerprint", "status_code", "body")}
+        if record["fingerprint"] != fingerprint:
+            _reject_mismatch()
+        if record["expires_at"] <= datetime.utcnow():
+            # The holder died without recording an outcome; take the claim over
+            taken = await collection.find_one_and_update(
+                {"_id": key, "status": "pending", "expires_at": record["expires_at"]},
+                {"$set": {"expires_at": datetime.utcnow() + lock}},
+            )
+            if taken:
+                return None
+            continue
+        if time.monotonic() >= deadline:
+            idempotency_stats["conflicts"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still being processed.",
+            )
+        if not waited:
+            idempotency_stats["waited"] += 1
+            waited = True
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+
+async def _run_and_record(
+    db: AsyncIOMotorDatabase,
+    key: str,
+    fingerprint: str,
+    operation: Callable[[], Awaitable[Any]],
+) -> dict:
+    """
+    Run the operation under a held claim and record its outcome.
+
+    Server errors and unexpected exceptions release the claim instead.
+    """
+    collection = db[IDEMPOTENCY_COLLECTION]
+    try:
+        outcome = {"status_code": status.HTTP_200_OK, "body": jsonable_encoder(await operation())}
+    except HTTPException as e:
+        if e.status_code >= 500:
+            await collection.delete_one({"_id": key})
+            raise
+        outcome = {"status_code": e.status_code, "body": jsonable_encoder(e.detail)}
+    except BaseException:
+        await asyncio.shield(collection.delete_one({"_id": key}))
+        raise
+
+    outcome["fingerprint"] = fingerprint
+    idempotency_stats["executed"] += 1
+    try:
+        await collection.update_one(
+            {"_id": key},
+            {"$set": {
+                "status": "done",
+                **outcome,
+                "expires_at": datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+            }},
+        )
+    except Exception as e:
+        # The operation has run; the pending claim expires and a later retry would repeat it
+        logger.error(f"Failed to record outcome for idempotency key {key!r}: {e}")
+    return outcome
+
+
+def _replay(outcome: dict, fingerprint: str) -> Tuple[Any, bool]:
+    """
+    Return a recorded outcome to a retry of the original request.
+    """
+    if outcome["fingerprint"] != fingerprint:
+        _reject_mismatch()
+    idempotency_stats["replayed"] += 1
+    return _unwrap(outcome, replayed=True), True
+
+
+def _unwrap(outcome: dict, replayed: bool = False) -> Any:
+    """
+    Return the recorded response body, or raise the recorded client error.
+    """
+    if outcome["status_code"] >= 400:
+        raise HTTPException(
+            status_code=outcome["status_code"],
+            detail=outcome["body"],
+            headers={"Idempotent-Replayed": "true"} if replayed else None,
+        )
+    return outcome["body"]
+
+
+def _reject_mismatch() -> None:
+    idempotency_stats["conflicts"] += 1
+    raise HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail="Idempotency-Key was already used for a different request.",
+    )
@@ -0,0 +1,251 @@
+"""
+Top Sellers Module.
+
+This module keeps, per sliding window (1h, 24h, 7d), a process-local ranking of goods
+by units sold, so the storefront's best-seller widgets are answered from memory in
+time independent of the catalog size. Each window is split into fixed time buckets:
+a sale adds to the current bucket and to the window's running totals, and buckets
+that fall out of the window are subtracted again. The totals are mirrored in a list
+kept sorted by (units desc, name), so the top N is a slice of its head.
+
+The rankings are rebuilt from `purchases` and `orders` at startup, and again every
+`TOP_SELLERS_REFRESH_SECONDS` so the sales made by other workers are included.
+"""
+
+import asyncio
+import bisect
+import logging
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Window name -> (window length, bucket length), in seconds
+TOP_SELLER_WINDOWS: Dict[str, Tuple[int, int]] = {
+    "1h": (3600, 60),
+    "24h": (86400, 900),
+    "7d": (604800, 3600),
+}
+
+
+class SlidingWindowRanking:
+    """
+    Units sold per good over a sliding time window, ranked.
+
+    The window start advances one bucket at a time, so it is accurate to within
+    `bucket_seconds`.
+
+    Attributes:
+        window_seconds (int): The length of the window.
+        bucket_seconds (int): The granularity at which sales expire.
+    """
+
+    def __init__(self, window_seconds: int, bucket_seconds: int):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self._span = window_seconds // bucket_seconds
+        self._buckets: Deque[Tuple[int, Dict[str, int]]] = deque()
+        self._totals: Dict[str, int] = {}
+        self._ranked: List[Tuple[int, str]] = []
+
+    def _bucket_of(self, at: Optional[float] = None) -> int:
+        return int((time.time() if at is None else at) // self.bucket_seconds)
+
+    def _set_total(self, good_name: str, units: int) -> None:
+        """
+        Update a good's total and move it to its place in the ranking.
+        """
+        old = self._totals.get(good_name, 0)
+        if old > 0:
+            del self._ranked[bisect.bisect_left(self._ranked, (-old, good_name))]
+        if units > 0:
+            self._totals[good_name] = units
+            bisect.insort(self._ranked, (-units, good_name))
+        else:
+            self._totals.pop(good_name, None)
+
+    def _expire(self, current: int) -> None:
+        """
+        Subtract the buckets that have fallen out of the window ending at `current`.
+        """
+        while self._buckets and self._buckets[0][0] <= current - self._span:
+            _, counts = self._buckets.popleft()
+            for good_name, units in counts.items():
+                self._set_total(good_name, self._totals.get(good_name, 0) - units)
+
+    def add(self, good_name: str, units: int, at: Optional[float] = None) -> None:
+        """
+        Record units of a good sold at `at` (a Unix time, default now).
+
+        Sales older than the newest bucket are counted in it; those already outside
+        the window are ignored.
+        """
+        bucket = self._bucket_of(at)
+        current = max(bucket, self._buckets[-1][0] if self._buckets else bucket)
+        self._expire(current)
+        if bucket <= current - self._span:
+            return
+        if not self._buckets or self._buckets[-1][0] < bucket:
+            self._buckets.append((bucket, {}))
+        counts = self._buckets[-1][1]
+        counts[good_name] = counts.get(good_name, 0) + units
+        self._set_total(good_name, self._totals.get(good_name, 0) + units)
+
+    def load(self, rows: Iterable[Tuple[int, str, int]]) -> None:
+        """
+        Add historical sales, as (bucket, good name, units) rows sorted by bucket.
+        """
+        for bucket, good_name, units in rows:
+            self.add(good_name, units, at=bucket * self.bucket_seconds)
+
+    def top(self, n: int, at: Optional[float] = None) -> List[Tuple[str, int]]:
+        """
+        Return the `n` goods with the most units sold in the window ending at `at`
+        (a Unix time, default now), as (name, units).
+        """
+        self._expire(self._bucket_of(at))
+        return [(good_name, -units) for units, good_name in self._ranked[:n]]
+
+    def __len__(self) -> int:
+        return len(self._totals)
+
+
+class TopSellers:
+    """
+    The sliding-window rankings of every window in `TOP_SELLER_WINDOWS`.
+    """
+
+    def __init__(self):
+        self._windows = self._empty()
+        self.rebuilds = 0
+        self.rebuilt_at: Optional[float] = None
+
+    @staticmethod
+    def _empty() -> Dict[str, SlidingWindowRanking]:
+        return {
+            name: SlidingWindowRanking(window_seconds, bucket_seconds)
+            for name, (window_seconds, bucket_seconds) in TOP_SELLER_WINDOWS.items()
+        }
+
+    def add(self, good_name: str, units: int) -> None:
+        """
+        Record units of a good sold now in every window.
+
+        Args:
+            good_name (str): The name of the good.
+            units (int): The units sold.
+        """
+        for ranking in self._windows.values():
+            ranking.add(good_name, units)
+
+    def top(self, window: str, n: int) -> List[Tuple[str, int]]:
+        """
+        Return the best-selling goods of a window.
+
+        Args:
+            window (str): A key of `TOP_SELLER_WINDOWS`.
+            n (int): The number of goods to return.
+
+        Returns:
+            List[Tuple[str, int]]: (name, units sold) pairs, most sold first.
+        """
+        return self._windows[window].top(n)
+
+    async def rebuild(self, db: AsyncIOMotorDatabase) -> None:
+        """
+        Replace every ranking with the sales recorded in `purchases` and `orders`.
+
+        Each window is rebuilt with one aggregation per collection that matches the
+        window's `_id` range and groups by good and bucket of the `_id` creation
+        time, so at most (buckets x goods) rows are read. Sales this worker makes
+        while the rebuild runs may be missed until the next one.
+
+        Args:
+            db (AsyncIOMotorDatabase): The MongoDB database instance.
+        """
+        windows = self._empty()
+        for name, ranking in windows.items():
+            since = ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=ranking.window_seconds))
+            bucket = {"$floor": {"$divide": [{"$toLong": {"$toDate": "$_id"}}, ranking.bucket_seconds * 1000]}}
+            rows = []
+            for collection, unwind, good_name, units in (
+                ("purchases", [], "$good_name", 1),
+                ("orders", [{"$unwind": "$items"}], "$items.good_name", "$items.quantity"),
+            ):
+                pipeline = [
+                    {"$match": {"_id": {"$gte": since}}},
+                    *unwind,
+                    {"$group": {"_id": {"bucket": bucket, "good_name": good_name}, "units": {"$sum": units}}},
+                ]
+                async for row in db[collection].aggregate(pipeline):
+                    rows.append((int(row["_id"]["bucket"]), row["_id"]["good_name"], row["units"]))
+            ranking.load(sorted(rows))
+        self._windows = windows
+        self.rebuilds += 1
+        self.rebuilt_at = time.monotonic()
+
+    def stats(self) -> dict:
+        """
+        Return the number of ranked goods per window and the rebuild statistics.
+
+        Returns:
+            dict: Ranked goods per window, rebuild count and seconds since the last rebuild.
+        """
+        return {
+            "ranked": {name: len(ranking) for name, ranking in self._windows.items()},
+            "rebuilds": self.rebuilds,
+            "seconds_since_rebuild": (
+                round(time.monotonic() - self.rebuilt_at, 1) if self.rebuilt_at is not None else None
+            ),
+        }
+
+
+top_sellers = TopSellers()
+_top_sellers_task: Optional[asyncio.Task] = None
+
+
+async def start_top_sellers(db: AsyncIOMotorDatabase) -> None:
+    """
+    Build the top-seller rankings and keep them rebuilt in the background.
+
+    A failed rebuild is logged and does not prevent startup; the rankings then only
+    count the sales made by this worker until the next rebuild succeeds.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+    """
+    global _top_sellers_task
+
+    async def rebuild():
+        try:
+            await top_sellers.rebuild(db)
+        except Exception as e:
+            logger.error(f"Failed to rebuild the top-seller rankings: {e}")
+
+    await rebuild()
+    if settings.TOP_SELLERS_REFRESH_SECONDS <= 0:
+        return
+
+    async def refresh():
+        while True:
+            await asyncio.sleep(settings.TOP_SELLERS_REFRESH_SECONDS)
+            await rebuild()
+
+    _top_sellers_task = asyncio.create_task(refresh())
+
+
+async def stop_top_sellers() -> None:
+    """
+    Stop the background rebuilds started by `start_top_sellers`.
+    """
+    global _top_sellers_task
+    if _top_sellers_task is not None:
+        _top_sellers_task.cancel()
+        _top_sellers_task = None
@@ -0,0 +1,377 @@
+"""
+Metrics Module.
+
+This module collects in-process runtime metrics about the MongoDB driver. It provides
+a small thread-safe latency `Histogram` and the pymongo event listeners registered by
+`app.db.database.connect_db`. Motor runs the driver in worker threads, so every
+listener guards its state with a lock.
+
+The collected values are exposed to administrators through `GET /admin/metrics`.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram, in milliseconds.
+
+    Percentiles are reported as the upper bound of the bucket containing the requested
+    rank, which is precise enough to spot saturation while keeping `observe` O(buckets)
+    and the memory footprint constant.
+    """
+
+    DEFAULT_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float) -> None:
+        """
+        Record one measurement.
+
+        Args:
+            value_ms (float): The measured value in milliseconds.
+        """
+        index = len(self.buckets_ms)
+        for i, bound in enumerate(self.buckets_ms):
+            if value_ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value_ms
+            if value_ms > self._max:
+                self._max = value_ms
+
+    def _percentile(self, counts, total, maximum, pct: float) -> float:
+        if not total:
+            return 0.0
+        rank = pct / 100 * total
+        seen = 0
+        for i, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                return min(self.buckets_ms[i], maximum) if i < len(self.buckets_ms) else maximum
+        return maximum
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Return a consistent summary of the recorded measurements.
+
+        Returns:
+            dict: The count, mean, max, p50, p95 and p99 in milliseconds.
+        """
+        with self._lock:
+            counts, total, total_sum, maximum = list(self._counts), self._count, self._sum, self._max
+        return {
+            "count": total,
+            "mean_ms": round(total_sum / total, 3) if total else 0.0,
+            "max_ms": round(maximum, 3),
+            "p50_ms": self._percentile(counts, total, maximum, 50),
+            "p95_ms": self._percentile(counts, total, maximum, 95),
+            "p99_ms": self._percentile(counts, total, maximum, 99),
+        }
+
+
+class _PoolStats:
+    """
+    Metrics of the connection pool of a single server.
+    """
+
+    def __init__(self):
+        self.checkout_wait = Histogram()
+        self.connections = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.checkout_failures: Dict[str, int] = {}
+        self.cleared = 0
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    CMAP listener recording connection pool usage per server.
+
+    Tracks how long operations wait to check a connection out of the pool, how many
+    connections are open and in use, and why checkouts fail (e.g. `timeout` when the
+    wait queue times out because the pool is saturated).
+    """
+
+    def __init__(self):
+        self._pools: Dict[str, _PoolStats] = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, address) -> _PoolStats:
+        key = "%s:%s" % address if isinstance(address, tuple) else str(address)
+        with self._lock:
+            stats = self._pools.get(key)
+            if stats is None:
+                stats = self._pools[key] = _PoolStats()
+            return stats
+
+    @staticmethod
+    def _duration_ms(event) -> Optional[float]:
+        # `duration` (seconds) is only published by pymongo >= 4.7
+        duration = getattr(event, "duration", None)
+        return duration * 1000 if duration is not None else None
+
+    def pool_created(self, event):
+        self._stats(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        stats = self._stats(event.address)
+        with self._lock:
+            stats.cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        stats = self._stats(event.address)
+        with self._lock:
+            stats.connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        stats = self._stats(event.address)
+        with self._lock:
+            stats.connections = max(0, stats.connections - 1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        stats = self._stats(event.address)
+        with self._lock:
+            stats.checkout_failures[event.reason] = stats.checkout_failures.get(event.reason, 0) + 1
+        wait_ms = self._duration_ms(event)
+        if wait_ms is not None:
+            stats.checkout_wait.observe(wait_ms)
+
+    def connection_checked_out(self, event):
+        stats = self._stats(event.address)
+        with self._lock:
+            stats.in_use += 1
+            stats.checkouts += 1
+        wait_ms = self._duration_ms(event)
+        if wait_ms is not None:
+            stats.checkout_wait.observe(wait_ms)
+
+    def connection_checked_in(self, event):
+        stats = self._stats(event.address)
+        with self._lock:
+            stats.in_use = max(0, stats.in_use - 1)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Return the pool metrics of every server seen so far.
+
+        Returns:
+            dict: Metrics keyed by server address ("host:port").
+        """
+        with self._lock:
+            pools = dict(self._pools)
+        result = {}
+        for address, stats in pools.items():
+            with self._lock:
+                values = {
+                    "connections": stats.connections,
+                    "in_use": stats.in_use,
+                    "checkouts": stats.checkouts,
+                    "checkout_failures": dict(stats.checkout_failures),
+                    "cleared": stats.cleared,
+                }
+            values["checkout_wait"] = stats.checkout_wait.snapshot()
+            result[address] = values
+        return result
+
+
+pool_metrics = PoolMetrics()
+"""
+Process-wide connection pool metrics, registered on the Motor client by `connect_db`.
+"""
+
+
+# Where each command keeps the filter worth showing in the slow-command log
+_FILTER_FIELDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "aggregate": "pipeline",
+}
+_STATEMENT_FIELDS = {
+    "update": ("updates", "q"),
+    "delete": ("deletes", "q"),
+}
+
+
+def filter_shape(value: Any) -> Any:
+    """
+    Redact a query down to its shape.
+
+    Field names and operators are kept while every literal value is replaced with "?",
+    so the result identifies the query without leaking user data. Lists of literals
+    (e.g. `$in` arguments) collapse to a single "?".
+
+    Args:
+        value (Any): A filter, pipeline or value taken from a command.
+
+    Returns:
+        Any: The redacted shape.
+    """
+    if isinstance(value, dict):
+        return {key: filter_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(item, (dict, list, tuple)) for item in value):
+            return [filter_shape(item) for item in value]
+        return "?"
+    return "?"
+
+
+def _command_target(command_name: str, command) -> Tuple[Optional[str], Any]:
+    """
+    Return the collection a command runs against and its filter, if any.
+    """
+    if command_name == "getMore":
+        return command.get("collection"), None
+    target = command.get(command_name)
+    collection = target if isinstance(target, str) else None
+    if command_name in _FILTER_FIELDS:
+        return collection, command.get(_FILTER_FIELDS[command_name])
+    if command_name in _STATEMENT_FIELDS:
+        field, key = _STATEMENT_FIELDS[command_name]
+        statements = command.get(field) or []
+        return collection, statements[0].get(key) if statements else None
+    return collection, None
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    Command listener recording latency per (collection, command name).
+
+    Each completed command is added to a histogram keyed by the collection it targets
+    and its name (`find`, `aggregate`, `update`, `getMore`, ...). Commands slower than
+    `slow_command_ms` are logged with the redacted shape of their filter and kept in a
+    bounded list of recent slow commands.
+    """
+
+    def __init__(self, slow_command_ms: float, max_slow_commands: int = 100):
+        self.slow_command_ms = slow_command_ms
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._failures: Dict[Tuple[str, str], int] = {}
+        self._pending: Dict[Tuple[Any, int], Tuple[str, Optional[str], Any]] = {}
+        self._slow = deque(maxlen=max_slow_commands)
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        collection, query = _command_target(event.command_name, event.command)
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (
+                event.database_name, collection, query
+            )
+
+    def _finish(self, event) -> Tuple[Tuple[str, str], Optional[tuple]]:
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        collection = pending[1] if pending else None
+        return (collection or "-", event.command_name), pending
+
+    def _histogram(self, key: Tuple[str, str]) -> Histogram:
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            return histogram
+
+    def succeeded(self, event):
+        key, pending = self._finish(event)
+        duration_ms = event.duration_micros / 1000
+        self._histogram(key).observe(duration_ms)
+        if duration_ms >= self.slow_command_ms:
+            self._record_slow(key, pending, duration_ms)
+
+    def failed(self, event):
+        key, pending = self._finish(event)
+        duration_ms = event.duration_micros / 1000
+        self._histogram(key).observe(duration_ms)
+        with self._lock:
+            self._failures[key] = self._failures.get(key, 0) + 1
+        if duration_ms >= self.slow_command_ms:
+            self._record_slow(key, pending, duration_ms)
+
+    def _record_slow(self, key: Tuple[str, str], pending: Optional[tuple], duration_ms: float) -> None:
+        database_name = pending[0] if pending else "-"
+        shape = filter_shape(pending[2]) if pending and pending[2] is not None else None
+        entry = {
+            "at": time.time(),
+            "database": database_name,
+            "collection": key[0],
+            "command": key[1],
+            "duration_ms": round(duration_ms, 3),
+            "shape": shape,
+        }
+        with self._lock:
+            self._slow.append(entry)
+        logger.warning(
+            f"Slow MongoDB command {key[1]} on {database_name}.{key[0]}: "
+            f"{duration_ms:.1f} ms, filter shape {json.dumps(shape, default=str)}"
+        )
+
+    def snapshot(self) -> List[dict]:
+        """
+        Return the latency summary of every (collection, command) seen so far.
+
+        Returns:
+            List[dict]: One entry per key, busiest first.
+        """
+        with self._lock:
+            histograms = dict(self._histograms)
+            failures = dict(self._failures)
+        entries = [
+            {
+                "collection": collection,
+                "command": command_name,
+                "failures": failures.get((collection, command_name), 0),
+                **histogram.snapshot(),
+            }
+            for (collection, command_name), histogram in histograms.items()
+        ]
+        return sorted(entries, key=lambda entry: entry["count"] * entry["mean_ms"], reverse=True)
+
+    def slow_commands(self) -> List[dict]:
+        """
+        Return the most recent slow commands, newest first.
+
+        Returns:
+            List[dict]: The recorded slow commands with their redacted filter shapes.
+        """
+        with self._lock:
+            return list(reversed(self._slow))
+
+
+command_metrics = CommandMetrics(settings.MONGODB_SLOW_COMMAND_MS)
+"""
+Process-wide command latency metrics, registered on the Motor client by `connect_db`.
+"""
@@ -0,0 +1,134 @@
+"""
+Keyset Pagination Module.
+
+This module provides helpers for cursor-based (keyset) pagination. A cursor is an
+opaque, URL-safe token encoding the sort key of the last document returned, so the
+next page is fetched with an indexed range query instead of skipping over every
+earlier document. Page depth therefore has no effect on query cost.
+"""
+
+import base64
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import json_util
+from fastapi import HTTPException, status
+
+
+def encode_cursor(document: Dict[str, Any], sort_field: str, unique: bool = False) -> str:
+    """
+    Build the cursor pointing just after `document`.
+
+    Args:
+        document (dict): The last document of the current page (must contain `_id`,
+            unless `unique` is set, and the sort field).
+        sort_field (str): The field the listing is sorted on.
+        unique (bool): Whether the sort field is unique, so no `_id` tie-breaker is needed.
+
+    Returns:
+        str: The opaque cursor token.
+    """
+    if unique:
+        payload = {"s": sort_field, "v": document[sort_field]}
+    else:
+        payload = {"s": sort_field, "id": document["_id"]}
+        if sort_field != "_id":
+            payload["v"] = document.get(sort_field)
+    raw = json_util.dumps(payload).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_field: str) -> Dict[str, Any]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor token supplied by the client.
+        sort_field (str): The sort field of the current request.
+
+    Returns:
+        dict: The decoded payload with the key `s`, and `id` and/or `v`.
+
+    Raises:
+        HTTPException: If the cursor is malformed or was issued for another sort order.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+        valid = isinstance(payload, dict) and ("id" in payload or "v" in payload) and payload.get("s") == sort_field
+    except Exception:
+        valid = False
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor."
+        )
+    return payload
+
+
+def keyset_filter(payload: Dict[str, Any], direction: int = 1, tie_direction: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Build the query matching the documents that come after a decoded cursor.
+
+    Args:
+        payload (dict): The payload returned by `decode_cursor`.
+        direction (int): 1 for ascending order, -1 for descending order.
+        tie_direction (Optional[int]): The order of the `_id` tie-breaker, if it differs
+            from `direction`.
+
+    Returns:
+        dict: A MongoDB filter to combine with the listing's own filter.
+    """
+    op = "$gt" if direction == 1 else "$lt"
+    tie_op = op if tie_direction is None else ("$gt" if tie_direction == 1 else "$lt")
+    sort_field = payload["s"]
+    if sort_field == "_id":
+        return {"_id": {op: payload["id"]}}
+    if "id" not in payload:
+        return {sort_field: {op: payload["v"]}}
+    return {
+        "$or": [
+            {sort_field: {op: payload["v"]}},
+            {sort_field: payload["v"], "_id": {tie_op: payload["id"]}},
+        ]
+    }
+
+
+def sort_keys(
+    sort_field: str, direction: int = 1, unique: bool = False, tie_direction: Optional[int] = None
+) -> List[Tuple[str, int]]:
+    """
+    Return the sort specification for a keyset listing.
+
+    Unless the sort field is unique, `_id` is appended as a tie-breaker so the order
+    is total and cursors are stable.
+
+    Args:
+        sort_field (str): The field the listing is sorted on.
+        direction (int): 1 for ascending order, -1 for descending order.
+        unique (bool): Whether the sort field is unique.
+        tie_direction (Optional[int]): The order of the `_id` tie-breaker, if it differs
+            from `direction` (e.g. newest first within each value of the sort field).
+
+    Returns:
+        List[Tuple[str, int]]: The sort keys, usable with `find().sort()` or `dict()`
+        for an aggregation `$sort` stage.
+    """
+    if sort_field == "_id" or unique:
+        return [(sort_field, direction)]
+    return [(sort_field, direction), ("_id", direction if tie_direction is None else tie_direction)]
+
+
+def merge_filters(query: Dict[str, Any], extra: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Combine a listing filter with a keyset filter.
+
+    Args:
+        query (dict): The listing's own filter (may be empty).
+        extra (dict): The keyset filter.
+
+    Returns:
+        dict: A filter matching both.
+    """
+    if not query:
+        return extra
+    return {"$and": [query, extra]}
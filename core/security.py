@@ -3,13 +3,19 @@
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from typing import Optional
+from typing import Dict, Optional, Union
+import asyncio
 import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from app.models.user import UserModel
+from app.models.auth import TokenPrincipal
 from app.db.database import get_database
+from app.core.cache import TTLCache
+from app.core.config import settings
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 # Configure logging (optional but recommended)
@@ -32,6 +38,23 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # OAuth2 scheme with updated tokenUrl
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Resolved principals keyed by access token, so repeated requests with the same token
+# skip JWT decoding, the user lookup and model validation. Entries are (user, claims)
+# pairs; the token's `uid`/`ver` claims are kept to re-check revocation on every hit.
+principal_cache = TTLCache(maxsize=settings.AUTH_CACHE_MAX_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+# Minimum accepted token version per user ID. Tokens carry the user's `token_version`
+# at issue time in their `ver` claim; bumping the minimum revokes every older token.
+# Mirrored from the `token_revocations` collection so all workers see revocations.
+token_versions: Dict[str, int] = {}
+REVOKED_TOKEN_VERSION = 2 ** 62  # Minimum version recorded for deleted users
+_token_version_sync_task: Optional[asyncio.Task] = None
+
+# Bounded executor running bcrypt off the event loop (see `_run_password_job`)
+_password_executor: Optional[Executor] = None
+_password_slots: Optional[asyncio.Semaphore] = None
+password_hash_stats = {"in_flight": 0, "waiting": 0, "rejected": 0}
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a plain password against its hashed version.
@@ -44,6 +67,72 @@ def get_password_hash(password: str) -> str:
     """
     return pwd_context.hash(password)
 
+def _get_password_executor() -> Executor:
+    global _password_executor
+    if _password_executor is None:
+        max_workers = settings.PASSWORD_HASH_MAX_WORKERS or os.cpu_count() or 1
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _password_executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            _password_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+    return _password_executor
+
+async def _run_password_job(func, *args):
+    """
+    Run a bcrypt job in the bounded password executor.
+
+    At most `PASSWORD_HASH_MAX_WORKERS` jobs run at once; up to `PASSWORD_HASH_MAX_QUEUE`
+    more wait for a slot, and requests beyond that are rejected with 503 so a login
+    storm cannot build an unbounded backlog. With `PASSWORD_HASH_EXECUTOR` set to
+    "inline" the job runs on the event loop (useful for tests and benchmarks).
+    """
+    global _password_slots
+    if settings.PASSWORD_HASH_EXECUTOR == "inline":
+        return func(*args)
+    if _password_slots is None:
+        _password_slots = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_WORKERS or os.cpu_count() or 1)
+    if _password_slots.locked() and password_hash_stats["waiting"] >= settings.PASSWORD_HASH_MAX_QUEUE:
+        password_hash_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent authentication requests. Please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+    password_hash_stats["waiting"] += 1
+    try:
+        await _password_slots.acquire()
+    finally:
+        password_hash_stats["waiting"] -= 1
+    password_hash_stats["in_flight"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_password_executor(), func, *args)
+    finally:
+        password_hash_stats["in_flight"] -= 1
+        _password_slots.release()
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a plain password against its hashed version without blocking the event loop.
+    """
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a plain password without blocking the event loop.
+    """
+    return await _run_password_job(get_password_hash, password)
+
+def shutdown_password_executor() -> None:
+    """
+    Shut down the password executor, waiting for running jobs to finish.
+    """
+    global _password_executor, _password_slots
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=True)
+        _password_executor = None
+    _password_slots = None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -63,12 +152,25 @@ async def get_current_user(
 ) -> UserModel:
     """
     Retrieve the current user based on the JWT token.
+
+    Resolved users are cached per token for `AUTH_CACHE_TTL_SECONDS` (never beyond the
+    token's expiry). `invalidate_principal` drops cached entries when a user changes on
+    this worker; revocations synced from other workers are checked on every cache hit.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    cached = principal_cache.get(token)
+    if cached is not None:
+        cached_user, claims = cached
+        if is_token_revoked(claims):
+            principal_cache.pop(token)
+            logger.warning(f"Revoked token used for user: {cached_user.username}")
+            raise credentials_exception
+        return cached_user
+
     try:
         # Decode the JWT token
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -86,14 +188,170 @@ async def get_current_user(
         logger.warning(f"User not found: {username}")
         raise credentials_exception
 
+    # The user document is authoritative: a token issued to another user with the same
+    # name, or before the user's last revocation, is rejected even before the
+    # revocation has been synced to this worker
+    user_id, version = payload.get("uid"), payload.get("ver")
+    stale = user_id is not None and version is not None and (
+        user_id != str(user_dict["_id"]) or version < user_dict.get("token_version", 0)
+    )
+    if stale or is_token_revoked(payload):
+        logger.warning(f"Revoked token used for user: {username}")
+        raise credentials_exception
+
     user = UserModel(**user_dict)
     logger.info(f"Authenticated user: {username}")
+
+    expires_in = payload["exp"] - time.time() if "exp" in payload else None
+    claims = {"uid": payload.get("uid"), "ver": payload.get("ver")}
+    principal_cache.set(token, (user, claims), ttl=expires_in)
     return user
 
-async def check_admin_role(current_user: UserModel = Depends(get_current_user)) -> UserModel:
+def invalidate_principal(user_id: str) -> int:
+    """
+    Drop every cached principal of a user.
+
+    Must be called whenever a user's identity, role or existence changes so that
+    subsequent requests resolve the user from the database again.
+
+    Args:
+        user_id (str): The unique identifier of the user.
+
+    Returns:
+        int: The number of cache entries removed.
+    """
+    return principal_cache.discard_where(lambda entry: str(entry[0].id) == str(user_id))
+
+def is_token_revoked(payload: dict) -> bool:
+    """
+    Check a decoded token's version against the in-memory revocation map.
+
+    Tokens issued before `uid`/`ver` claims were introduced are never considered revoked
+    here; they are always resolved against the database instead.
+
+    Args:
+        payload (dict): The decoded JWT claims.
+
+    Returns:
+        bool: True if the token's version is older than the user's minimum accepted version.
+    """
+    user_id, version = payload.get("uid"), payload.get("ver")
+    if user_id is None or version is None:
+        return False
+    return version < token_versions.get(user_id, 0)
+
+async def revoke_tokens(db: AsyncIOMotorDatabase, user_id: str, min_version: int) -> None:
+    """
+    Revoke every token of a user whose version is below `min_version`.
+
+    The revocation is applied to this process immediately and persisted in the
+    `token_revocations` collection for the other workers. Revocation records expire
+    once every token they could affect has expired.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+        user_id (str): The unique identifier of the user.
+        min_version (int): The lowest token version still accepted.
+    """
+    user_id = str(user_id)
+    token_versions[user_id] = max(token_versions.get(user_id, 0), min_version)
+    retention = timedelta(minutes=max(ACCESS_TOKEN_EXPIRE_MINUTES, 15))
+    await db["token_revocations"].update_one(
+        {"_id": user_id},
+        {"$max": {"min_version": min_version}, "$set": {"expires_at": datetime.utcnow() + retention}},
+        upsert=True
+    )
+
+async def sync_token_versions(db: AsyncIOMotorDatabase) -> None:
+    """
+    Reload the revocation map from the `token_revocations` collection.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+    """
+    global token_versions
+    revocations = await db["token_revocations"].find({}, {"min_version": 1}).to_list(length=None)
+    token_versions = {doc["_id"]: doc["min_version"] for doc in revocations}
+
+async def start_token_version_sync(db: AsyncIOMotorDatabase) -> None:
+    """
+    Load the revocation map and keep it refreshed in the background.
+
+    The map is reloaded every `AUTH_REVOCATION_SYNC_SECONDS`, which bounds how long a
+    revocation made by another worker takes to apply here.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+    """
+    global _token_version_sync_task
+    await sync_token_versions(db)
+
+    async def refresh():
+        while True:
+            await asyncio.sleep(settings.AUTH_REVOCATION_SYNC_SECONDS)
+            try:
+                await sync_token_versions(db)
+            except Exception as e:
+                logger.error(f"Failed to refresh token revocations: {e}")
+
+    _token_version_sync_task = asyncio.create_task(refresh())
+
+async def stop_token_version_sync() -> None:
+    """
+    Stop the background refresh started by `start_token_version_sync`.
+    """
+    global _token_version_sync_task
+    if _token_version_sync_task is not None:
+        _token_version_sync_task.cancel()
+        _token_version_sync_task = None
+
+def _principal_from_claims(token: str) -> Optional[TokenPrincipal]:
+    """
+    Build the caller's identity from the token claims alone.
+
+    Returns None for tokens that lack the `uid`/`ver`/`role` claims, which must be
+    resolved against the database.
+
+    Raises:
+        HTTPException: If the token is invalid or has been revoked.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError as e:
+        logger.error(f"JWT decoding error: {e}")
+        raise credentials_exception
+    if None in (payload.get("sub"), payload.get("uid"), payload.get("ver"), payload.get("role")):
+        return None
+    if is_token_revoked(payload):
+        logger.warning(f"Revoked token used for user: {payload['sub']}")
+        raise credentials_exception
+    return TokenPrincipal(
+        id=payload["uid"],
+        username=payload["sub"],
+        role=payload["role"],
+        token_version=payload["ver"],
+    )
+
+async def check_admin_role(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> Union[UserModel, TokenPrincipal]:
     """
     Verify that the current user has administrative privileges.
+
+    With `AUTH_TRUST_ROLE_CLAIM` enabled, the signed `role` claim is trusted and no user
+    is read from the database; the token's version is checked against the revocation
+    map so role changes and deletions still take effect. Tokens without version claims,
+    or any token when the setting is disabled, are resolved through `get_current_user`.
     """
+    current_user = _principal_from_claims(token) if settings.AUTH_TRUST_ROLE_CLAIM else None
+    if current_user is None:
+        current_user = await get_current_user(token, db)
     if current_user.role.lower() != "admin":
         logger.warning(f"User '{current_user.username}' attempted to access admin-only endpoint.")
         raise HTTPException(
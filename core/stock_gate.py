@@ -0,0 +1,165 @@
+"""
+Stock Gate Module.
+
+This module provides `StockGate`, a process-local map of the approximate stock left per
+good. Once a good is known to be sold out, purchases of it are rejected without any
+database access, which keeps clients that keep retrying a sold-out flash sale away
+from MongoDB. The map is seeded with the sold-out goods at startup, updated by every
+sale, restock and stock read this worker performs, and reconciled with the database
+every `STOCK_GATE_REFRESH_SECONDS`, which bounds how long a restock made by another
+worker takes to reopen the gate here. Reconciling only reads the goods recorded as
+sold out, so its cost does not grow with the catalog.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class StockGate:
+    """
+    Approximate remaining stock per good name.
+
+    Only observed empty stock closes the gate for a good: approximate decrements never
+    go below one unit, so a stale count cannot reject a purchase that would succeed.
+    Goods the gate does not know about are always let through.
+    """
+
+    def __init__(self):
+        self._remaining: Dict[str, int] = {}
+        self.rejected = 0
+        self.refreshes = 0
+        self.refreshed_at: Optional[float] = None
+
+    def is_sold_out(self, good_name: str) -> bool:
+        """
+        Check whether `good_name` is known to be sold out, counting the rejection.
+
+        Args:
+            good_name (str): The name of the good.
+
+        Returns:
+            bool: True if the request for the good should be rejected.
+        """
+        if not settings.STOCK_GATE_ENABLED or self._remaining.get(good_name, 1) > 0:
+            return False
+        self.rejected += 1
+        return True
+
+    def observe(self, good_name: str, remaining: int) -> None:
+        """
+        Record the remaining stock of a good as read from or written to the database.
+
+        Args:
+            good_name (str): The name of the good.
+            remaining (int): The stock left; 0 closes the gate for the good.
+        """
+        self._remaining[good_name] = max(remaining, 0)
+
+    def take(self, good_name: str, units: int) -> None:
+        """
+        Account for units sold when the exact remaining stock is not known.
+
+        Args:
+            good_name (str): The name of the good.
+            units (int): The units sold.
+        """
+        remaining = self._remaining.get(good_name)
+        if remaining:
+            self._remaining[good_name] = max(remaining - units, 1)
+
+    async def refresh(self, db: AsyncIOMotorDatabase) -> None:
+        """
+        Close the gate for exactly the goods the database records as sold out.
+
+        Only goods with no `count` left are read, through the `sold_out_count` partial
+        index; that includes the goods whose stock lives in stock slots, which are then
+        sold out only if their slots are empty. Goods closed here that have been
+        restocked since are reopened, and the approximate counts of goods in stock are
+        kept.
+
+        Args:
+            db (AsyncIOMotorDatabase): The MongoDB database instance.
+        """
+        sold_out = {}
+        sharded = {}
+        async for good in db["goods"].find({"count": {"$lte": 0}}, {"name": 1, "stock_slots": 1}):
+            if good.get("stock_slots"):
+                sharded[good["_id"]] = good["name"]
+            sold_out[good["name"]] = 0
+        if sharded:
+            pipeline = [
+                {"$match": {"good_id": {"$in": list(sharded)}}},
+                {"$group": {"_id": "$good_id", "count": {"$sum": "$count"}}},
+            ]
+            async for row in db["stock_slots"].aggregate(pipeline):
+                if row["count"] > 0:
+                    del sold_out[sharded[row["_id"]]]
+        remaining = {good_name: units for good_name, units in self._remaining.items() if units > 0}
+        remaining.update(sold_out)
+        self._remaining = remaining
+        self.refreshes += 1
+        self.refreshed_at = time.monotonic()
+
+    def stats(self) -> dict:
+        """
+        Return the gate's size and rejection statistics.
+
+        Returns:
+            dict: Tracked and sold-out goods, rejected requests, refresh count and the
+            seconds since the last refresh.
+        """
+        return {
+            "enabled": settings.STOCK_GATE_ENABLED,
+            "tracked": len(self._remaining),
+            "sold_out": sum(1 for remaining in self._remaining.values() if remaining <= 0),
+            "rejected": self.rejected,
+            "refreshes": self.refreshes,
+            "seconds_since_refresh": (
+                round(time.monotonic() - self.refreshed_at, 1) if self.refreshed_at is not None else None
+            ),
+        }
+
+
+stock_gate = StockGate()
+_stock_gate_task: Optional[asyncio.Task] = None
+
+
+async def start_stock_gate(db: AsyncIOMotorDatabase) -> None:
+    """
+    Seed the stock gate and keep it reconciled with the database in the background.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+    """
+    global _stock_gate_task
+    if not settings.STOCK_GATE_ENABLED:
+        return
+    await stock_gate.refresh(db)
+
+    async def reconcile():
+        while True:
+            await asyncio.sleep(settings.STOCK_GATE_REFRESH_SECONDS)
+            try:
+                await stock_gate.refresh(db)
+            except Exception as e:
+                logger.error(f"Failed to refresh the stock gate: {e}")
+
+    _stock_gate_task = asyncio.create_task(reconcile())
+
+
+async def stop_stock_gate() -> None:
+    """
+    Stop the background reconciliation started by `start_stock_gate`.
+    """
+    global _stock_gate_task
+    if _stock_gate_task is not None:
+        _stock_gate_task.cancel()
+        _stock_gate_task = None
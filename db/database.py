@@ -7,26 +7,56 @@ It provides functions to connect to and disconnect from the database, as well as
 
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
+from app.db.indexes import ensure_indexes
+from app.core.metrics import command_metrics, pool_metrics
 
 # Global variables to hold the database client and instance
 db_client = None
 database = None
 
 
+def get_client_options() -> dict:
+    """
+    Build the Motor client options from settings.
+
+    Unset optional values are left out so the driver defaults apply.
+
+    Returns:
+        dict: Keyword arguments for `AsyncIOMotorClient`.
+    """
+    options = {
+        "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "event_listeners": [pool_metrics, command_metrics],
+    }
+    if settings.MONGODB_MAX_IDLE_TIME_MS is not None:
+        options["maxIdleTimeMS"] = settings.MONGODB_MAX_IDLE_TIME_MS
+    if settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS is not None:
+        options["waitQueueTimeoutMS"] = settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS
+    if settings.MONGODB_COMPRESSORS:
+        options["compressors"] = settings.MONGODB_COMPRESSORS
+    return options
+
+
 async def connect_db():
     """
     Establish a connection to the MongoDB database.
 
-    Initializes the global `db_client` and `database` variables using the MongoDB URI and database name from settings.
+    Initializes the global `db_client` and `database` variables using the MongoDB URI, database name and
+    connection pool options from settings, with the pool and command metrics listeners registered,
+    then ensures the declared indexes exist (see `app.db.indexes`) unless disabled with `MONGODB_ENSURE_INDEXES`.
 
     Raises:
         Exception: If the connection to MongoDB fails.
     """
     global db_client, database
     try:
-        db_client = AsyncIOMotorClient(settings.MONGODB_URI)
+        db_client = AsyncIOMotorClient(settings.MONGODB_URI, **get_client_options())
         database = db_client[settings.MONGODB_DB_NAME]
         print("Connected to MongoDB")
+        if settings.MONGODB_ENSURE_INDEXES:
+            await ensure_indexes(database)
     except Exception as e:
         print(f"Failed to connect to MongoDB: {e}")
         raise
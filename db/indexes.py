@@ -0,0 +1,216 @@
+"""
+Database Indexes Module.
+
+This module declares the indexes every collection needs and ensures them at startup.
+`INDEXES` is the single source of truth: each entry maps a collection name to the
+`IndexModel` objects backing the application's queries. `ensure_indexes` creates them
+idempotently, and `index_report` compares the declaration with what exists on the
+server, using `$indexStats` to flag missing, unused and redundant indexes.
+"""
+
+import logging
+from typing import Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        # get_current_user, AuthService.login, signup and sales look users up by name
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        # Admin listing: filter on role, sorted (and keyset-paginated) on _id or username
+        IndexModel([("role", ASCENDING), ("_id", ASCENDING)], name="role_id"),
+        IndexModel([("role", ASCENDING), ("username", ASCENDING)], name="role_username"),
+    ],
+    "wallets": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    "goods": [
+        IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+        # Storefront listing only ever reads in-stock goods
+        IndexModel(
+            [("name", ASCENDING), ("price", ASCENDING)],
+            name="in_stock_name_price",
+            partialFilterExpression={"count": {"$gt": 0}},
+        ),
+        # The stock gate reconciles only the sold-out goods (slotted goods keep count 0)
+        IndexModel(
+            [("count", ASCENDING)],
+            name="sold_out_count",
+            partialFilterExpression={"count": {"$lte": 0}},
+        ),
+        # Goods whose stock is split across stock_slots are listed regardless of `count`
+        IndexModel(
+            [("stock_slots", ASCENDING)],
+            name="stock_slots",
+            partialFilterExpression={"stock_slots": {"$exists": True}},
+        ),
+    ],
+    "stock_slots": [
+        IndexModel([("good_id", ASCENDING), ("slot", ASCENDING)], name="good_id_slot_unique", unique=True),
+    ],
+    "purchases": [
+        # Purchase history: per user newest first, and across users keyset-paginated
+        # on (username, _id); the summary aggregation matches on the username prefix
+        IndexModel([("username", ASCENDING), ("_id", DESCENDING)], name="username_id"),
+    ],
+    "sales_daily": [
+        # Sales upsert one rollup per (good, day); reports scan a range of days
+        IndexModel([("good_name", ASCENDING), ("day", ASCENDING)], name="good_name_day_unique", unique=True),
+        IndexModel([("day", ASCENDING), ("good_name", ASCENDING)], name="day_good_name"),
+    ],
+    "products": [
+        # Admin listing: keyset-paginated on _id, or on name or price with an _id tie-breaker
+        IndexModel([("name", ASCENDING), ("_id", ASCENDING)], name="name_id"),
+        IndexModel([("price", ASCENDING), ("_id", ASCENDING)], name="price_id"),
+        # Product search: relevance weights name > tags > description; the category and
+        # price filters are checked on the trailing index keys
+        IndexModel(
+            [("name", TEXT), ("tags", TEXT), ("description", TEXT), ("category", ASCENDING), ("price", ASCENDING)],
+            name="text_search",
+            weights={"name": 10, "tags": 5, "description": 1},
+        ),
+    ],
+    "reviews": [
+        IndexModel([("product_id", ASCENDING)], name="product_id"),
+        IndexModel([("username", ASCENDING)], name="username"),
+    ],
+    "accounts": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    "carts": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "token_revocations": [
+        # Revocations are only needed until every token they cover has expired
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "idempotency_keys": [
+        # Recorded outcomes are replayed for IDEMPOTENCY_TTL_SECONDS, pending claims
+        # only until their lock expires
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+"""
+Declared indexes per collection.
+
+Index names are part of the declaration: an index is considered present when an index
+with the same name exists on the collection.
+"""
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    """
+    Create every declared index that does not exist yet.
+
+    `createIndexes` is a no-op for indexes that already exist with the same definition,
+    so this is safe to run on every startup. Conflicts (e.g. an index with the same name
+    but different options, or duplicate data preventing a unique index) are logged and
+    skipped so one bad index does not prevent the application from starting.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+    """
+    for collection, models in INDEXES.items():
+        for model in models:
+            try:
+                await db[collection].create_indexes([model])
+            except OperationFailure as e:
+                logger.error(
+                    f"Could not create index '{model.document['name']}' on '{collection}': {e}"
+                )
+
+
+def _key_pattern(key) -> List[tuple]:
+    """
+    Normalize an index key specification to a list of (field, direction) pairs.
+    """
+    return [(field, direction) for field, direction in dict(key).items()]
+
+
+def _is_prefix(shorter: List[tuple], longer: List[tuple]) -> bool:
+    """
+    Return True if `shorter` is a strict prefix of `longer`.
+    """
+    return len(shorter) < len(longer) and longer[:len(shorter)] == shorter
+
+
+async def index_report(db: AsyncIOMotorDatabase) -> List[dict]:
+    """
+    Build an index health report for every declared or existing collection.
+
+    For each collection the report lists:
+
+    * `missing`: declared indexes that do not exist on the server.
+    * `unused`: existing indexes (other than `_id_`) with no recorded accesses since
+      the server last restarted or the index was created.
+    * `redundant`: plain indexes whose key pattern is a prefix of another index on the
+      same collection, so the longer index can serve the same queries. Unique, partial
+      and sparse indexes are never reported as redundant as they also enforce or
+      restrict content.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+
+    Returns:
+        List[dict]: One report entry per collection.
+    """
+    existing_collections = [
+        name for name in await db.list_collection_names()
+        if not name.startswith("system.")
+    ]
+    collections = sorted(set(INDEXES) | set(existing_collections))
+
+    report = []
+    for collection in collections:
+        indexes = {}
+        if collection in existing_collections:
+            async for index in db[collection].list_indexes():
+                indexes[index["name"]] = index
+
+        usage = {}
+        if indexes:
+            async for stat in db[collection].aggregate([{"$indexStats": {}}]):
+                accesses = stat.get("accesses", {})
+                # On a replica set/sharded cluster, sum the usage of every member
+                entry = usage.setdefault(stat["name"], {"ops": 0, "since": accesses.get("since")})
+                entry["ops"] += int(accesses.get("ops", 0))
+
+        declared = [model.document["name"] for model in INDEXES.get(collection, [])]
+        missing = [name for name in declared if name not in indexes]
+        unused = [
+            name for name in indexes
+            if name != "_id_" and usage.get(name, {}).get("ops", 0) == 0
+        ]
+        redundant = []
+        for name, index in indexes.items():
+            if index.get("unique") or index.get("partialFilterExpression") or index.get("sparse"):
+                continue
+            key = _key_pattern(index["key"])
+            for other_name, other in indexes.items():
+                if other_name != name and _is_prefix(key, _key_pattern(other["key"])):
+                    redundant.append(name)
+                    break
+
+        report.append({
+            "collection": collection,
+            "missing": missing,
+            "unused": unused,
+            "redundant": redundant,
+            "indexes": [
+                {
+                    "name": name,
+                    "key": {field: direction for field, direction in _key_pattern(index["key"])},
+                    "declared": name in declared,
+                    "ops": usage.get(name, {}).get("ops", 0),
+                    "since": usage.get(name, {}).get("since"),
+                }
+                for name, index in indexes.items()
+            ],
+        })
+    return report
@@ -0,0 +1,285 @@
+"""
+Sales Rollups Module.
+
+This module maintains `sales_daily`, one small document per (good, UTC day) holding the
+units sold and the revenue, so revenue reports read O(days x goods) documents instead
+of scanning `purchases`. Sales add to it as they complete, through `RollupBuffer`: a
+background writer that sums the increments of each (good, day) in memory and applies
+them every `interval_ms` milliseconds as one unordered `bulk_write` of `$inc` upserts,
+so a hot good costs one update per interval rather than one per sale.
+
+The rollups can be rebuilt from the `purchases` and `orders` collections with::
+
+    python -m app.db.rollups backfill --batch-size 5000
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from app.core.config import settings
+from app.db.indexes import INDEXES
+
+logger = logging.getLogger(__name__)
+
+SALES_DAILY_COLLECTION = "sales_daily"
+DUPLICATE_KEY = 11000
+
+# Units and revenue per (good name, day) waiting to be written
+Increments = Dict[Tuple[str, datetime], List[float]]
+
+
+def sales_day(at: Optional[datetime] = None) -> datetime:
+    """
+    Return the UTC day a sale made at `at` (default: now) is rolled up under.
+
+    Args:
+        at (Optional[datetime]): The time of the sale; naive datetimes are taken as UTC.
+
+    Returns:
+        datetime: Midnight UTC of that day, as a naive datetime.
+    """
+    at = at or datetime.utcnow()
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup_update(good_name: str, day: datetime, units: float, revenue: float) -> UpdateOne:
+    """
+    Build the upsert adding `units` and `revenue` to a good's daily rollup.
+    """
+    return UpdateOne(
+        {"good_name": good_name, "day": day},
+        {"$inc": {"units": units, "revenue": revenue}},
+        upsert=True,
+    )
+
+
+class RollupBuffer:
+    """
+    Coalesces rollup increments and writes them in the background.
+
+    The writer task starts with the first `add`, bound to that sale's database, and
+    runs until `drain` is awaited at shutdown. Increments that lost a duplicate-key
+    race between two workers creating the same day's document are kept for the next
+    flush; increments rejected for any other reason are dropped and logged. A batch
+    that fails without a per-document outcome, such as on a network error, may or may
+    not have been applied; it is dropped and logged rather than risk counting it
+    twice, and `backfill` repairs the rollups.
+
+    Attributes:
+        collection (str): The name of the rollup collection.
+        interval_ms (float): How often the summed increments are written.
+    """
+
+    def __init__(self, collection: str, interval_ms: float):
+        self.collection = collection
+        self.interval_ms = interval_ms
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._pending: Increments = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.increments = 0
+        self.flushes = 0
+        self.updates = 0
+        self.dropped = 0
+
+    def add(self, db: AsyncIOMotorDatabase, good_name: str, units: int, revenue: float) -> None:
+        """
+        Add a completed sale to today's rollup of `good_name`.
+
+        Args:
+            db (AsyncIOMotorDatabase): The MongoDB database instance.
+            good_name (str): The name of the good sold.
+            units (int): The units sold.
+            revenue (float): The amount charged for them.
+        """
+        if self._closing:
+            raise RuntimeError(f"Rollup buffer for '{self.collection}' is closed")
+        self._db = db
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        self._merge({(good_name, sales_day()): [units, revenue]})
+        self.increments += 1
+
+    def _merge(self, increments: Increments) -> None:
+        for key, (units, revenue) in increments.items():
+            totals = self._pending.setdefault(key, [0, 0.0])
+            totals[0] += units
+            totals[1] += revenue
+
+    async def _run(self) -> None:
+        """
+        Flush the summed increments every interval, until `drain` wakes it to stop.
+        """
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval_ms / 1000)
+            except asyncio.TimeoutError:
+                pass
+            if self._pending:
+                await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Apply every pending increment with one unordered `bulk_write` of upserts.
+        """
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        keys = list(pending)
+        self.flushes += 1
+        try:
+            await self._db[self.collection].bulk_write(
+                [rollup_update(name, day, *pending[(name, day)]) for name, day in keys],
+                ordered=False,
+            )
+            self.updates += len(keys)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            self.updates += len(keys) - len(errors)
+            rejected = []
+            for error in errors:
+                key = keys[error["index"]]
+                if error.get("code") == DUPLICATE_KEY:
+                    self._merge({key: pending[key]})
+                else:
+                    rejected.append(error)
+            if rejected:
+                self.dropped += len(rejected)
+                logger.error(
+                    f"Dropping {len(rejected)} {self.collection} increments rejected by the server "
+                    f"(rebuild with `python -m app.db.rollups backfill`): {rejected[0].get('errmsg')}"
+                )
+        except PyMongoError as e:
+            self.dropped += len(keys)
+            logger.error(
+                f"Dropping {len(keys)} {self.collection} increments after a failed write "
+                f"(rebuild with `python -m app.db.rollups backfill`): {e}"
+            )
+
+    async def drain(self) -> None:
+        """
+        Stop the writer and write every pending increment.
+
+        Called on shutdown, before the database connection is closed.
+        """
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self._pending:
+            await self.flush()
+        self._closing = False
+
+    def stats(self) -> dict:
+        """
+        Return the coalescing statistics.
+
+        Returns:
+            dict: Pending keys, sales added, flushes, documents updated and dropped increments.
+        """
+        return {
+            "mode": settings.SALES_ROLLUP_MODE,
+            "pending": len(self._pending),
+            "increments": self.increments,
+            "flushes": self.flushes,
+            "updates": self.updates,
+            "dropped": self.dropped,
+        }
+
+
+# Daily rollups of the sales made by SalesService
+sales_rollups = RollupBuffer(SALES_DAILY_COLLECTION, interval_ms=settings.SALES_ROLLUP_INTERVAL_MS)
+
+
+async def backfill(db: AsyncIOMotorDatabase, batch_size: int = 5000) -> int:
+    """
+    Rebuild `sales_daily` from the `purchases` and `orders` collections.
+
+    Both collections are read in `_id` order, `batch_size` documents at a time, and
+    each batch's increments are summed per (good, day) and upserted into a staging
+    collection, which then atomically replaces `sales_daily`. A sale is dated by the
+    creation time of its `_id`. Increments written by the application while the
+    rebuild runs are replaced too, so sales completed between the end of the scan and
+    the swap are missing until the next rebuild; run it while sales are quiet.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+        batch_size (int): The number of source documents read per batch.
+
+    Returns:
+        int: The number of rollup documents written.
+    """
+    staging = db[f"{SALES_DAILY_COLLECTION}_backfill"]
+    await staging.drop()
+    await staging.create_indexes(INDEXES[SALES_DAILY_COLLECTION])
+
+    async def apply(increments: Increments) -> None:
+        if increments:
+            await staging.bulk_write(
+                [rollup_update(name, day, units, revenue) for (name, day), (units, revenue) in increments.items()],
+                ordered=False,
+            )
+
+    sources = (
+        ("purchases", {"good_name": 1, "price": 1}, lambda doc: [(doc["good_name"], 1, doc["price"])]),
+        ("orders", {"items": 1}, lambda doc: [
+            (item["good_name"], item["quantity"], item["price"] * item["quantity"]) for item in doc["items"]
+        ]),
+    )
+    for collection, projection, lines in sources:
+        increments: Increments = {}
+        read = 0
+        async for doc in db[collection].find({}, projection).sort("_id", 1).batch_size(batch_size):
+            day = sales_day(doc["_id"].generation_time)
+            for good_name, units, revenue in lines(doc):
+                totals = increments.setdefault((good_name, day), [0, 0.0])
+                totals[0] += units
+                totals[1] += revenue
+            read += 1
+            if read % batch_size == 0:
+                await apply(increments)
+                increments = {}
+                logger.info(f"Rolled up {read} {collection}")
+        await apply(increments)
+        logger.info(f"Rolled up {read} {collection}")
+
+    written = await staging.count_documents({})
+    if written:
+        await staging.rename(SALES_DAILY_COLLECTION, dropTarget=True)
+    else:
+        await staging.drop()
+        await db[SALES_DAILY_COLLECTION].delete_many({})
+    return written
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Maintain the sales_daily rollups.")
+    parser.add_argument("command", choices=["backfill"], help="Rebuild sales_daily from purchases and orders")
+    parser.add_argument("--uri", default=settings.MONGODB_URI, help="MongoDB connection URI")
+    parser.add_argument("--db", default=settings.MONGODB_DB_NAME, help="Database name")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Source documents read per batch")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    client = AsyncIOMotorClient(args.uri)
+    try:
+        written = await backfill(client[args.db], args.batch_size)
+        print(f"Wrote {written} {SALES_DAILY_COLLECTION} documents")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,313 @@
+"""
+Write Buffer Module.
+
+This module provides `WriteBuffer`, a group-commit writer for append-only collections.
+Request handlers hand documents to the buffer instead of awaiting their own
+`insert_one`; a background task flushes the queued documents with a single unordered
+`insert_many` every `interval_ms` milliseconds or as soon as `max_batch` documents are
+waiting, whichever comes first. Each `add` returns a future that resolves once the
+document's batch is written, so callers choose per write between waiting for the flush
+and fire-and-forget.
+
+Documents get their `_id` before they are queued, so a batch retried after a network
+error cannot insert a document twice: the duplicate-key errors of documents the first
+attempt already wrote are treated as success.
+
+Documents that cannot be written are appended to a dead-letter file, one extended JSON
+document per line, and can be inserted again once the database is back with::
+
+    python -m app.db.write_buffer replay
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from typing import List, Optional, Tuple
+
+from bson import ObjectId, json_util
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+# Delay before the first retry of a failed batch, doubled per failure up to the maximum, in seconds
+BACKOFF_MIN = 0.05
+BACKOFF_MAX = 2.0
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    Return whether `error` may succeed when retried, such as a lost connection or a
+    replica set election.
+    """
+    if isinstance(error, ConnectionFailure):
+        return True
+    return isinstance(error, PyMongoError) and error.has_error_label("RetryableWriteError")
+
+
+class WriteBuffer:
+    """
+    Batches inserts into one collection and flushes them in the background.
+
+    The writer task starts with the first `add`, bound to that document's database,
+    and runs until `drain` is awaited at shutdown; it sleeps while the queue is empty.
+    A batch that fails with a transient error is retried with exponential backoff, and
+    its documents are given up on once they have been failing for `retry_seconds`.
+
+    Attributes:
+        collection (str): The name of the collection written to.
+        max_batch (int): Flush as soon as this many documents are waiting.
+        interval_ms (float): Flush documents that have waited this long.
+        retry_seconds (float): How long documents failing with transient errors are retried.
+        dead_letter_path (Optional[str]): The file documents that could not be written are
+            appended to, or None to only log them.
+    """
+
+    def __init__(
+        self,
+        collection: str,
+        max_batch: int,
+        interval_ms: float,
+        retry_seconds: float = 60,
+        dead_letter_path: Optional[str] = None,
+    ):
+        self.collection = collection
+        self.max_batch = max_batch
+        self.interval_ms = interval_ms
+        self.retry_seconds = retry_seconds
+        self.dead_letter_path = dead_letter_path
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        # (document, future, time after which a failing document is given up on)
+        self._queue: List[Tuple[dict, asyncio.Future, Optional[float]]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._backoff = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.batches = 0
+        self.documents = 0
+        self.largest_batch = 0
+        self.retries = 0
+        self.dropped = 0
+
+    def add(self, db: AsyncIOMotorDatabase, document: dict) -> asyncio.Future:
+        """
+        Queue `document` for insertion.
+
+        Args:
+            db (AsyncIOMotorDatabase): The MongoDB database instance.
+            document (dict): The document to insert. An `_id` is assigned if missing.
+
+        Returns:
+            asyncio.Future: Resolves when the document is written, or fails with the
+            error of its last write attempt once it has been given up on.
+        """
+        if self._closing:
+            raise RuntimeError(f"Write buffer for '{self.collection}' is closed")
+        self._db = db
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        document.setdefault("_id", ObjectId())
+        future = asyncio.get_running_loop().create_future()
+        if not self._queue:
+            self._wakeup.set()
+        self._queue.append((document, future, None))
+        if len(self._queue) >= self.max_batch:
+            self._wakeup.set()
+        return future
+
+    async def _run(self) -> None:
+        """
+        Flush the queue whenever it fills up or its documents have waited `interval_ms`,
+        and sleep while it is empty.
+        """
+        while not self._closing:
+            self._wakeup.clear()
+            if not self._queue:
+                await self._wakeup.wait()
+                continue
+            if self._backoff:
+                await asyncio.sleep(self._backoff)
+            elif len(self._queue) < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval_ms / 1000)
+                except asyncio.TimeoutError:
+                    pass
+            await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Write up to `max_batch` queued documents with one unordered `insert_many`.
+
+        Documents whose write failed with a transient error are requeued, and the next
+        flush is delayed by a backoff that doubles with each failed batch, until they
+        have been failing for `retry_seconds`. Any other failure, such as a rejected or
+        unencodable document, gives up on the documents at once, as retrying them
+        cannot succeed.
+        """
+        batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+        if not batch:
+            return
+        failed = {}
+        retry = False
+        try:
+            await self._db[self.collection].insert_many([document for document, _, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                if error.get("code") != DUPLICATE_KEY:
+                    failed[error["index"]] = e
+        except Exception as e:
+            # Anything escaping here would kill the writer and leave the batch's futures pending
+            failed = {index: e for index in range(len(batch))}
+            retry = is_transient(e)
+
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        self._backoff = min(max(self._backoff * 2, BACKOFF_MIN), BACKOFF_MAX) if retry else 0.0
+        now = asyncio.get_running_loop().time()
+        for index, (document, future, give_up_at) in enumerate(batch):
+            error = failed.get(index)
+            if error is None:
+                self.documents += 1
+                if not future.done():
+                    future.set_result(document["_id"])
+                continue
+            if give_up_at is None:
+                give_up_at = now + self.retry_seconds
+            if retry and now < give_up_at:
+                self.retries += 1
+                self._queue.append((document, future, give_up_at))
+                continue
+            self.dropped += 1
+            logger.error(f"Could not write {self.collection} document {document['_id']}: {error}")
+            self._dead_letter(document)
+            if not future.done():
+                future.set_exception(error)
+                future.exception()  # fire-and-forget writers never retrieve it
+
+    def _dead_letter(self, document: dict) -> None:
+        """
+        Append a document that could not be written to the dead-letter file.
+        """
+        if not self.dead_letter_path:
+            return
+        try:
+            line = json_util.dumps(document)
+            os.makedirs(os.path.dirname(os.path.abspath(self.dead_letter_path)), exist_ok=True)
+            with open(self.dead_letter_path, "a") as f:
+                f.write(line + "\n")
+        except Exception as e:
+            logger.error(f"Could not save {self.collection} document {document['_id']} to {self.dead_letter_path}: {e}")
+
+    async def drain(self) -> None:
+        """
+        Stop the writer and flush every queued document.
+
+        Called on shutdown, before the database connection is closed.
+        """
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        while self._queue:
+            if self._backoff:
+                await asyncio.sleep(self._backoff)
+            await self.flush()
+        self._closing = False
+
+    def stats(self) -> dict:
+        """
+        Return the batching statistics.
+
+        Returns:
+            dict: Queue depth, batch and document counts, average and largest batch
+            size, and retried and dropped documents.
+        """
+        return {
+            "pending": len(self._queue),
+            "batches": self.batches,
+            "documents": self.documents,
+            "mean_batch": round(self.documents / self.batches, 1) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "retries": self.retries,
+            "dropped": self.dropped,
+        }
+
+
+# Purchase history documents written by SalesService.process_sale
+purchase_writes = WriteBuffer(
+    "purchases",
+    max_batch=settings.PURCHASE_BATCH_SIZE,
+    interval_ms=settings.PURCHASE_BATCH_INTERVAL_MS,
+    retry_seconds=settings.PURCHASE_RETRY_SECONDS,
+    dead_letter_path=settings.PURCHASE_DEAD_LETTER_PATH,
+)
+
+
+async def replay(db: AsyncIOMotorDatabase, collection: str, path: str, batch_size: int = 1000) -> int:
+    """
+    Insert the documents of a dead-letter file into `collection`, then remove the file.
+
+    The file is first moved aside to `<path>.replaying`, so documents dead-lettered
+    while the replay runs start a new file. Documents already in the collection are
+    skipped, so a replay that fails part way can be run again; it resumes from the
+    moved file.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+        collection (str): The collection the documents belong to.
+        path (str): The dead-letter file.
+        batch_size (int): The number of documents inserted per `insert_many`.
+
+    Returns:
+        int: The number of documents inserted.
+    """
+    replaying = f"{path}.replaying"
+    if not os.path.exists(replaying):
+        os.replace(path, replaying)
+    with open(replaying) as f:
+        documents = [json_util.loads(line) for line in f if line.strip()]
+    inserted = 0
+    for start in range(0, len(documents), batch_size):
+        batch = documents[start:start + batch_size]
+        try:
+            await db[collection].insert_many(batch, ordered=False)
+            inserted += len(batch)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            rejected = [error for error in errors if error.get("code") != DUPLICATE_KEY]
+            if rejected:
+                raise
+            inserted += len(batch) - len(errors)
+    os.remove(replaying)
+    return inserted
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay purchase records that could not be written.")
+    parser.add_argument("command", choices=["replay"], help="Insert the dead-lettered purchase records")
+    parser.add_argument("--uri", default=settings.MONGODB_URI, help="MongoDB connection URI")
+    parser.add_argument("--db", default=settings.MONGODB_DB_NAME, help="Database name")
+    parser.add_argument("--path", default=settings.PURCHASE_DEAD_LETTER_PATH, help="The dead-letter file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if not os.path.exists(args.path) and not os.path.exists(f"{args.path}.replaying"):
+        print(f"Nothing to replay: {args.path} does not exist")
+        return
+    client = AsyncIOMotorClient(args.uri)
+    try:
+        inserted = await replay(client[args.db], "purchases", args.path)
+        print(f"Inserted {inserted} purchases from {args.path}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,7 +1,12 @@
 # app/main.py
 from fastapi import FastAPI
-from app.routers import accounts, auth, categories, products, users
-from app.db.database import connect_db, close_db
+from app.routers import accounts, admin, auth, categories, products, users
+from app.db.database import connect_db, close_db, get_database
+from app.db.write_buffer import purchase_writes
+from app.db.rollups import sales_rollups
+from app.core.stock_gate import start_stock_gate, stop_stock_gate
+from app.core.leaderboard import start_top_sellers, stop_top_sellers
+from app.core.security import start_token_version_sync, stop_token_version_sync, shutdown_password_executor
 from app.routers import sales
 from app.routers import reviews
 
@@ -13,6 +18,7 @@ app.include_router(reviews.router, prefix="/reviews", tags=["Reviews"])
 
 # Include Routers
 app.include_router(accounts.router)
+app.include_router(admin.router)
 app.include_router(auth.router)
 app.include_router(categories.router)
 app.include_router(products.router)
@@ -24,7 +30,16 @@ app.include_router(reviews.router)
 @app.on_event("startup")
 async def startup_db_client():
     await connect_db()
+    await start_token_version_sync(get_database())
+    await start_stock_gate(get_database())
+    await start_top_sellers(get_database())
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await stop_token_version_sync()
+    await stop_stock_gate()
+    await stop_top_sellers()
+    shutdown_password_executor()
+    await purchase_writes.drain()
+    await sales_rollups.drain()
     await close_db()
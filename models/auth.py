@@ -0,0 +1,28 @@
+"""
+Authentication Models Module.
+
+This module defines the `TokenPrincipal` class, the identity reconstructed from the
+signed claims of an access token when authorization does not read the user from the
+database.
+"""
+
+from pydantic import BaseModel
+
+
+class TokenPrincipal(BaseModel):
+    """
+    Token Principal Model.
+
+    Represents the caller as asserted by a verified access token.
+
+    Attributes:
+        id (str): The unique identifier of the user (`uid` claim).
+        username (str): The username of the user (`sub` claim).
+        role (str): The role of the user at the time the token was issued (`role` claim).
+        token_version (int): The user's token version when the token was issued (`ver` claim).
+    """
+
+    id: str
+    username: str
+    role: str
+    token_version: int
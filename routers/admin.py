@@ -0,0 +1,64 @@
+"""
+Admin Router Module.
+
+This module defines the administrative endpoints exposing operational reports, such as
+the database index health report and the runtime metrics of the database driver.
+Administrative privileges are required for every endpoint.
+"""
+
+from fastapi import APIRouter, Depends, status
+from typing import List
+from app.schemas.admin import CollectionIndexReport
+from app.services.admin import AdminService
+from app.db.database import get_database
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.security import check_admin_role
+
+router = APIRouter(
+    tags=["Admin"],
+    prefix="/admin"
+)
+
+@router.get(
+    "/indexes",
+    response_model=List[CollectionIndexReport],
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(check_admin_role)]
+)
+async def get_index_report(
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Report Index Health.
+
+    Compares the declared indexes with those existing on the server and uses `$indexStats`
+    to list missing, unused and redundant indexes per collection. Requires administrative privileges.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+
+    Returns:
+        List[CollectionIndexReport]: The index report of every collection.
+    """
+    return await AdminService.get_index_report(db)
+
+@router.get(
+    "/metrics",
+    response_model=dict,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(check_admin_role)]
+)
+async def get_metrics():
+    """
+    Report Runtime Metrics.
+
+    Returns the metrics collected by this worker process: connection pool size, connections
+    in use, checkout wait time percentiles and checkout failures per server; latency
+    percentiles per (collection, command); the most recent slow commands; the hit ratio
+    of the authenticated principal cache; and the load of the password hashing executor.
+    Requires administrative privileges.
+
+    Returns:
+        dict: The runtime metrics of this process.
+    """
+    return AdminService.get_metrics()
@@ -7,9 +7,10 @@ an existing product, and deleting a product. Administrative privileges are requi
 creating, updating, and deleting products.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from app.schemas.products import ProductCreate, ProductOut, ProductUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.schemas.products import AlsoBoughtOut, ProductCreate, ProductOut, ProductSearchOut, ProductsOut, ProductUpdate
 from app.services.products import ProductService
 from app.db.database import get_database
 from motor.motor_asyncio import AsyncIOMotorDatabase
@@ -47,25 +48,105 @@ async def create_product(
 
 @router.get(
     "/",
-    response_model=List[ProductOut],
+    response_model=ProductsOut,
+    response_model_exclude_unset=True,
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(check_admin_role)]
 )
 async def get_all_products(
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    limit: int = Query(50, ge=1, le=200, description="The number of products per page"),
+    cursor: Optional[str] = Query(None, description="Cursor returned as `next_cursor` by the previous page"),
+    sort: str = Query("_id", regex="^-?(_id|name|price)$", description="Sort key: '_id', 'name' or 'price', '-' for descending"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. 'name,price'")
 ):
     """
     Retrieve All Products.
 
-    Fetches a list of all products available in the system. Requires administrative privileges.
+    Fetches the product catalog one page at a time, sorted by `_id`, name or price. When
+    more products follow, the cursor of the next page is returned in `next_cursor`.
+    Products only carry the fields listed in `fields`, plus their identifier. Requires
+    administrative privileges.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+        limit (int): The number of products per page, at most 200.
+        cursor (Optional[str]): The cursor of the previous page.
+        sort (str): The sort key, prefixed with "-" for descending order.
+        fields (Optional[str]): The fields to return; all of them when omitted.
+
+    Returns:
+        ProductsOut: A page of products.
+    """
+    return await ProductService.get_all_products(db, limit, cursor, sort, fields)
+
+@router.get(
+    "/search",
+    response_model=ProductSearchOut,
+    response_model_exclude_unset=True,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(check_admin_role)]
+)
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200, description="The search terms"),
+    page: int = Query(1, ge=1, le=50, description="The page number"),
+    limit: int = Query(20, ge=1, le=100, description="The number of products per page"),
+    category: Optional[str] = Query(None, description="Only products of this category"),
+    min_price: Optional[float] = Query(None, ge=0, description="Only products at least this expensive"),
+    max_price: Optional[float] = Query(None, ge=0, description="Only products at most this expensive"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Search Products.
+
+    Full-text search over the products' names, tags and descriptions, most relevant
+    first: a match in the name counts more than one in the tags, which counts more than
+    one in the description. Results can be narrowed to a category and a price range.
+    Requires administrative privileges.
+
+    Args:
+        q (str): The search terms.
+        page (int): The page number, at most 50.
+        limit (int): The number of products per page, at most 100.
+        category (Optional[str]): Only products of this category.
+        min_price (Optional[float]): Only products at least this expensive.
+        max_price (Optional[float]): Only products at most this expensive.
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+
+    Returns:
+        ProductSearchOut: A page of matching products.
+    """
+    return await ProductService.search_products(db, q, page, limit, category, min_price, max_price)
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(check_admin_role)]
+)
+async def export_products(
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    format: str = Query("ndjson", regex="^(ndjson|csv)$", description="Export format: 'ndjson' or 'csv'")
+):
+    """
+    Export All Products.
+
+    Streams the whole product catalog as newline-delimited JSON or CSV, for the nightly
+    catalog sync jobs. The export is read and sent batch by batch, so it is never held
+    in memory as a whole. Requires administrative privileges.
 
     Args:
         db (AsyncIOMotorDatabase): The MongoDB database instance.
+        format (str): The export format, "ndjson" or "csv".
 
     Returns:
-        List[ProductOut]: A list of all products.
+        StreamingResponse: The streamed catalog.
     """
-    return await ProductService.get_all_products(db)
+    return StreamingResponse(
+        ProductService.export_products(db, format),
+        media_type="text/csv" if format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'},
+    )
 
 @router.get(
     "/{product_id}",
@@ -91,6 +172,33 @@ async def get_product(
     """
     return await ProductService.get_product(db, product_id)
 
+@router.get(
+    "/{product_id}/also-bought",
+    response_model=AlsoBoughtOut,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(check_admin_role)]
+)
+async def get_also_bought(
+    product_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    limit: int = Query(10, ge=1, le=100, description="The maximum number of items to return")
+):
+    """
+    Retrieve Items Bought Together with a Product.
+
+    Returns the items most often bought by customers who bought this product, served
+    from a precomputed index that is rebuilt offline. Requires administrative privileges.
+
+    Args:
+        product_id (str): The unique identifier of the product.
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+        limit (int): The maximum number of items to return.
+
+    Returns:
+        AlsoBoughtOut: The co-purchased items, best first.
+    """
+    return await ProductService.get_also_bought(db, product_id, limit)
+
 @router.patch(
     "/{product_id}",
     response_model=ProductOut,
@@ -6,29 +6,59 @@ retrieving details of specific goods, processing sales transactions, and adding
 It utilizes dependency injection for database access and ensures that only authorized users can perform certain actions.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from app.schemas.sales import Good, GoodDetails, SaleRequest, SaleResponse, AddGoodRequest
+import json
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from app.schemas.sales import (
+    Good, GoodDetails, SaleRequest, SaleResponse, AddGoodRequest,
+    OrderRequest, OrderResponse, StockSlotsRequest, PurchasesOut, PurchaseSummary,
+    RevenueReport, TopSellersOut
+)
 from app.services.sales import SalesService
+from app.core.idempotency import request_fingerprint, run_idempotent
+from app.core.security import check_admin_role, get_current_user
 from app.db.database import get_database
+from app.models.user import UserModel
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter()
 
 @router.get("/goods", response_model=List[Good])
-async def get_goods(db: AsyncIOMotorDatabase = Depends(get_database)):
+async def get_goods(
+    response: Response,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    limit: int = Query(100, ge=1, le=1000, description="The number of goods per page"),
+    cursor: Optional[str] = Query(None, description="Cursor returned in `X-Next-Cursor` by the previous page"),
+    stream: bool = Query(False, description="Stream every in-stock good after `cursor` as NDJSON")
+):
     """
     Display Available Goods.
 
-    Retrieves a list of all goods currently available in the system.
+    Retrieves the goods currently in stock, ordered by name, one page at a time. When
+    more goods follow, the cursor of the next page is returned in the `X-Next-Cursor`
+    header. With `stream=true` the whole catalog is streamed as newline-delimited JSON
+    instead, for catalog sync jobs.
 
     Args:
+        response (Response): The outgoing response, used to return the next cursor.
         db (AsyncIOMotorDatabase): The MongoDB database instance.
+        limit (int): The number of goods per page. Ignored when streaming.
+        cursor (Optional[str]): The cursor of the previous page.
+        stream (bool): Whether to stream the whole catalog as NDJSON.
 
     Returns:
-        List[Good]: A list of available goods.
+        List[Good]: A page of available goods.
     """
-    return await SalesService.get_goods(db)
+    if stream:
+        after = SalesService.goods_cursor_name(cursor)
+        lines = (json.dumps(good) + "\n" async for good in SalesService.iter_goods(db, after))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    goods, next_cursor = await SalesService.get_goods(db, limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return goods
 
 @router.get("/goods/{good_name}", response_model=GoodDetails)
 async def get_good_details(good_name: str, db: AsyncIOMotorDatabase = Depends(get_database)):
@@ -46,21 +76,126 @@ async def get_good_details(good_name: str, db: AsyncIOMotorDatabase = Depends(ge
     """
     return await SalesService.get_good_details(db, good_name)
 
+@router.get("/top", response_model=TopSellersOut)
+async def get_top_sellers(
+    window: str = Query("24h", regex="^(1h|24h|7d)$", description="The sliding window: '1h', '24h' or '7d'"),
+    n: int = Query(10, ge=1, le=100, description="The number of goods to return")
+):
+    """
+    Get the Best Sellers.
+
+    Retrieves the goods with the most units sold over a sliding window, served from
+    an in-memory ranking that every sale updates.
+
+    Args:
+        window (str): The sliding window, "1h", "24h" or "7d".
+        n (int): The number of goods to return.
+
+    Returns:
+        TopSellersOut: The best-selling goods, most sold first.
+    """
+    return SalesService.get_top_sellers(window, n)
+
+@router.put(
+    "/goods/{good_name}/stock-slots",
+    response_model=GoodDetails,
+    dependencies=[Depends(check_admin_role)]
+)
+async def set_stock_slots(
+    good_name: str,
+    request: StockSlotsRequest,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Split a Good's Stock Across Slots.
+
+    Spreads the stock of a hot good over several slot documents so concurrent sales
+    decrement different documents, or merges it back with `slots=1`. Requires
+    administrative privileges.
+
+    Args:
+        good_name (str): The name of the good.
+        request (StockSlotsRequest): The number of stock slots.
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+
+    Returns:
+        GoodDetails: The good's details with its total count.
+    """
+    return await SalesService.set_stock_slots(db, good_name, request.slots)
+
+IDEMPOTENCY_KEY_DESCRIPTION = (
+    "Client-generated unique key. Retries with the same key return the original "
+    "outcome instead of purchasing again."
+)
+
 @router.post("/sales", response_model=SaleResponse)
-async def make_sale(sale_request: SaleRequest, db: AsyncIOMotorDatabase = Depends(get_database)):
+async def make_sale(
+    sale_request: SaleRequest,
+    response: Response,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    idempotency_key: Optional[str] = Header(None, max_length=255, description=IDEMPOTENCY_KEY_DESCRIPTION)
+):
     """
     Process a Sale.
 
-    Processes a sales transaction based on the provided sale request data.
+    Processes a sales transaction based on the provided sale request data. When an
+    `Idempotency-Key` header is sent, a retry with the same key returns the original
+    outcome, marked with an `Idempotent-Replayed: true` header, without purchasing again.
 
     Args:
         sale_request (SaleRequest): The details of the sale to be processed.
+        response (Response): The outgoing response, used to flag replays.
         db (AsyncIOMotorDatabase): The MongoDB database instance.
+        idempotency_key (Optional[str]): The client's key for safely retrying this request.
 
     Returns:
         SaleResponse: The details of the processed sale.
     """
-    return await SalesService.process_sale(db, sale_request)
+    if idempotency_key is None:
+        return await SalesService.process_sale(db, sale_request)
+    body, replayed = await run_idempotent(
+        db,
+        f"sales:{idempotency_key}",
+        request_fingerprint(sale_request.dict()),
+        lambda: SalesService.process_sale(db, sale_request)
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return body
+
+@router.post("/orders", response_model=OrderResponse, status_code=201)
+async def place_order(
+    order: OrderRequest,
+    response: Response,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    idempotency_key: Optional[str] = Header(None, max_length=255, description=IDEMPOTENCY_KEY_DESCRIPTION)
+):
+    """
+    Place an Order.
+
+    Purchases several goods, each in any quantity, in a single request. Either every
+    line is purchased or none is. Supports `Idempotency-Key` like `POST /sales/sales`.
+
+    Args:
+        order (OrderRequest): The goods and quantities to purchase.
+        response (Response): The outgoing response, used to flag replays.
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+        idempotency_key (Optional[str]): The client's key for safely retrying this request.
+
+    Returns:
+        OrderResponse: The details of the placed order.
+    """
+    if idempotency_key is None:
+        return await SalesService.place_order(db, order)
+    body, replayed = await run_idempotent(
+        db,
+        f"orders:{idempotency_key}",
+        request_fingerprint(order.dict()),
+        lambda: SalesService.place_order(db, order)
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return body
 
 @router.post("/goods", status_code=201)
 async def add_good(good: AddGoodRequest, db: AsyncIOMotorDatabase = Depends(get_database)):
@@ -78,3 +213,150 @@ async def add_good(good: AddGoodRequest, db: AsyncIOMotorDatabase = Depends(get_
     """
     await SalesService.add_good(db, good)
     return {"message": "Good added successfully"}
+
+@router.get("/purchases", response_model=PurchasesOut)
+async def get_my_purchases(
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user),
+    good_name: Optional[str] = Query(None, description="Only purchases of this good"),
+    since: Optional[datetime] = Query(None, description="Only purchases made at or after this time (UTC)"),
+    until: Optional[datetime] = Query(None, description="Only purchases made before this time (UTC)"),
+    limit: int = Query(50, ge=1, le=500, description="The number of purchases per page"),
+    cursor: Optional[str] = Query(None, description="Cursor returned as `next_cursor` by the previous page")
+):
+    """
+    Get My Purchase History.
+
+    Retrieves the authenticated user's purchases, newest first, one page at a time.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+        current_user (UserModel): The authenticated user.
+        good_name (Optional[str]): Only purchases of this good.
+        since (Optional[datetime]): Only purchases made at or after this time.
+        until (Optional[datetime]): Only purchases made before this time.
+        limit (int): The number of purchases per page.
+        cursor (Optional[str]): The cursor of the previous page.
+
+    Returns:
+        PurchasesOut: A page of purchases.
+    """
+    return await SalesService.get_purchases(
+        db, current_user.username, good_name, since, until, limit, cursor
+    )
+
+@router.get("/purchases/summary", response_model=PurchaseSummary)
+async def get_my_purchase_summary(
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user),
+    good_name: Optional[str] = Query(None, description="Only purchases of this good"),
+    since: Optional[datetime] = Query(None, description="Only purchases made at or after this time (UTC)"),
+    until: Optional[datetime] = Query(None, description="Only purchases made before this time (UTC)")
+):
+    """
+    Get My Purchase Summary.
+
+    Summarizes the authenticated user's purchases: the total spent and the units
+    bought per good.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+        current_user (UserModel): The authenticated user.
+        good_name (Optional[str]): Only purchases of this good.
+        since (Optional[datetime]): Only purchases made at or after this time.
+        until (Optional[datetime]): Only purchases made before this time.
+
+    Returns:
+        PurchaseSummary: The user's purchase totals.
+    """
+    return await SalesService.get_purchase_summary(db, current_user.username, good_name, since, until)
+
+@router.get(
+    "/admin/purchases",
+    response_model=PurchasesOut,
+    dependencies=[Depends(check_admin_role)]
+)
+async def get_purchases(
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    username: Optional[str] = Query(None, description="Only purchases made by this user"),
+    good_name: Optional[str] = Query(None, description="Only purchases of this good"),
+    since: Optional[datetime] = Query(None, description="Only purchases made at or after this time (UTC)"),
+    until: Optional[datetime] = Query(None, description="Only purchases made before this time (UTC)"),
+    limit: int = Query(50, ge=1, le=500, description="The number of purchases per page"),
+    cursor: Optional[str] = Query(None, description="Cursor returned as `next_cursor` by the previous page")
+):
+    """
+    Get Purchase History.
+
+    Retrieves the purchases of one or all users, ordered by username and newest
+    first, one page at a time. Requires administrative privileges.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+        username (Optional[str]): Only purchases made by this user.
+        good_name (Optional[str]): Only purchases of this good.
+        since (Optional[datetime]): Only purchases made at or after this time.
+        until (Optional[datetime]): Only purchases made before this time.
+        limit (int): The number of purchases per page.
+        cursor (Optional[str]): The cursor of the previous page.
+
+    Returns:
+        PurchasesOut: A page of purchases.
+    """
+    return await SalesService.get_purchases(db, username, good_name, since, until, limit, cursor)
+
+@router.get(
+    "/admin/purchases/summary",
+    response_model=PurchaseSummary,
+    dependencies=[Depends(check_admin_role)]
+)
+async def get_purchase_summary(
+    username: str = Query(..., description="The user to summarize"),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    good_name: Optional[str] = Query(None, description="Only purchases of this good"),
+    since: Optional[datetime] = Query(None, description="Only purchases made at or after this time (UTC)"),
+    until: Optional[datetime] = Query(None, description="Only purchases made before this time (UTC)")
+):
+    """
+    Get a User's Purchase Summary.
+
+    Summarizes a user's purchases: the total spent and the units bought per good.
+    Requires administrative privileges.
+
+    Args:
+        username (str): The user to summarize.
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+        good_name (Optional[str]): Only purchases of this good.
+        since (Optional[datetime]): Only purchases made at or after this time.
+        until (Optional[datetime]): Only purchases made before this time.
+
+    Returns:
+        PurchaseSummary: The user's purchase totals.
+    """
+    return await SalesService.get_purchase_summary(db, username, good_name, since, until)
+
+@router.get(
+    "/admin/reports/revenue",
+    response_model=RevenueReport,
+    dependencies=[Depends(check_admin_role)]
+)
+async def get_revenue_report(
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    days: int = Query(90, ge=1, le=3660, description="The number of days to cover, up to and including today (UTC)"),
+    good_name: Optional[str] = Query(None, description="Only report this good")
+):
+    """
+    Get the Revenue Report.
+
+    Reports the units sold and the revenue per good over the last `days` days, read
+    from the daily sales rollups. Requires administrative privileges.
+
+    Args:
+        db (AsyncIOMotorDatabase): The MongoDB database instance.
+        days (int): The number of days to cover.
+        good_name (Optional[str]): Only report this good.
+
+    Returns:
+        RevenueReport: The units and revenue per good.
+    """
+    return await SalesService.get_revenue_report(db, days, good_name)
@@ -6,8 +6,8 @@ retrieving user information, updating user details, deleting users, and managing
 Administrative privileges are required for certain operations to ensure secure and authorized access.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Optional
 from app.schemas.users import (
     UserCreate, UserOut, UsersOut, UserOutDelete,
     UserUpdate, WalletTransaction
@@ -58,25 +58,30 @@ async def get_all_users(
     page: int = 1,
     limit: int = 10,
     search: str = "",
-    role: str = "user"
+    role: str = "user",
+    cursor: Optional[str] = Query(None, description="Cursor returned as `next_cursor` by the previous page"),
+    sort: str = Query("_id", regex="^(_id|username)$", description="Sort key: '_id' or 'username'")
 ):
     """
     Retrieve All Users.
 
     Fetches a paginated list of all users, with optional filtering based on search query and role.
-    Requires administrative privileges.
+    Pages can be addressed by number or, for constant-cost deep paging, by the cursor returned
+    in `next_cursor`. Requires administrative privileges.
 
     Args:
         db (AsyncIOMotorDatabase): The MongoDB database instance.
-        page (int): The page number for pagination.
+        page (int): The page number for pagination. Ignored when `cursor` is given.
         limit (int): The number of users per page.
         search (str): The search query to filter users by name or other attributes.
         role (str): The role to filter users by (e.g., "admin", "user").
+        cursor (Optional[str]): The cursor of the previous page.
+        sort (str): The sort key, "_id" or "username".
 
     Returns:
         UsersOut: A paginated list of users.
     """
-    return await UserService.get_all_users(db, page, limit, search, role)
+    return await UserService.get_all_users(db, page, limit, search, role, cursor, sort)
 
 @router.get(
     "/{user_id}",
@@ -176,8 +181,7 @@ async def add_to_wallet(
     Returns:
         UserOut: The updated user information with the new wallet balance.
     """
-    await UserService.add_wallet(db, user_id, transaction.amount)
-    return await UserService.get_user(db, user_id)
+    return await UserService.add_wallet(db, user_id, transaction.amount)
 
 @router.post(
     "/{user_id}/wallet/deduct",
@@ -203,5 +207,4 @@ async def deduct_from_wallet(
     Returns:
         UserOut: The updated user information with the new wallet balance.
     """
-    await UserService.deduct_wallet(db, user_id, transaction.amount)
-    return await UserService.get_user(db, user_id)
+    return await UserService.deduct_wallet(db, user_id, transaction.amount)
@@ -0,0 +1,72 @@
+"""
+Admin Schemas Module.
+
+This module defines the Pydantic models returned by the administrative endpoints,
+such as the database index health report.
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
+from datetime import datetime
+
+
+class IndexUsage(BaseModel):
+    """
+    Index Usage Schema.
+
+    Describes one index existing on a collection and how often it has been used.
+
+    Attributes:
+        name (str): The name of the index.
+        key (Dict[str, int]): The index key pattern.
+        declared (bool): Whether the index is part of the declared specification.
+        ops (int): The number of operations that used the index.
+        since (Optional[datetime]): When usage collection started for the index.
+    """
+
+    name: str = Field(
+        ..., description="The name of the index."
+    )
+    key: Dict[str, int] = Field(
+        ..., description="The index key pattern."
+    )
+    declared: bool = Field(
+        ..., description="Whether the index is part of the declared specification."
+    )
+    ops: int = Field(
+        ..., description="The number of operations that used the index."
+    )
+    since: Optional[datetime] = Field(
+        None, description="When usage collection started for the index."
+    )
+
+
+class CollectionIndexReport(BaseModel):
+    """
+    Collection Index Report Schema.
+
+    Defines the index health report of a single collection.
+
+    Attributes:
+        collection (str): The name of the collection.
+        missing (List[str]): Declared indexes that do not exist.
+        unused (List[str]): Existing indexes that have never been used.
+        redundant (List[str]): Indexes whose key is a prefix of another index.
+        indexes (List[IndexUsage]): Usage details of every existing index.
+    """
+
+    collection: str = Field(
+        ..., description="The name of the collection."
+    )
+    missing: List[str] = Field(
+        ..., description="Declared indexes that do not exist."
+    )
+    unused: List[str] = Field(
+        ..., description="Existing indexes that have never been used."
+    )
+    redundant: List[str] = Field(
+        ..., description="Indexes whose key is a prefix of another index."
+    )
+    indexes: List[IndexUsage] = Field(
+        ..., description="Usage details of every existing index."
+    )
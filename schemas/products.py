@@ -186,3 +186,222 @@ class ProductOut(ProductBase):
         orm_mode = True
         allow_population_by_field_name = True
         json_encoders = {ObjectId: str}
+
+
+class ProductListItem(BaseModel):
+    """
+    Product Listing Item Schema.
+
+    Defines one product of a listing page. Only the fields requested with `fields`
+    are read from the database and returned; the identifier is always included.
+
+    Attributes:
+        id (PyObjectId): The unique identifier of the product.
+        name (Optional[str]): The name of the product.
+        description (Optional[str]): A brief description of the product.
+        price (Optional[float]): The price of the product.
+        quantity (Optional[int]): The available quantity of the product.
+        category (Optional[str]): The category of the product.
+        tags (Optional[List[str]]): A list of tags associated with the product.
+    """
+
+    id: PyObjectId = Field(
+        ..., alias="_id", description="The unique identifier of the product."
+    )
+    name: Optional[str] = Field(
+        None, description="The name of the product."
+    )
+    description: Optional[str] = Field(
+        None, description="A brief description of the product."
+    )
+    price: Optional[float] = Field(
+        None, description="The price of the product."
+    )
+    quantity: Optional[int] = Field(
+        None, description="The available quantity of the product."
+    )
+    category: Optional[str] = Field(
+        None, description="The category of the product."
+    )
+    tags: Optional[List[str]] = Field(
+        None, description="A list of tags associated with the product."
+    )
+
+    class Config:
+        """
+        Configuration for the ProductListItem Schema.
+
+        Allows population by field name and defines JSON encoders for ObjectId.
+        """
+
+        allow_population_by_field_name = True
+        json_encoders = {ObjectId: str}
+
+
+class ProductsOut(BaseModel):
+    """
+    Paginated Products Output Schema.
+
+    Defines one page of the product listing.
+
+    Attributes:
+        products (List[ProductListItem]): The products of the page.
+        limit (int): The number of products per page.
+        next_cursor (Optional[str]): The cursor of the next page, or None on the last page.
+    """
+
+    products: List[ProductListItem] = Field(
+        ..., description="The products of the page."
+    )
+    limit: int = Field(
+        ..., description="The number of products per page."
+    )
+    next_cursor: Optional[str] = Field(
+        None, description="Opaque cursor for the next page, or null on the last page."
+    )
+
+    class Config:
+        """
+        Configuration for the ProductsOut Schema.
+
+        Defines JSON encoders for ObjectId and provides example data for documentation purposes.
+        """
+
+        json_encoders = {ObjectId: str}
+        schema_extra = {
+            "example": {
+                "products": [
+                    {"_id": "64b7f0c2e1a2b3c4d5e6f789", "name": "Wireless Mouse", "price": 29.99},
+                ],
+                "limit": 50,
+                "next_cursor": None,
+            }
+        }
+
+
+class ProductSearchItem(ProductListItem):
+    """
+    Product Search Result Schema.
+
+    Defines one product matching a search, with its relevance.
+
+    Attributes:
+        score (float): The text relevance score; higher is better.
+    """
+
+    score: float = Field(
+        ..., description="The text relevance score; higher is better."
+    )
+
+
+class ProductSearchOut(BaseModel):
+    """
+    Product Search Output Schema.
+
+    Defines one page of search results, most relevant first.
+
+    Attributes:
+        products (List[ProductSearchItem]): The matching products of the page.
+        page (int): The current page number.
+        limit (int): The number of products per page.
+        has_more (bool): Whether more results follow.
+    """
+
+    products: List[ProductSearchItem] = Field(
+        ..., description="The matching products of the page, most relevant first."
+    )
+    page: int = Field(
+        ..., description="The current page number."
+    )
+    limit: int = Field(
+        ..., description="The number of products per page."
+    )
+    has_more: bool = Field(
+        ..., description="Whether more results follow."
+    )
+
+    class Config:
+        """
+        Configuration for the ProductSearchOut Schema.
+
+        Defines JSON encoders for ObjectId and provides example data for documentation purposes.
+        """
+
+        json_encoders = {ObjectId: str}
+        schema_extra = {
+            "example": {
+                "products": [
+                    {
+                        "_id": "64b7f0c2e1a2b3c4d5e6f789",
+                        "name": "Wireless Mouse",
+                        "price": 29.99,
+                        "category": "Electronics",
+                        "tags": ["accessories", "wireless"],
+                        "score": 10.5,
+                    },
+                ],
+                "page": 1,
+                "limit": 20,
+                "has_more": False,
+            }
+        }
+
+
+class AlsoBoughtItem(BaseModel):
+    """
+    Also-Bought Item Schema.
+
+    Defines one recommendation of the also-bought list.
+
+    Attributes:
+        name (str): The name of the co-purchased item.
+        score (float): How strongly it is co-purchased; higher is better.
+    """
+
+    name: str = Field(
+        ..., description="The name of the co-purchased item."
+    )
+    score: float = Field(
+        ..., description="How strongly it is co-purchased; higher is better."
+    )
+
+
+class AlsoBoughtOut(BaseModel):
+    """
+    Also-Bought Output Schema.
+
+    Defines the items most often bought by the buyers of a product.
+
+    Attributes:
+        product_id (str): The unique identifier of the product.
+        name (str): The name of the product.
+        items (List[AlsoBoughtItem]): The co-purchased items, best first.
+    """
+
+    product_id: str = Field(
+        ..., description="The unique identifier of the product."
+    )
+    name: str = Field(
+        ..., description="The name of the product."
+    )
+    items: List[AlsoBoughtItem] = Field(
+        ..., description="The co-purchased items, best first."
+    )
+
+    class Config:
+        """
+        Configuration for the AlsoBoughtOut Schema.
+
+        Provides example data for documentation purposes.
+        """
+
+        schema_extra = {
+            "example": {
+                "product_id": "64b7f0c2e1a2b3c4d5e6f789",
+                "name": "Smartphone",
+                "items": [
+                    {"name": "Phone Case", "score": 42.0},
+                    {"name": "Screen Protector", "score": 17.0},
+                ],
+            }
+        }
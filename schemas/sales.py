@@ -6,6 +6,7 @@ displaying goods, processing sales transactions, and adding new goods. These sch
 validating and serializing data in sales-related API endpoints.
 """
 
+from datetime import datetime
 from pydantic import BaseModel, Field, PositiveFloat, PositiveInt
 from typing import Optional, List
 
@@ -40,6 +41,7 @@ class GoodDetails(BaseModel):
         price (float): The price of the good.
         description (Optional[str]): A brief description of the good.
         count (int): The available quantity of the good.
+        stock_slots (Optional[int]): The number of slots the stock is split across, if any.
     """
 
     name: str = Field(
@@ -54,6 +56,24 @@ class GoodDetails(BaseModel):
     count: int = Field(
         ..., description="The available quantity of the good."
     )
+    stock_slots: Optional[int] = Field(
+        None, description="The number of slots the stock is split across, if any."
+    )
+
+
+class StockSlotsRequest(BaseModel):
+    """
+    Stock Slots Request Schema.
+
+    Defines how many slot documents a good's stock is split across.
+
+    Attributes:
+        slots (int): The number of stock slots; 1 keeps the whole stock on the good.
+    """
+
+    slots: int = Field(
+        ..., ge=1, le=256, description="The number of stock slots; 1 keeps the whole stock on the good."
+    )
 
 
 class SaleRequest(BaseModel):
@@ -98,6 +118,115 @@ class SaleResponse(BaseModel):
     )
 
 
+class OrderItem(BaseModel):
+    """
+    Order Item Schema.
+
+    Defines one line item of an order.
+
+    Attributes:
+        good_name (str): The name of the good being purchased.
+        quantity (int): The number of units to purchase.
+    """
+
+    good_name: str = Field(
+        ..., description="The name of the good being purchased."
+    )
+    quantity: PositiveInt = Field(
+        1, description="The number of units to purchase."
+    )
+
+
+class OrderRequest(BaseModel):
+    """
+    Order Request Schema.
+
+    Defines the structure for placing an order of several goods in one request.
+
+    Attributes:
+        username (str): The username of the customer placing the order.
+        items (List[OrderItem]): The goods and quantities being purchased.
+    """
+
+    username: str = Field(
+        ..., description="The username of the customer placing the order."
+    )
+    items: List[OrderItem] = Field(
+        ..., min_items=1, max_items=100, description="The goods and quantities being purchased."
+    )
+
+    class Config:
+        """
+        Configuration for the OrderRequest Schema.
+
+        Provides example data for documentation purposes.
+        """
+
+        schema_extra = {
+            "example": {
+                "username": "johndoe",
+                "items": [
+                    {"good_name": "Smartphone", "quantity": 1},
+                    {"good_name": "Phone Case", "quantity": 2},
+                ],
+            }
+        }
+
+
+class OrderLine(BaseModel):
+    """
+    Order Line Schema.
+
+    Defines one purchased line of a completed order.
+
+    Attributes:
+        good_name (str): The name of the purchased good.
+        quantity (int): The number of units purchased.
+        price (float): The unit price charged.
+    """
+
+    good_name: str = Field(
+        ..., description="The name of the purchased good."
+    )
+    quantity: int = Field(
+        ..., description="The number of units purchased."
+    )
+    price: float = Field(
+        ..., description="The unit price charged."
+    )
+
+
+class OrderResponse(BaseModel):
+    """
+    Order Response Schema.
+
+    Defines the structure for the response after placing an order.
+
+    Attributes:
+        message (str): A confirmation message indicating the order was placed.
+        order_id (str): The unique identifier of the order.
+        items (List[OrderLine]): The purchased lines, with duplicate goods merged.
+        total (float): The amount charged for the order.
+        remaining_balance (float): The remaining balance in the user's wallet after the order.
+    """
+
+    message: str = Field(
+        ..., description="A confirmation message indicating the order was placed."
+    )
+    order_id: str = Field(
+        ..., description="The unique identifier of the order."
+    )
+    items: List[OrderLine] = Field(
+        ..., description="The purchased lines, with duplicate goods merged."
+    )
+    total: float = Field(
+        ..., description="The amount charged for the order."
+    )
+    remaining_balance: float = Field(
+        ..., description="The remaining balance in the user's wallet after the order."
+    )
+
+
 class AddGoodRequest(BaseModel):
     """
     Add Good Request Schema.
@@ -139,3 +268,251 @@ class AddGoodRequest(BaseModel):
                 "description": "A high-end smartphone with 128GB storage.",
             }
         }
+
+
+class Purchase(BaseModel):
+    """
+    Purchase Schema.
+
+    Defines one entry of a user's purchase history.
+
+    Attributes:
+        id (str): The unique identifier of the purchase.
+        username (str): The name of the user who made the purchase.
+        good_name (str): The name of the purchased good.
+        price (float): The price charged.
+        purchased_at (datetime): When the purchase was made (UTC).
+    """
+
+    id: str = Field(
+        ..., description="The unique identifier of the purchase."
+    )
+    username: str = Field(
+        ..., description="The name of the user who made the purchase."
+    )
+    good_name: str = Field(
+        ..., description="The name of the purchased good."
+    )
+    price: float = Field(
+        ..., description="The price charged."
+    )
+    purchased_at: datetime = Field(
+        ..., description="When the purchase was made (UTC)."
+    )
+
+
+class PurchasesOut(BaseModel):
+    """
+    Purchase History Page Schema.
+
+    Defines one page of purchase history, ordered by username and newest first.
+
+    Attributes:
+        purchases (List[Purchase]): The purchases on this page.
+        next_cursor (Optional[str]): The cursor of the next page, or None on the last page.
+    """
+
+    purchases: List[Purchase] = Field(
+        ..., description="The purchases on this page."
+    )
+    next_cursor: Optional[str] = Field(
+        None, description="Opaque cursor for the next page, or null on the last page."
+    )
+
+    class Config:
+        """
+        Configuration for the PurchasesOut Schema.
+
+        Provides example data for documentation purposes.
+        """
+
+        schema_extra = {
+            "example": {
+                "purchases": [
+                    {
+                        "id": "64b7f0c2e1a2b3c4d5e6f789",
+                        "username": "johndoe",
+                        "good_name": "Smartphone",
+                        "price": 699.99,
+                        "purchased_at": "2024-07-19T14:05:22",
+                    }
+                ],
+                "next_cursor": None,
+            }
+        }
+
+
+class PurchaseSummaryItem(BaseModel):
+    """
+    Purchase Summary Item Schema.
+
+    Defines the purchases of one good within a purchase summary.
+
+    Attributes:
+        good_name (str): The name of the good.
+        count (int): The number of units purchased.
+        spent (float): The amount spent on the good.
+    """
+
+    good_name: str = Field(
+        ..., description="The name of the good."
+    )
+    count: int = Field(
+        ..., description="The number of units purchased."
+    )
+    spent: float = Field(
+        ..., description="The amount spent on the good."
+    )
+
+
+class PurchaseSummary(BaseModel):
+    """
+    Purchase Summary Schema.
+
+    Defines the totals of a user's purchase history.
+
+    Attributes:
+        username (str): The name of the user.
+        purchases (int): The number of purchases.
+        total_spent (float): The amount spent across all purchases.
+        items (List[PurchaseSummaryItem]): The units and amount per good, most bought first.
+    """
+
+    username: str = Field(
+        ..., description="The name of the user."
+    )
+    purchases: int = Field(
+        ..., description="The number of purchases."
+    )
+    total_spent: float = Field(
+        ..., description="The amount spent across all purchases."
+    )
+    items: List[PurchaseSummaryItem] = Field(
+        ..., description="The units and amount per good, most bought first."
+    )
+
+
+class GoodRevenue(BaseModel):
+    """
+    Good Revenue Schema.
+
+    Defines the sales of one good within a revenue report.
+
+    Attributes:
+        good_name (str): The name of the good.
+        units (int): The units sold.
+        revenue (float): The revenue from the good.
+    """
+
+    good_name: str = Field(
+        ..., description="The name of the good."
+    )
+    units: int = Field(
+        ..., description="The units sold."
+    )
+    revenue: float = Field(
+        ..., description="The revenue from the good."
+    )
+
+
+class RevenueReport(BaseModel):
+    """
+    Revenue Report Schema.
+
+    Defines the revenue per good over a range of days, read from the daily rollups.
+
+    Attributes:
+        since (datetime): The first day covered (UTC midnight).
+        days (int): The number of days covered, up to and including today.
+        units (int): The units sold across all goods.
+        revenue (float): The revenue across all goods.
+        goods (List[GoodRevenue]): The units and revenue per good, highest revenue first.
+    """
+
+    since: datetime = Field(
+        ..., description="The first day covered (UTC midnight)."
+    )
+    days: int = Field(
+        ..., description="The number of days covered, up to and including today."
+    )
+    units: int = Field(
+        ..., description="The units sold across all goods."
+    )
+    revenue: float = Field(
+        ..., description="The revenue across all goods."
+    )
+    goods: List[GoodRevenue] = Field(
+        ..., description="The units and revenue per good, highest revenue first."
+    )
+
+    class Config:
+        """
+        Configuration for the RevenueReport Schema.
+
+        Provides example data for documentation purposes.
+        """
+
+        schema_extra = {
+            "example": {
+                "since": "2024-04-21T00:00:00",
+                "days": 90,
+                "units": 120,
+                "revenue": 8399.88,
+                "goods": [{"good_name": "Smartphone", "units": 12, "revenue": 8399.88}],
+            }
+        }
+
+
+class TopSeller(BaseModel):
+    """
+    Top Seller Schema.
+
+    Defines one entry of the best-sellers ranking.
+
+    Attributes:
+        good_name (str): The name of the good.
+        units (int): The units sold in the window.
+    """
+
+    good_name: str = Field(
+        ..., description="The name of the good."
+    )
+    units: int = Field(
+        ..., description="The units sold in the window."
+    )
+
+
+class TopSellersOut(BaseModel):
+    """
+    Top Sellers Output Schema.
+
+    Defines the best-selling goods over a sliding window.
+
+    Attributes:
+        window (str): The window, "1h", "24h" or "7d".
+        goods (List[TopSeller]): The goods with the most units sold, most sold first.
+    """
+
+    window: str = Field(
+        ..., description="The window, \"1h\", \"24h\" or \"7d\"."
+    )
+    goods: List[TopSeller] = Field(
+        ..., description="The goods with the most units sold, most sold first."
+    )
+
+    class Config:
+        """
+        Configuration for the TopSellersOut Schema.
+
+        Provides example data for documentation purposes.
+        """
+
+        schema_extra = {
+            "example": {
+                "window": "24h",
+                "goods": [
+                    {"good_name": "Smartphone", "units": 42},
+                    {"good_name": "Headphones", "units": 17},
+                ],
+            }
+        }
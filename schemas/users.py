@@ -298,16 +298,17 @@ class UsersOut(BaseModel):
 
     Attributes:
         users (List[UserOut]): A list of user objects.
-        total (int): The total number of users.
+        total (Optional[int]): The total number of users. Omitted for cursor-based requests.
         page (int): The current page number.
         limit (int): The number of users per page.
+        next_cursor (Optional[str]): The cursor of the next page, or None on the last page.
     """
 
     users: List[UserOut] = Field(
         ..., description="A list of user objects."
     )
-    total: int = Field(
-        ..., description="The total number of users."
+    total: Optional[int] = Field(
+        None, description="The total number of users. Omitted for cursor-based requests."
     )
     page: int = Field(
         ..., description="The current page number."
@@ -315,14 +316,19 @@ class UsersOut(BaseModel):
     limit: int = Field(
         ..., description="The number of users per page."
     )
+    next_cursor: Optional[str] = Field(
+        None, description="Opaque cursor for the next page, or null on the last page."
+    )
 
     class Config:
         """
         Configuration for the UsersOut Schema.
 
-        Provides example data for documentation purposes.
+        Defines JSON encoders for the users' ObjectIds and provides example data for
+        documentation purposes.
         """
 
+        json_encoders = {ObjectId: str}
         schema_extra = {
             "example": {
                 "users": [
@@ -344,7 +350,8 @@ class UsersOut(BaseModel):
                 ],
                 "total": 1,
                 "page": 1,
-                "limit": 10
+                "limit": 10,
+                "next_cursor": None
             }
         }
 
@@ -399,11 +406,11 @@ class WalletTransaction(BaseModel):
     Defines the structure for wallet transactions.
 
     Attributes:
-        amount (float): The amount to be added or deducted from the wallet.
+        amount (float): The amount to be added or deducted from the wallet. Must be positive.
     """
 
     amount: float = Field(
-        ..., description="The amount to be added or deducted from the wallet."
+        ..., gt=0, description="The amount to be added or deducted from the wallet."
     )
 
     class Config:
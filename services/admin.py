@@ -0,0 +1,72 @@
+"""
+Admin Service Module.
+
+This module defines the `AdminService` class, which gathers operational information
+for administrators, such as the health of the database indexes and the runtime
+metrics of the database driver.
+"""
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import List
+from app.db.indexes import index_report
+from app.db.rollups import sales_rollups
+from app.db.write_buffer import purchase_writes
+from app.core.also_bought import also_bought
+from app.core.idempotency import idempotency_stats, outcome_cache
+from app.core.metrics import command_metrics, pool_metrics
+from app.core.leaderboard import top_sellers
+from app.core.stock_gate import stock_gate
+from app.core.security import password_hash_stats, principal_cache
+from app.services.sales import goods_cache, goods_pages
+
+
+class AdminService:
+    """
+    Service class for administrative reports.
+    """
+
+    @staticmethod
+    async def get_index_report(db: AsyncIOMotorDatabase) -> List[dict]:
+        """
+        Report missing, unused and redundant indexes per collection.
+
+        Args:
+            db (AsyncIOMotorDatabase): The MongoDB database instance.
+
+        Returns:
+            List[dict]: One report entry per collection.
+        """
+        return await index_report(db)
+
+    @staticmethod
+    def get_metrics() -> dict:
+        """
+        Collect the in-process runtime metrics.
+
+        Returns:
+            dict: The connection pool metrics per server under `pool`, the latency
+            histograms per (collection, command) under `commands`, and the most recent
+            slow commands with their redacted filter shapes under `slow_commands`, the
+            authenticated principal cache statistics under `auth_cache`, the password
+            hashing executor load under `password_hashing`, the Idempotency-Key
+            counters and outcome cache statistics under `idempotency`, the purchase
+            group-commit buffer statistics under `purchase_writes`, the sold-out
+            gate statistics under `stock_gate`, the goods and listing page cache
+            statistics under `goods_cache`, the daily rollup writer statistics
+            under `sales_rollups`, the top-seller ranking sizes under `top_sellers`, and
+            the also-bought index size and lookups under `also_bought`.
+        """
+        return {
+            "pool": pool_metrics.snapshot(),
+            "commands": command_metrics.snapshot(),
+            "slow_commands": command_metrics.slow_commands(),
+            "auth_cache": principal_cache.stats(),
+            "password_hashing": dict(password_hash_stats),
+            "idempotency": {**idempotency_stats, "cache": outcome_cache.stats()},
+            "purchase_writes": purchase_writes.stats(),
+            "stock_gate": stock_gate.stats(),
+            "goods_cache": {**goods_cache.stats(), "listing_pages": goods_pages.stats()},
+            "sales_rollups": sales_rollups.stats(),
+            "top_sellers": top_sellers.stats(),
+            "also_bought": also_bought.stats(),
+        }
@@ -8,7 +8,7 @@ database to manage user credentials and generate JWT tokens for secure access.
 
 from fastapi import HTTPException, status
 from app.schemas.auth import Token, Signup, UserInDB
-from app.core.security import verify_password, create_access_token, get_password_hash
+from app.core.security import verify_password_async, create_access_token, get_password_hash_async
 from motor.motor_asyncio import AsyncIOMotorClient
 from typing import Optional
 from fastapi.security.oauth2 import OAuth2PasswordRequestForm
@@ -48,7 +48,7 @@ class AuthService:
                 raise HTTPException(status_code=400, detail="Email already registered")
         
         # Hash the password
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash_async(user.password)
         
         # Prepare user data
         user_dict = user.dict()
@@ -86,7 +86,7 @@ class AuthService:
                 detail="Incorrect username or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        if not verify_password(user_credentials.password, user["hashed_password"]):
+        if not await verify_password_async(user_credentials.password, user["hashed_password"]):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
@@ -94,7 +94,12 @@ class AuthService:
             )
         
         access_token = create_access_token(
-            data={"sub": user["username"], "role": user["role"]}
+            data={
+                "sub": user["username"],
+                "role": user["role"],
+                "uid": str(user["_id"]),
+                "ver": user.get("token_version", 0),
+            }
         )
         return {"access_token": access_token, "token_type": "bearer"}
 
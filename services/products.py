@@ -7,11 +7,27 @@ product, updating an existing product, and deleting a product. It interacts with
 database to perform CRUD operations on product data.
 """
 
-from app.schemas.products import ProductCreate, ProductOut, ProductUpdate
+import csv
+import io
+import json
+
+from app.core.also_bought import also_bought
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter, sort_keys
+from app.schemas.products import (
+    AlsoBoughtItem, AlsoBoughtOut, ProductCreate, ProductListItem, ProductOut, ProductSearchItem,
+    ProductSearchOut, ProductsOut, ProductUpdate
+)
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 from fastapi import HTTPException, status
-from typing import List
+from typing import AsyncIterator, Optional
+
+# Fields a product listing can be projected on; the identifier is always returned
+PRODUCT_FIELDS = ("name", "description", "price", "quantity", "category", "tags")
+
+# Documents per batch when the whole catalog is exported; a batch is also one
+# chunk of the response, so this bounds the memory an export holds
+PRODUCT_EXPORT_BATCH_SIZE = 1000
 
 
 class ProductService:
@@ -45,23 +61,166 @@ class ProductService:
         return ProductOut(**product_dict)
     
     @staticmethod
-    async def get_all_products(db: AsyncIOMotorDatabase) -> List[ProductOut]:
+    async def get_all_products(
+        db: AsyncIOMotorDatabase,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort: str = "_id",
+        fields: Optional[str] = None
+    ) -> ProductsOut:
         """
-        Retrieve all products.
+        Retrieve one page of the product catalog.
+
+        Pages are keyset-paginated on the sort key (with an `_id` tie-breaker), which
+        the `products` indexes cover, so every page costs one indexed range read of
+        `limit + 1` documents whatever its depth and the catalog size. Only the
+        requested fields are read from the database.
 
         Args:
             db (AsyncIOMotorDatabase): The MongoDB database instance.
+            limit (int): The number of products per page.
+            cursor (Optional[str]): The cursor returned as `next_cursor` by the previous page.
+            sort (str): The sort key, "_id", "name" or "price", prefixed with "-" for
+                descending order.
+            fields (Optional[str]): Comma-separated fields to return, out of
+                `PRODUCT_FIELDS`; all of them when omitted.
 
         Returns:
-            List[ProductOut]: A list of all products.
+            ProductsOut: The page of products and the cursor of the next page.
+
+        Raises:
+            HTTPException: If a field is unknown or the cursor is invalid.
         """
-        products_cursor = db["products"].find()
+        direction = -1 if sort.startswith("-") else 1
+        sort_field = sort.lstrip("-")
+        requested = [field.strip() for field in fields.split(",") if field.strip()] if fields else list(PRODUCT_FIELDS)
+        unknown = [field for field in requested if field not in PRODUCT_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown product fields: {', '.join(unknown)}."
+            )
+
+        # The sort key is read even when not requested, to build the next cursor
+        projection = {field: 1 for field in requested}
+        if sort_field != "_id":
+            projection[sort_field] = 1
+        query = keyset_filter(decode_cursor(cursor, sort_field), direction) if cursor else {}
+        docs = await db["products"].find(query, projection).sort(
+            sort_keys(sort_field, direction)
+        ).limit(limit + 1).to_list(length=limit + 1)
+        has_more = len(docs) > limit
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], sort_field) if has_more else None
+
         products = []
-        async for product in products_cursor:
-            product_out = ProductOut(**product)
-            products.append(product_out)
-        return products
-    
+        for product in docs:
+            if sort_field not in requested:
+                product.pop(sort_field, None)
+            products.append(ProductListItem(**product))
+        return ProductsOut(products=products, limit=limit, next_cursor=next_cursor)
+
+    @staticmethod
+    async def search_products(
+        db: AsyncIOMotorDatabase,
+        q: str,
+        page: int = 1,
+        limit: int = 20,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None
+    ) -> ProductSearchOut:
+        """
+        Search the products by text, most relevant first.
+
+        The query is answered by the `text_search` index, whose weights rank matches in
+        the name above matches in the tags, and those above matches in the description.
+        The category and price filters are checked on the index's trailing keys. Results
+        are sorted by relevance, then `_id` so pages are stable, and paged by
+        `page`/`limit`; one extra document is read to tell whether more follow.
+
+        Args:
+            db (AsyncIOMotorDatabase): The MongoDB database instance.
+            q (str): The search terms, in MongoDB `$text` syntax ("quoted phrases",
+                -excluded terms).
+            page (int): The page number.
+            limit (int): The number of products per page.
+            category (Optional[str]): Only products of this category.
+            min_price (Optional[float]): Only products at least this expensive.
+            max_price (Optional[float]): Only products at most this expensive.
+
+        Returns:
+            ProductSearchOut: The page of matching products with their scores.
+        """
+        query = {"$text": {"$search": q}}
+        if category is not None:
+            query["category"] = category
+        if min_price is not None or max_price is not None:
+            query["price"] = {}
+            if min_price is not None:
+                query["price"]["$gte"] = min_price
+            if max_price is not None:
+                query["price"]["$lte"] = max_price
+
+        score = {"$meta": "textScore"}
+        projection = {field: 1 for field in PRODUCT_FIELDS}
+        projection["score"] = score
+        docs = await db["products"].find(query, projection).sort(
+            [("score", score), ("_id", 1)]
+        ).skip((page - 1) * limit).limit(limit + 1).to_list(length=limit + 1)
+        return ProductSearchOut(
+            products=[ProductSearchItem(**product) for product in docs[:limit]],
+            page=page,
+            limit=limit,
+            has_more=len(docs) > limit,
+        )
+
+    @staticmethod
+    async def export_products(db: AsyncIOMotorDatabase, format: str = "ndjson") -> AsyncIterator[str]:
+        """
+        Iterate over the whole product catalog serialized as NDJSON or CSV.
+
+        Products are read in `_id` order, `PRODUCT_EXPORT_BATCH_SIZE` documents per
+        round trip, and each batch is serialized straight from the raw documents into
+        one chunk, without building models, so memory stays constant whatever the
+        catalog size. In CSV, tags are joined with "|".
+
+        Args:
+            db (AsyncIOMotorDatabase): The MongoDB database instance.
+            format (str): The output format, "ndjson" or "csv".
+
+        Yields:
+            str: The CSV header, then one chunk of serialized products per batch.
+        """
+        columns = ["_id", *PRODUCT_FIELDS]
+        products = db["products"].find({}, {field: 1 for field in PRODUCT_FIELDS}).sort("_id", 1)
+        products = products.batch_size(PRODUCT_EXPORT_BATCH_SIZE)
+        if format == "csv":
+            yield ",".join(columns) + "\r\n"
+        try:
+            while True:
+                batch = await products.to_list(length=PRODUCT_EXPORT_BATCH_SIZE)
+                if not batch:
+                    return
+                for product in batch:
+                    product["_id"] = str(product["_id"])
+                if format == "csv":
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    writer.writerows(
+                        [
+                            "|".join(value) if isinstance(value, list) else value
+                            for value in map(product.get, columns)
+                        ]
+                        for product in batch
+                    )
+                    yield buffer.getvalue()
+                else:
+                    yield "".join(json.dumps(product, default=str) + "\n" for product in batch)
+        finally:
+            # A client disconnecting mid-export must not leave the server cursor open
+            await products.close()
+
     @staticmethod
     async def get_product(db: AsyncIOMotorDatabase, product_id: str) -> ProductOut:
         """
@@ -153,3 +312,44 @@ class ProductService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Product with ID '{product_id}' not found."
             )
+
+    @staticmethod
+    async def get_also_bought(db: AsyncIOMotorDatabase, product_id: str, limit: int = 10) -> AlsoBoughtOut:
+        """
+        Retrieve the items most often bought together with a product.
+
+        Recommendations are read from the precomputed, memory-mapped also-bought
+        index (see `app.core.also_bought`), keyed by the product's name; the only
+        database access is the product's name lookup.
+
+        Args:
+            db (AsyncIOMotorDatabase): The MongoDB database instance.
+            product_id (str): The unique identifier of the product.
+            limit (int): The maximum number of items to return.
+
+        Returns:
+            AlsoBoughtOut: The co-purchased items, best first; empty until the index
+            has been built.
+
+        Raises:
+            HTTPException: If the product ID format is invalid or the product is not found.
+        """
+        if not ObjectId.is_valid(product_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid product ID format."
+            )
+        product = await db["products"].find_one({"_id": ObjectId(product_id)}, {"name": 1})
+        if not product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Product with ID '{product_id}' not found."
+            )
+        return AlsoBoughtOut(
+            product_id=product_id,
+            name=product["name"],
+            items=[
+                AlsoBoughtItem(name=name, score=round(score, 4))
+                for name, score in also_bought.neighbours(product["name"], limit)
+            ],
+        )
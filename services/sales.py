@@ -7,9 +7,55 @@ transactions, and adding new goods to the database. It interacts with the databa
 perform CRUD operations on sales and goods data.
 """
 
-from motor.motor_asyncio import AsyncIOMotorDatabase
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorDatabase
 from fastapi import HTTPException, status
-from app.schemas.sales import SaleRequest, SaleResponse, AddGoodRequest
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import OperationFailure, PyMongoError
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.leaderboard import top_sellers
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter, merge_filters, sort_keys
+from app.core.stock_gate import stock_gate
+from app.db.rollups import SALES_DAILY_COLLECTION, rollup_update, sales_day, sales_rollups
+from app.db.write_buffer import purchase_writes
+from app.schemas.sales import (
+    SaleRequest, SaleResponse, AddGoodRequest, OrderRequest, OrderResponse,
+    Purchase, PurchasesOut, PurchaseSummary, PurchaseSummaryItem, GoodRevenue, RevenueReport,
+    TopSeller, TopSellersOut
+)
+
+logger = logging.getLogger(__name__)
+
+# Server error code for "Transaction numbers are only allowed on a replica set member or mongos"
+ILLEGAL_OPERATION = 20
+
+# Whether the connected deployment supports transactions; None until the first sale finds out
+_transactions_supported: Optional[bool] = None
+
+# `_id`, price and slot count of goods whose stock is split across `stock_slots`
+# documents, keyed by name, so sales of a hot good go straight to its slots
+sharded_goods = TTLCache(maxsize=1000, ttl=settings.STOCK_SLOT_CACHE_SECONDS)
+
+# Catalog entries (`_id`, name, price, description, stock slots and stock count) keyed
+# by name, so storefront reads of a good are served from memory; see `get_good_details`
+goods_cache = TTLCache(maxsize=settings.GOODS_CACHE_MAX_SIZE, ttl=settings.GOODS_CACHE_TTL_SECONDS)
+
+# Pages of the goods listing keyed by (name the page starts after, limit)
+goods_pages = TTLCache(maxsize=256, ttl=settings.GOODS_LISTING_CACHE_SECONDS)
+
+# Units taken by a sale, as (collection, document `_id`, quantity), for compensation
+TakenStock = List[Tuple[str, ObjectId, int]]
+
+# Documents per batch when the whole catalog is streamed
+GOODS_STREAM_BATCH_SIZE = 1000
 
 
 class SalesService:
@@ -18,24 +64,124 @@ class SalesService:
     """
 
     @staticmethod
-    async def get_goods(db: AsyncIOMotorDatabase):
+    async def get_goods(
+        db: AsyncIOMotorDatabase, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
         """
-        Fetch all available goods that are in stock.
+        Fetch one page of the goods that are in stock, ordered by name.
+
+        Pages are cached for `GOODS_LISTING_CACHE_SECONDS`; adding a good, moving its
+        stock and seeing a good sell out clear the cached pages of this worker.
 
         Args:
             db (AsyncIOMotorDatabase): The MongoDB database instance.
+            limit (int): The maximum number of goods to return.
+            cursor (Optional[str]): The cursor returned with the previous page.
 
         Returns:
-            list: A list of dictionaries containing good names and prices.
+            Tuple[List[dict], Optional[str]]: The goods' names and prices, and the
+            cursor of the next page (None on the last page).
+
+        Raises:
+            HTTPException: If the cursor is invalid.
+        """
+        after = SalesService.goods_cursor_name(cursor)
+        page = goods_pages.get((after, limit))
+        if page is None:
+            goods = [good async for good in SalesService.iter_goods(db, after, limit=limit + 1)]
+            next_cursor = None
+            if len(goods) > limit:
+                goods = goods[:limit]
+                next_cursor = encode_cursor(goods[-1], "name", unique=True)
+            page = (goods, next_cursor)
+            goods_pages.set((after, limit), page)
+        return page
+
+    @staticmethod
+    def goods_cursor_name(cursor: Optional[str]) -> Optional[str]:
+        """
+        Decode a goods listing cursor into the name the next page starts after.
+
+        Raises:
+            HTTPException: If the cursor is invalid.
+        """
+        if cursor is None:
+            return None
+        return decode_cursor(cursor, "name")["v"]
+
+    @staticmethod
+    async def iter_goods(
+        db: AsyncIOMotorDatabase, after: Optional[str] = None, limit: Optional[int] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Iterate over the in-stock goods in name order, as `{name, price}` documents.
+
+        The query matches the `in_stock_name_price` partial index's filter and projects
+        only the indexed fields, so it is answered from the index. Goods with stock
+        slots are not in that index; the few of them that hold stock are merged in.
+        Without a `limit` the whole catalog is read in batches at constant memory.
+
+        Args:
+            db (AsyncIOMotorDatabase): The MongoDB database instance.
+            after (Optional[str]): Only goods whose name sorts after this one.
+            limit (Optional[int]): The maximum number of goods to yield.
+
+        Yields:
+            dict: The name and price of each good.
         """
-        goods = await db["goods"].find({"count": {"$gt": 0}}).to_list(length=100)
-        return [{"name": good["name"], "price": good["price"]} for good in goods]
+        query = {"count": {"$gt": 0}}
+        if after is not None:
+            query["name"] = {"$gt": after}
+        goods = db["goods"].find(query, {"_id": 0, "name": 1, "price": 1}).sort("name", 1)
+        goods = goods.limit(limit) if limit is not None else goods.batch_size(GOODS_STREAM_BATCH_SIZE)
+        sharded = await SalesService._sharded_in_stock(db, after)
+
+        yielded = 0
+        try:
+            async for good in goods:
+                while sharded and sharded[0]["name"] < good["name"]:
+                    yield sharded.pop(0)
+                    yielded += 1
+                    if yielded == limit:
+                        return
+                yield good
+                yielded += 1
+                if yielded == limit:
+                    return
+        finally:
+            # A client disconnecting mid-stream must not leave the server cursor open
+            await goods.close()
+        for good in sharded[:None if limit is None else limit - yielded]:
+            yield good
+
+    @staticmethod
+    async def _sharded_in_stock(db: AsyncIOMotorDatabase, after: Optional[str] = None) -> List[dict]:
+        """
+        Return the goods with stock slots that hold stock, as `{name, price}` in name order.
+        """
+        query = {"stock_slots": {"$exists": True}}
+        if after is not None:
+            query["name"] = {"$gt": after}
+        goods = await db["goods"].find(query, {"name": 1, "price": 1}).sort("name", 1).to_list(length=None)
+        if not goods:
+            return []
+        counts = await SalesService._slot_counts(db, [good["_id"] for good in goods])
+        return [
+            {"name": good["name"], "price": good["price"]}
+            for good in goods if counts.get(good["_id"], 0) > 0
+        ]
 
     @staticmethod
     async def get_good_details(db: AsyncIOMotorDatabase, good_name: str):
         """
         Retrieve detailed information about a specific good.
 
+        Goods are read through `goods_cache`. A cached good is returned without any
+        database access while its count is younger than `GOODS_CACHE_COUNT_SECONDS`;
+        after that only its count (and stock slot setting) is read again. Sales made
+        by this worker are applied to the cached count as they complete, so the count
+        only lags sales made by other workers, and by at most that interval.
+
         Args:
             db (AsyncIOMotorDatabase): The MongoDB database instance.
             good_name (str): The name of the good.
@@ -46,23 +192,165 @@ class SalesService:
         Raises:
             HTTPException: If the good is not found.
         """
-        good = await db["goods"].find_one({"name": good_name})
+        entry = goods_cache.get(good_name)
+        if entry is not None and time.monotonic() - entry["checked_at"] < settings.GOODS_CACHE_COUNT_SECONDS:
+            return SalesService._good_details(entry)
+
+        if entry is None:
+            good = await db["goods"].find_one({"name": good_name})
+        else:
+            good = await db["goods"].find_one({"_id": entry["_id"]}, {"count": 1, "stock_slots": 1})
+            if not good or good.get("stock_slots") != entry["stock_slots"]:
+                # Deleted or resharded by another worker; load the good afresh
+                goods_cache.pop(good_name)
+                return await SalesService.get_good_details(db, good_name)
         if not good:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Good not found"
             )
+        count = good["count"]
+        if good.get("stock_slots"):
+            count = (await SalesService._slot_counts(db, [good["_id"]])).get(good["_id"], 0)
+        if entry is None:
+            # Concurrent readers use the entry as soon as it is cached, so it is only
+            # cached once complete
+            entry = {
+                "_id": good["_id"],
+                "name": good["name"],
+                "price": good["price"],
+                "description": good.get("description", ""),
+                "stock_slots": good.get("stock_slots"),
+                "count": count,
+                "checked_at": time.monotonic(),
+            }
+            goods_cache.set(good_name, entry)
+        SalesService._record_stock(good_name, count, entry)
+        return SalesService._good_details(entry)
+
+    @staticmethod
+    def _good_details(entry: dict) -> dict:
+        """
+        Build the public details of a good from its `goods_cache` entry.
+        """
         return {
-            "name": good["name"],
-            "price": good["price"],
-            "description": good.get("description", ""),
-            "count": good["count"],
+            "name": entry["name"],
+            "price": entry["price"],
+            "description": entry["description"],
+            "count": entry["count"],
+            "stock_slots": entry["stock_slots"],
         }
 
+    @staticmethod
+    def _record_stock(good_name: str, remaining: int, entry: Optional[dict] = None) -> None:
+        """
+        Record the stock of a good as read from or written to the database.
+
+        Updates the stock gate and the cached count, and clears the cached listing
+        pages when the good is newly seen to be sold out.
+        """
+        stock_gate.observe(good_name, remaining)
+        entry = entry or goods_cache.peek(good_name)
+        if remaining <= 0 and (entry is None or entry.get("count", 0) > 0):
+            goods_pages.clear()
+        if entry is not None:
+            entry["count"] = max(remaining, 0)
+            entry["checked_at"] = time.monotonic()
+
+    @staticmethod
+    def _record_sold(good_name: str, units: int) -> None:
+        """
+        Account for units of a good sold by this worker.
+
+        The cached count is decremented without marking it fresh, so it is still
+        re-read once `GOODS_CACHE_COUNT_SECONDS` have passed since the last read.
+        The units are also added to the top-seller rankings.
+        """
+        stock_gate.take(good_name, units)
+        top_sellers.add(good_name, units)
+        entry = goods_cache.peek(good_name)
+        if entry is not None and entry["count"] > 0:
+            entry["count"] = max(entry["count"] - units, 0)
+            if entry["count"] == 0:
+                goods_pages.clear()
+
+    @staticmethod
+    async def _slot_counts(db: AsyncIOMotorDatabase, good_ids: List[ObjectId]) -> Dict[ObjectId, int]:
+        """
+        Sum the stock slots of the given goods in one aggregation.
+        """
+        pipeline = [
+            {"$match": {"good_id": {"$in": good_ids}}},
+            {"$group": {"_id": "$good_id", "count": {"$sum": "$count"}}},
+        ]
+        return {row["_id"]: row["count"] async for row in db["stock_slots"].aggregate(pipeline)}
+
+    @staticmethod
+    async def set_stock_slots(db: AsyncIOMotorDatabase, good_name: str, slots: int) -> dict:
+        """
+        Split a good's stock across `slots` slot documents, or merge it back with `slots=1`.
+
+        Every sale of a good decrements the same document, so a hot good's throughput is
+        bounded by that document's write lock. With stock slots, each sale decrements a
+        randomly chosen slot instead. The stock is moved with atomic per-document
+        updates; sales of the good may see it as out of stock while it moves. Not safe
+        to run concurrently for the same good.
+
+        Args:
+            db (AsyncIOMotorDatabase): The MongoDB database instance.
+            good_name (str): The name of the good.
+            slots (int): The number of slots to split the stock across; 1 disables slots.
+
+        Returns:
+            dict: The good's details with its total count.
+
+        Raises:
+            HTTPException: If the good is not found.
+        """
+        update = {"$set": {"count": 0, "stock_slots": slots}} if slots > 1 else {"$set": {"count": 0}, "$unset": {"stock_slots": ""}}
+        good = await db["goods"].find_one_and_update({"name": good_name}, update, projection={"count": 1})
+        if not good:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Good not found"
+            )
+        total = good["count"]
+        while True:
+            slot = await db["stock_slots"].find_one_and_delete({"good_id": good["_id"]}, projection={"count": 1})
+            if slot is None:
+                break
+            total += slot["count"]
+        sharded_goods.pop(good_name)
+        goods_cache.pop(good_name)
+        goods_pages.clear()
+
+        if slots > 1:
+            base, extra = divmod(total, slots)
+            await db["stock_slots"].insert_many([
+                {"good_id": good["_id"], "slot": i, "count": base + (1 if i < extra else 0)}
+                for i in range(slots)
+            ])
+        else:
+            await db["goods"].update_one({"_id": good["_id"]}, {"$inc": {"count": total}})
+        return await SalesService.get_good_details(db, good_name)
+
     @staticmethod
     async def process_sale(db: AsyncIOMotorDatabase, sale_request: SaleRequest) -> SaleResponse:
         """
         Process a sale transaction if conditions are met.
 
+        Stock and balance are taken with conditional atomic updates (`count > 0`,
+        `balance >= price`), so concurrent purchases can neither oversell a good nor
+        overdraw a wallet. On a replica set the updates are committed in one
+        multi-document transaction; on a standalone server the completed steps are
+        compensated when a later step fails.
+
+        The purchase record is written according to `PURCHASE_WRITE_MODE`: inside the
+        sale ("inline"), or after it through the `purchase_writes` group-commit buffer,
+        either waiting for its batch to be flushed ("flush") or not ("async"). The sale
+        is then added to the `sales_daily` rollups according to `SALES_ROLLUP_MODE`.
+
+        Goods this worker has seen sell out are rejected by the stock gate without
+        any database access.
+
         Args:
             db (AsyncIOMotorDatabase): The MongoDB database instance.
             sale_request (SaleRequest): The sale request data.
@@ -72,50 +360,407 @@ class SalesService:
 
         Raises:
             HTTPException: If the good is not available, the user is not found,
-                           insufficient balance, or the good is out of stock.
+                           insufficient balance, or the good is out of stock; or, in
+                           "flush" mode, if the purchase record could not be written.
         """
-        # Fetch good details
-        good = await db["goods"].find_one({"name": sale_request.good_name})
-        if not good:
+        if stock_gate.is_sold_out(sale_request.good_name):
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Good not available"
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Good is out of stock"
             )
 
-        # Fetch user wallet
-        user = await db["users"].find_one({"username": sale_request.username})
-        if not user or user["wallet"]["balance"] < good["price"]:
+        user = await db["users"].find_one({"username": sale_request.username}, {"_id": 1})
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Insufficient balance or user not found",
             )
+        user_id = str(user["_id"])
+
+        response, purchase = await SalesService._run_atomically(
+            db, lambda session: SalesService._apply_sale(db, user_id, sale_request, session=session)
+        )
+        SalesService._record_sold(sale_request.good_name, 1)
+        if settings.PURCHASE_WRITE_MODE != "inline":
+            flushed = purchase_writes.add(db, purchase)
+            if settings.PURCHASE_WRITE_MODE == "flush":
+                try:
+                    await flushed
+                except Exception as e:
+                    # The sale is committed and cannot be undone here; the record is in the dead-letter file
+                    logger.error(
+                        f"Sale of '{sale_request.good_name}' to '{sale_request.username}' committed, but its "
+                        f"purchase record {purchase['_id']} was not written: {e}"
+                    )
+                    raise HTTPException(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        detail="The sale was completed, but its purchase record could not be saved",
+                    )
+        await SalesService._roll_up(db, [(sale_request.good_name, 1, purchase["price"])])
+        return response
+
+    @staticmethod
+    async def _roll_up(db: AsyncIOMotorDatabase, lines: List[Tuple[str, int, float]]) -> None:
+        """
+        Add committed sales, as (good name, units, revenue) lines, to the `sales_daily`
+        rollups according to `SALES_ROLLUP_MODE`.
+        """
+        if settings.SALES_ROLLUP_MODE == "buffered":
+            for good_name, units, revenue in lines:
+                sales_rollups.add(db, good_name, units, revenue)
+        elif settings.SALES_ROLLUP_MODE == "inline":
+            day = sales_day()
+            try:
+                await db[SALES_DAILY_COLLECTION].bulk_write(
+                    [rollup_update(good_name, day, units, revenue) for good_name, units, revenue in lines],
+                    ordered=False,
+                )
+            except PyMongoError as e:
+                # The sale is committed; `python -m app.db.rollups backfill` repairs the rollups
+                logger.error(f"Failed to update {SALES_DAILY_COLLECTION}: {e}")
+
+    @staticmethod
+    async def _run_atomically(db: AsyncIOMotorDatabase, operation: Callable[[Optional[AsyncIOMotorClientSession]], Awaitable]):
+        """
+        Run `operation(session)` in a transaction, or with `session=None` when the
+        server does not support transactions.
+
+        Operations called without a session must compensate their own partial writes.
+        """
+        global _transactions_supported
+
+        if settings.SALES_USE_TRANSACTIONS and _transactions_supported is not False:
+            try:
+                async with await db.client.start_session() as session:
+                    # with_transaction retries transient errors such as write conflicts
+                    # on a contended good.
+                    response = await session.with_transaction(operation)
+                _transactions_supported = True
+                return response
+            except OperationFailure as e:
+                if e.code != ILLEGAL_OPERATION:
+                    raise
+                logger.warning("Transactions are not supported by the server; using compensation for sales.")
+                _transactions_supported = False
+
+        return await operation(None)
+
+    @staticmethod
+    async def _apply_sale(
+        db: AsyncIOMotorDatabase,
+        user_id: str,
+        sale_request: SaleRequest,
+        session: Optional[AsyncIOMotorClientSession] = None,
+    ) -> Tuple[SaleResponse, dict]:
+        """
+        Take one unit of stock, charge the wallet and, in "inline" mode, record the purchase.
+
+        Without a session every completed step is undone if a later one fails.
+
+        Returns:
+            Tuple[SaleResponse, dict]: The response, and the purchase record, still to
+            be buffered once the sale is committed unless it was written "inline".
+        """
+        price, taken = await SalesService._take_stock(db, sale_request.good_name, session)
+
+        try:
+            wallet = await db["wallets"].find_one_and_update(
+                {"user_id": user_id, "balance": {"$gte": price}},
+                {"$inc": {"balance": -price}},
+                projection={"balance": 1},
+                return_document=ReturnDocument.AFTER,
+                session=session,
+            )
+            if not wallet:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Insufficient balance or user not found",
+                )
+
+            purchase = {
+                "username": sale_request.username,
+                "good_name": sale_request.good_name,
+                "price": price,
+            }
+            if settings.PURCHASE_WRITE_MODE == "inline":
+                try:
+                    await db["purchases"].insert_one(purchase, session=session)
+                except Exception:
+                    if session is None:
+                        await db["wallets"].update_one({"user_id": user_id}, {"$inc": {"balance": price}})
+                    raise
+        except Exception:
+            if session is None:
+                await SalesService._restore_stock(db, taken)
+            raise
+
+        return SaleResponse(
+            message="Purchase successful",
+            remaining_balance=wallet["balance"],
+            purchased_item=sale_request.good_name,
+        ), purchase
+
+    @staticmethod
+    async def _take_stock(
+        db: AsyncIOMotorDatabase,
+        good_name: str,
+        session: Optional[AsyncIOMotorClientSession] = None,
+    ) -> Tuple[float, TakenStock]:
+        """
+        Take one unit of a good from its `goods` document or, if it has stock slots,
+        from one of its slots.
+
+        Returns:
+            Tuple[float, TakenStock]: The good's price and the units taken.
+
+        Raises:
+            HTTPException: If the good is not found or is out of stock.
+        """
+        good = sharded_goods.get(good_name)
+        if good is None:
+            good = await db["goods"].find_one_and_update(
+                {"name": good_name, "count": {"$gt": 0}},
+                {"$inc": {"count": -1}},
+                projection={"price": 1},
+                session=session,
+            )
+            if good:
+                return good["price"], [("goods", good["_id"], 1)]
+
+            good = await db["goods"].find_one(
+                {"name": good_name}, {"name": 1, "price": 1, "stock_slots": 1}, session=session
+            )
+            if not good:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND, detail="Good not available"
+                )
+            if not good.get("stock_slots"):
+                SalesService._record_stock(good_name, 0)
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="Good is out of stock"
+                )
+            sharded_goods.set(good_name, good)
 
-        # Check if good is in stock
-        if good["count"] <= 0:
+        return good["price"], await SalesService._take_slot_stock(db, good, 1, session)
+
+    @staticmethod
+    async def _take_slot_stock(
+        db: AsyncIOMotorDatabase,
+        good: dict,
+        quantity: int,
+        session: Optional[AsyncIOMotorClientSession] = None,
+    ) -> TakenStock:
+        """
+        Take `quantity` units of a good from its stock slots.
+
+        Starts at a random slot so concurrent sales spread over the slots, and falls
+        back to any slot that still holds stock. Each update takes as many units as
+        the slot holds, up to what is still needed.
+
+        Raises:
+            HTTPException: If the slots together hold less than `quantity`. Without a
+                           session, the units already taken are given back first.
+        """
+        taken = []
+        remaining = quantity
+        query = {"good_id": good["_id"], "slot": random.randrange(good["stock_slots"]), "count": {"$gt": 0}}
+        while remaining:
+            slot = await db["stock_slots"].find_one_and_update(
+                query,
+                [{"$set": {"count": {"$max": [0, {"$subtract": ["$count", remaining]}]}}}],
+                projection={"count": 1},
+                session=session,
+            )
+            if slot is None and "slot" not in query:
+                break
+            query = {"good_id": good["_id"], "count": {"$gt": 0}}
+            if slot is not None:
+                units = min(slot["count"], remaining)
+                taken.append(("stock_slots", slot["_id"], units))
+                remaining -= units
+
+        if remaining:
+            if not taken:
+                SalesService._record_stock(good["name"], 0)
+            if session is None:
+                await SalesService._restore_stock(db, taken)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Good is out of stock"
             )
+        return taken
+
+    @staticmethod
+    async def _restore_stock(db: AsyncIOMotorDatabase, taken: TakenStock) -> None:
+        """
+        Give back units taken by a sale that could not be completed.
+        """
+        for collection, document_id, quantity in taken:
+            await db[collection].update_one({"_id": document_id}, {"$inc": {"count": quantity}})
+
+    @staticmethod
+    async def place_order(db: AsyncIOMotorDatabase, order: OrderRequest) -> OrderResponse:
+        """
+        Place an order for several goods and quantities in one request.
+
+        All stock is decremented in a single unordered `bulk_write` of conditional
+        updates (`count >= quantity`), the wallet is charged once for the order total
+        and a single order document is written. Like `process_sale`, the writes are
+        committed in one transaction when the server supports it and compensated
+        otherwise.
+
+        Args:
+            db (AsyncIOMotorDatabase): The MongoDB database instance.
+            order (OrderRequest): The order data.
+
+        Returns:
+            OrderResponse: A Pydantic model containing the order details.
+
+        Raises:
+            HTTPException: If a good is not available, the user is not found, any good
+                           is short of stock, or the balance does not cover the total.
+        """
+        quantities = {}
+        for item in order.items:
+            quantities[item.good_name] = quantities.get(item.good_name, 0) + item.quantity
+        if any(stock_gate.is_sold_out(name) for name in quantities):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="One or more goods are out of stock",
+            )
 
-        # Deduct price from wallet and reduce stock
-        new_balance = user["wallet"]["balance"] - good["price"]
-        await db["users"].update_one(
-            {"username": sale_request.username}, {"$set": {"wallet.balance": new_balance}}
+        user, goods = await asyncio.gather(
+            db["users"].find_one({"username": order.username}, {"_id": 1}),
+            db["goods"].find(
+                {"name": {"$in": list(quantities)}}, {"name": 1, "price": 1, "stock_slots": 1}
+            ).to_list(length=None),
         )
-        await db["goods"].update_one(
-            {"name": sale_request.good_name}, {"$inc": {"count": -1}}
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient balance or user not found",
+            )
+        prices = {good["name"]: good["price"] for good in goods}
+        sharded = {good["name"]: good for good in goods if good.get("stock_slots")}
+        missing = [name for name in quantities if name not in prices]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Goods not available: {', '.join(missing)}",
+            )
+        user_id = str(user["_id"])
+
+        response = await SalesService._run_atomically(
+            db,
+            lambda session: SalesService._apply_order(
+                db, user_id, order.username, quantities, prices, sharded, session=session
+            ),
+        )
+        for name, quantity in quantities.items():
+            SalesService._record_sold(name, quantity)
+        await SalesService._roll_up(
+            db, [(line.good_name, line.quantity, line.price * line.quantity) for line in response.items]
         )
+        return response
 
-        # Save purchase history
-        purchase = {
-            "username": sale_request.username,
-            "good_name": sale_request.good_name,
-            "price": good["price"],
-        }
-        await db["purchases"].insert_one(purchase)
+    @staticmethod
+    async def _apply_order(
+        db: AsyncIOMotorDatabase,
+        user_id: str,
+        username: str,
+        quantities: Dict[str, int],
+        prices: Dict[str, float],
+        sharded: Dict[str, dict],
+        session: Optional[AsyncIOMotorClientSession] = None,
+    ) -> OrderResponse:
+        """
+        Take the stock for every line, charge the order total and record the order.
 
-        return SaleResponse(
-            message="Purchase successful",
-            remaining_balance=new_balance,
-            purchased_item=sale_request.good_name,
+        Without a session, each stock update tags the good with the order id so that
+        exactly the lines that were taken can be given back if a later step fails.
+        Lines of goods with stock slots are taken from the slots.
+        """
+        order_id = ObjectId()
+        plain = {name: quantity for name, quantity in quantities.items() if name not in sharded}
+        hold = {} if session else {"$addToSet": {"order_holds": order_id}}
+        taken = []
+
+        try:
+            if plain:
+                result = await db["goods"].bulk_write(
+                    [
+                        UpdateOne({"name": name, "count": {"$gte": quantity}}, {"$inc": {"count": -quantity}, **hold})
+                        for name, quantity in plain.items()
+                    ],
+                    ordered=False,
+                    session=session,
+                )
+                if result.modified_count < len(plain):
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="One or more goods are out of stock",
+                    )
+            for name, good in sharded.items():
+                taken += await SalesService._take_slot_stock(db, good, quantities[name], session)
+
+            total = sum(prices[name] * quantity for name, quantity in quantities.items())
+            wallet = await db["wallets"].find_one_and_update(
+                {"user_id": user_id, "balance": {"$gte": total}},
+                {"$inc": {"balance": -total}},
+                projection={"balance": 1},
+                return_document=ReturnDocument.AFTER,
+                session=session,
+            )
+            if not wallet:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Insufficient balance or user not found",
+                )
+
+            lines = [
+                {"good_name": name, "quantity": quantity, "price": prices[name]}
+                for name, quantity in quantities.items()
+            ]
+            try:
+                await db["orders"].insert_one(
+                    {
+                        "_id": order_id,
+                        "username": username,
+                        "user_id": user_id,
+                        "items": lines,
+                        "total": total,
+                    },
+                    session=session,
+                )
+            except Exception:
+                if session is None:
+                    await db["wallets"].update_one({"user_id": user_id}, {"$inc": {"balance": total}})
+                raise
+        except Exception:
+            if session is None:
+                if plain:
+                    await db["goods"].bulk_write(
+                        [
+                            UpdateOne(
+                                {"name": name, "order_holds": order_id},
+                                {"$inc": {"count": quantity}, "$pull": {"order_holds": order_id}},
+                            )
+                            for name, quantity in plain.items()
+                        ],
+                        ordered=False,
+                    )
+                await SalesService._restore_stock(db, taken)
+            raise
+
+        if session is None and plain:
+            await db["goods"].update_many(
+                {"name": {"$in": list(plain)}}, {"$pull": {"order_holds": order_id}}
+            )
+
+        return OrderResponse(
+            message="Order placed successfully",
+            order_id=str(order_id),
+            items=lines,
+            total=total,
+            remaining_balance=wallet["balance"],
         )
 
     @staticmethod
@@ -146,3 +791,189 @@ class SalesService:
             "description": good.description
         }
         await db["goods"].insert_one(new_good)
+        goods_cache.pop(good.name)
+        goods_pages.clear()
+        stock_gate.observe(good.name, good.count)
+
+    @staticmethod
+    def _purchase_filter(
+        username: Optional[str] = None,
+        good_name: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> dict:
+        """
+        Build the `purchases` filter for the history and summary endpoints.
+
+        Purchases carry no timestamp field: the time range is applied to `_id`, whose
+        leading bytes are the creation time, so it narrows the `username_id` index scan.
+        """
+        query = {}
+        if username is not None:
+            query["username"] = username
+        if good_name is not None:
+            query["good_name"] = good_name
+        if since is not None or until is not None:
+            query["_id"] = {}
+            if since is not None:
+                query["_id"]["$gte"] = ObjectId.from_datetime(since)
+            if until is not None:
+                query["_id"]["$lt"] = ObjectId.from_datetime(until)
+        return query
+
+    @staticmethod
+    async def get_purchases(
+        db: AsyncIOMotorDatabase,
+        username: Optional[str] = None,
+        good_name: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> PurchasesOut:
+        """
+        Fetch one page of purchase history, ordered by username and newest first.
+
+        Pages are read with a keyset range query over the `username_id` index, so
+        their cost does not depend on how deep the page is. For a single user the
+        cursor is the last purchase's `_id`; across users it is (username, `_id`).
+
+        Args:
+            db (AsyncIOMotorDatabase): The MongoDB database instance.
+            username (Optional[str]): Only purchases made by this user.
+            good_name (Optional[str]): Only purchases of this good.
+            since (Optional[datetime]): Only purchases made at or after this time.
+            until (Optional[datetime]): Only purchases made before this time.
+            limit (int): The number of purchases per page.
+            cursor (Optional[str]): The cursor returned as `next_cursor` by the previous page.
+
+        Returns:
+            PurchasesOut: The page of purchases and the cursor of the next one.
+
+        Raises:
+            HTTPException: If the cursor is invalid.
+        """
+        query = SalesService._purchase_filter(username, good_name, since, until)
+        # A single user's purchases are ordered by `_id` alone, newest first
+        cursor_field, direction = ("_id", -1) if username is not None else ("username", 1)
+        if cursor:
+            after = keyset_filter(decode_cursor(cursor, cursor_field), direction, tie_direction=-1)
+            query = merge_filters(query, after)
+
+        docs = await db["purchases"].find(query).sort(
+            sort_keys("username", 1, tie_direction=-1)
+        ).limit(limit + 1).to_list(length=limit + 1)
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1], cursor_field)
+
+        return PurchasesOut(
+            purchases=[
+                Purchase(
+                    id=str(doc["_id"]),
+                    username=doc["username"],
+                    good_name=doc["good_name"],
+                    price=doc["price"],
+                    purchased_at=doc["_id"].generation_time.replace(tzinfo=None),
+                )
+                for doc in docs
+            ],
+            next_cursor=next_cursor,
+        )
+
+    @staticmethod
+    async def get_purchase_summary(
+        db: AsyncIOMotorDatabase,
+        username: str,
+        good_name: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> PurchaseSummary:
+        """
+        Summarize a user's purchases with one aggregation grouped by good.
+
+        Args:
+            db (AsyncIOMotorDatabase): The MongoDB database instance.
+            username (str): The name of the user.
+            good_name (Optional[str]): Only purchases of this good.
+            since (Optional[datetime]): Only purchases made at or after this time.
+            until (Optional[datetime]): Only purchases made before this time.
+
+        Returns:
+            PurchaseSummary: The number of purchases, the total spent and the units and
+            amount per good.
+        """
+        pipeline = [
+            {"$match": SalesService._purchase_filter(username, good_name, since, until)},
+            {"$group": {"_id": "$good_name", "count": {"$sum": 1}, "spent": {"$sum": "$price"}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ]
+        items = [
+            PurchaseSummaryItem(good_name=row["_id"], count=row["count"], spent=round(row["spent"], 2))
+            async for row in db["purchases"].aggregate(pipeline)
+        ]
+        return PurchaseSummary(
+            username=username,
+            purchases=sum(item.count for item in items),
+            total_spent=round(sum(item.spent for item in items), 2),
+            items=items,
+        )
+
+    @staticmethod
+    async def get_revenue_report(
+        db: AsyncIOMotorDatabase, days: int = 90, good_name: Optional[str] = None
+    ) -> RevenueReport:
+        """
+        Report the units sold and revenue per good over the last `days` days.
+
+        Reads the `sales_daily` rollups, one document per good and day, through the
+        `day_good_name` index, so the cost depends on the days and goods covered
+        rather than on the number of sales. Buffered rollups lag completed sales by
+        up to `SALES_ROLLUP_INTERVAL_MS`.
+
+        Args:
+            db (AsyncIOMotorDatabase): The MongoDB database instance.
+            days (int): The number of days to cover, up to and including today (UTC).
+            good_name (Optional[str]): Only report this good.
+
+        Returns:
+            RevenueReport: The units and revenue per good, highest revenue first.
+        """
+        since = sales_day() - timedelta(days=days - 1)
+        match = {"day": {"$gte": since}}
+        if good_name is not None:
+            match["good_name"] = good_name
+        pipeline = [
+            {"$match": match},
+            {"$group": {"_id": "$good_name", "units": {"$sum": "$units"}, "revenue": {"$sum": "$revenue"}}},
+            {"$sort": {"revenue": -1, "_id": 1}},
+        ]
+        goods = [
+            GoodRevenue(good_name=row["_id"], units=row["units"], revenue=round(row["revenue"], 2))
+            async for row in db[SALES_DAILY_COLLECTION].aggregate(pipeline)
+        ]
+        return RevenueReport(
+            since=since,
+            days=days,
+            units=sum(good.units for good in goods),
+            revenue=round(sum(good.revenue for good in goods), 2),
+            goods=goods,
+        )
+
+    @staticmethod
+    def get_top_sellers(window: str, n: int) -> TopSellersOut:
+        """
+        Return the best-selling goods over a sliding window, from memory.
+
+        Args:
+            window (str): The window, a key of `TOP_SELLER_WINDOWS` ("1h", "24h" or "7d").
+            n (int): The number of goods to return.
+
+        Returns:
+            TopSellersOut: The goods with the most units sold in the window, most sold first.
+        """
+        return TopSellersOut(
+            window=window,
+            goods=[TopSeller(good_name=name, units=units) for name, units in top_sellers.top(window, n)],
+        )
@@ -9,10 +9,12 @@ database to perform CRUD operations on user and wallet data.
 
 from app.schemas.users import UserCreate, UserOut, UserUpdate, UserOutDelete, Wallet, UsersOut
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 from bson import ObjectId
 from fastapi import HTTPException, status
 from typing import List, Optional
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async, invalidate_principal, revoke_tokens, REVOKED_TOKEN_VERSION
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter, merge_filters, sort_keys
 
 
 class UserService:
@@ -49,7 +51,7 @@ class UserService:
             )
         
         # Hash the password
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash_async(user_data.password)
         
         # Prepare the user document
         user_dict = user_data.dict(exclude_unset=True)
@@ -95,48 +97,108 @@ class UserService:
             )
 
     @staticmethod
-    async def get_all_users(db: AsyncIOMotorDatabase, page: int, limit: int, search: str, role: str) -> UsersOut:
+    async def get_all_users(
+        db: AsyncIOMotorDatabase,
+        page: int,
+        limit: int,
+        search: str,
+        role: str,
+        cursor: Optional[str] = None,
+        sort: str = "_id"
+    ) -> UsersOut:
         """
         Retrieve all users with pagination and optional filtering.
 
+        Two pagination modes are supported. Without a cursor the listing is paged by
+        `page`/`limit` and the total is returned. With a cursor (taken from a previous
+        response's `next_cursor`) the next page is read with an indexed range query on
+        the sort key, so its cost does not depend on how deep the page is; the total
+        is omitted in that mode.
+
         Args:
             db (AsyncIOMotorDatabase): The MongoDB database instance.
-            page (int): The current page number.
+            page (int): The current page number. Ignored when `cursor` is given.
             limit (int): The number of users per page.
             search (str): The search query to filter users by username.
             role (str): The role to filter users by (e.g., "admin", "user").
+            cursor (Optional[str]): The opaque cursor of the previous page.
+            sort (str): The sort key, either "_id" or "username".
 
         Returns:
             UsersOut: A paginated list of users.
 
         Raises:
-            HTTPException: If any database operation fails.
+            HTTPException: If the cursor is invalid or any database operation fails.
         """
-        skip = (page - 1) * limit
         query = {}
         if search:
             query["username"] = {"$regex": search, "$options": "i"}  # Case-insensitive search
         if role:
             query["role"] = role
-        
-        cursor = db["users"].find(query).skip(skip).limit(limit)
+
+        sort_stage = {"$sort": dict(sort_keys(sort))}
+        wallet_stages = [
+            {"$addFields": {"_user_id": {"$toString": "$_id"}}},
+            {"$lookup": {
+                "from": "wallets",
+                "localField": "_user_id",
+                "foreignField": "user_id",
+                "as": "wallets",
+            }},
+        ]
+
+        if cursor:
+            # Keyset mode: seek past the last seen key and read one extra document
+            # to find out whether another page follows.
+            after = keyset_filter(decode_cursor(cursor, sort))
+            pipeline = [
+                {"$match": merge_filters(query, after)},
+                sort_stage,
+                {"$limit": limit + 1},
+                *wallet_stages,
+            ]
+            docs = await db["users"].aggregate(pipeline).to_list(length=limit + 1)
+            has_more = len(docs) > limit
+            docs = docs[:limit]
+            total = None
+        else:
+            # One round trip: the page and the total come back from the same $facet,
+            # and wallets are joined only for the documents on the requested page.
+            skip = (page - 1) * limit
+            pipeline = [
+                {"$match": query},
+                sort_stage,
+                {"$facet": {
+                    "users": [{"$skip": skip}, {"$limit": limit}, *wallet_stages],
+                    "total": [{"$count": "count"}],
+                }},
+            ]
+            result = await db["users"].aggregate(pipeline).to_list(length=1)
+            facet = result[0] if result else {"users": [], "total": []}
+            docs = facet["users"]
+            total = facet["total"][0]["count"] if facet["total"] else 0
+            has_more = skip + len(docs) < total
+
+        next_cursor = encode_cursor(docs[-1], sort) if has_more and docs else None
+
         users = []
-        async for user in cursor:
-            # Fetch wallet, or use a default wallet if not found
-            wallet = await db["wallets"].find_one({"user_id": str(user["_id"])})
-            if wallet:
+        for user in docs:
+            # Use the joined wallet, or a default wallet if none exists
+            wallets = user.pop("wallets", [])
+            user.pop("_user_id", None)
+            if wallets:
+                wallet = wallets[0]
                 wallet["id"] = str(wallet["_id"])
                 wallet.pop("_id", None)
             else:
                 wallet = {"id": None, "balance": 0.0, "transactions": []}  # Default wallet
-            
+
             user["wallet"] = wallet
             user["id"] = str(user["_id"])
             user.pop("_id", None)
             users.append(UserOut(**user))
-        
-        total = await db["users"].count_documents(query)
-        return UsersOut(users=users, total=total, page=page, limit=limit)
+
+        return UsersOut(users=users, total=total, page=page, limit=limit, next_cursor=next_cursor)
 
     @staticmethod
     async def get_user(db: AsyncIOMotorDatabase, user_id: str) -> UserOut:
@@ -200,7 +262,7 @@ class UserService:
         # Prepare the update data
         update_data = updated_user.dict(exclude_unset=True)
         if "password" in update_data:
-            update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+            update_data["hashed_password"] = await get_password_hash_async(update_data.pop("password"))
         
         if not update_data:
             raise HTTPException(
@@ -208,16 +270,23 @@ class UserService:
                 detail="No fields provided for update."
             )
         
-        # Update the user document
-        result = await db["users"].update_one({"_id": obj_id}, {"$set": update_data})
+        # Update the user document; identity, role and password changes revoke issued tokens
+        update = {"$set": update_data}
+        revokes_tokens = any(field in update_data for field in ("username", "role", "hashed_password"))
+        if revokes_tokens:
+            update["$inc"] = {"token_version": 1}
+        result = await db["users"].update_one({"_id": obj_id}, update)
         if result.matched_count == 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"User with ID '{user_id}' not found."
             )
+        invalidate_principal(user_id)
         
         # Fetch the updated user
         user = await db["users"].find_one({"_id": obj_id})
+        if revokes_tokens:
+            await revoke_tokens(db, user_id, user["token_version"])
         wallet = await db["wallets"].find_one({"user_id": str(user["_id"])})
         if wallet:
             wallet["id"] = str(wallet["_id"])
@@ -259,6 +328,8 @@ class UserService:
         
         # Delete the user
         await db["users"].delete_one({"_id": obj_id})
+        invalidate_principal(user_id)
+        await revoke_tokens(db, user_id, REVOKED_TOKEN_VERSION)
         # Delete the associated wallet
         await db["wallets"].delete_one({"user_id": str(obj_id)})
         
@@ -270,57 +341,108 @@ class UserService:
         )
     
     @staticmethod
-    async def add_wallet(db: AsyncIOMotorDatabase, user_id: str, amount: float) -> None:
+    async def _wallet_response(db: AsyncIOMotorDatabase, user_id: str, wallet_update, amount: float) -> UserOut:
+        """
+        Read the user, run a wallet update and build the response from both.
+
+        The user is read first so the wallet is only changed once the user is known to
+        exist: a 404 never follows a balance change. The updated wallet is returned by
+        the update itself, so nothing is re-read afterwards.
+        """
+        if not ObjectId.is_valid(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid user ID format."
+            )
+        user = await db["users"].find_one({"_id": ObjectId(user_id)})
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User with ID '{user_id}' not found."
+            )
+        wallet = await wallet_update(db, user_id, amount)
+        wallet["id"] = str(wallet["_id"])
+        wallet.pop("_id", None)
+        user["wallet"] = wallet
+        user["id"] = str(user["_id"])
+        user.pop("_id", None)
+        return UserOut(**user)
+
+    @staticmethod
+    async def _credit(db: AsyncIOMotorDatabase, user_id: str, amount: float) -> dict:
+        """Atomically increment a wallet balance and return the updated wallet."""
+        wallet = await db["wallets"].find_one_and_update(
+            {"user_id": user_id},
+            {"$inc": {"balance": amount}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not wallet:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Wallet for user ID '{user_id}' not found."
+            )
+        return wallet
+
+    @staticmethod
+    async def _debit(db: AsyncIOMotorDatabase, user_id: str, amount: float) -> dict:
+        """Atomically decrement a wallet balance if it covers `amount` and return the updated wallet."""
+        wallet = await db["wallets"].find_one_and_update(
+            {"user_id": user_id, "balance": {"$gte": amount}},
+            {"$inc": {"balance": -amount}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not wallet:
+            # Only the failure path pays for finding out why the guard did not match
+            if not await db["wallets"].count_documents({"user_id": user_id}, limit=1):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Wallet for user ID '{user_id}' not found."
+                )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient balance."
+            )
+        return wallet
+
+    @staticmethod
+    async def add_wallet(db: AsyncIOMotorDatabase, user_id: str, amount: float) -> UserOut:
         """
         Add funds to a user's wallet.
 
+        The balance is incremented atomically with `$inc`, so concurrent credits are
+        never lost.
+
         Args:
             db (AsyncIOMotorDatabase): The MongoDB database instance.
             user_id (str): The unique identifier of the user.
             amount (float): The amount to add to the wallet.
 
+        Returns:
+            UserOut: The user's information including the updated wallet.
+
         Raises:
-            HTTPException: If the wallet is not found.
+            HTTPException: If the user ID format is invalid or the user or wallet is not found.
         """
-        wallet = await db["wallets"].find_one({"user_id": user_id})
-        if not wallet:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Wallet for user ID '{user_id}' not found."
-            )
-        new_balance = wallet.get("balance", 0.0) + amount
-        await db["wallets"].update_one(
-            {"user_id": user_id},
-            {"$set": {"balance": new_balance}}
-        )
+        return await UserService._wallet_response(db, user_id, UserService._credit, amount)
     
     @staticmethod
-    async def deduct_wallet(db: AsyncIOMotorDatabase, user_id: str, amount: float) -> None:
+    async def deduct_wallet(db: AsyncIOMotorDatabase, user_id: str, amount: float) -> UserOut:
         """
         Deduct funds from a user's wallet.
 
+        The balance check and the deduction happen in one conditional update
+        (`balance >= amount`), so concurrent debits can never overdraw the wallet.
+
         Args:
             db (AsyncIOMotorDatabase): The MongoDB database instance.
             user_id (str): The unique identifier of the user.
             amount (float): The amount to deduct from the wallet.
 
+        Returns:
+            UserOut: The user's information including the updated wallet.
+
         Raises:
-            HTTPException: If the wallet is not found or if there are insufficient funds.
+            HTTPException: If the user ID format is invalid, the user or wallet is not found,
+                           or there are insufficient funds.
         """
-        wallet = await db["wallets"].find_one({"user_id": user_id})
-        if not wallet:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Wallet for user ID '{user_id}' not found."
-            )
-        current_balance = wallet.get("balance", 0.0)
-        if current_balance < amount:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Insufficient balance."
-            )
-        new_balance = current_balance - amount
-        await db["wallets"].update_one(
-            {"user_id": user_id},
-            {"$set": {"balance": new_balance}}
-        )
+        return await UserService._wallet_response(db, user_id, UserService._debit, amount)
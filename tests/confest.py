@@ -86,3 +86,15 @@ async def admin_token(test_db):
         expires_delta=timedelta(minutes=30)
     )
     return access_token
+
+
+async def seed_buyers(test_db, prefix, n, balance):
+    """Insert `n` users named `<prefix><i>`, each with a wallet holding `balance`; return their usernames."""
+    usernames = [f"{prefix}{i}" for i in range(n)]
+    result = await test_db["users"].insert_many([
+        {"username": username, "email": f"{username}@example.com", "role": "user"} for username in usernames
+    ])
+    await test_db["wallets"].insert_many([
+        {"user_id": str(user_id), "balance": balance, "currency": "USD"} for user_id in result.inserted_ids
+    ])
+    return usernames
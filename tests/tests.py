@@ -3,6 +3,7 @@
 import pytest
 from app.schemas.users import UserCreate
 from bson import ObjectId
+from confest import seed_buyers
 
 @pytest.mark.asyncio
 async def test_add_user(client, admin_token, test_db):
@@ -107,3 +108,733 @@ async def test_delete_user(client, admin_token, test_db):
     # Verify associated wallet is also deleted
     wallet = await test_db["wallets"].find_one({"user_id": user_id})
     assert wallet is None, "Associated wallet was not deleted from the database."
+
+
+@pytest.mark.asyncio
+async def test_list_users_cursor_pagination(client, admin_token, test_db):
+    """
+    Test walking the user listing with `next_cursor` returns every user exactly once.
+    """
+    from app.services.users import UserService
+
+    for i in range(5):
+        await UserService.create_user(test_db, UserCreate(
+            username=f"cursoruser{i}",
+            email=f"cursoruser{i}@example.com",
+            password="cursorpassword",
+            role="user",
+        ))
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    params = {"limit": 2, "search": "cursoruser", "sort": "username"}
+
+    # First page is addressed by number and carries the total
+    response = await client.get("/users/", params=params, headers=headers)
+    assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+    data = response.json()
+    assert data["total"] == 5
+    usernames = [user["username"] for user in data["users"]]
+
+    # Following pages are addressed by cursor
+    while data["next_cursor"]:
+        response = await client.get(
+            "/users/",
+            params={**params, "cursor": data["next_cursor"]},
+            headers=headers
+        )
+        assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+        data = response.json()
+        usernames += [user["username"] for user in data["users"]]
+
+    assert usernames == [f"cursoruser{i}" for i in range(5)]
+
+    # A malformed cursor is rejected
+    response = await client.get("/users/", params={**params, "cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_wallet_concurrent_credits_and_debits(client, admin_token, test_db):
+    """
+    Test concurrent wallet credits and debits neither lose updates nor overdraw the wallet.
+    """
+    import asyncio
+    from app.services.users import UserService
+
+    user = await UserService.create_user(test_db, UserCreate(
+        username="walletstress",
+        email="walletstress@example.com",
+        password="walletpassword",
+    ))
+    user_id = str(user.id)
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    # 50 credits of 1.0 race against 60 debits of 1.0
+    credits = [
+        client.post(f"/users/{user_id}/wallet/add", json={"amount": 1.0}, headers=headers)
+        for _ in range(50)
+    ]
+    responses = await asyncio.gather(*credits)
+    assert all(response.status_code == 200 for response in responses)
+
+    debits = [
+        client.post(f"/users/{user_id}/wallet/deduct", json={"amount": 1.0}, headers=headers)
+        for _ in range(60)
+    ]
+    responses = await asyncio.gather(*debits)
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(200) == 50
+    assert statuses.count(400) == 10
+
+    wallet = await test_db["wallets"].find_one({"user_id": user_id})
+    assert wallet["balance"] == 0.0
+
+    # Non-positive amounts are rejected
+    response = await client.post(f"/users/{user_id}/wallet/add", json={"amount": -5}, headers=headers)
+    assert response.status_code == 422
+
+    # A wallet left behind by a missing user is not credited before the 404
+    orphan_id = str(ObjectId())
+    await test_db["wallets"].insert_one({"user_id": orphan_id, "balance": 0.0, "currency": "USD"})
+    response = await client.post(f"/users/{orphan_id}/wallet/add", json={"amount": 5.0}, headers=headers)
+    assert response.status_code == 404
+    assert (await test_db["wallets"].find_one({"user_id": orphan_id}))["balance"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sales_do_not_oversell(client, admin_token, test_db):
+    """
+    Test concurrent purchases of a good with limited stock sell exactly the stock.
+    """
+    import asyncio
+
+    await test_db["goods"].insert_one({"name": "flashgood", "price": 10.0, "count": 3, "description": ""})
+    buyers = await seed_buyers(test_db, "flashbuyer", 10, 10.0)
+
+    responses = await asyncio.gather(*[
+        client.post("/sales/sales", json={"username": buyer, "good_name": "flashgood"})
+        for buyer in buyers
+    ])
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(200) == 3
+    assert statuses.count(400) == 7
+
+    good = await test_db["goods"].find_one({"name": "flashgood"})
+    assert good["count"] == 0
+    assert await test_db["purchases"].count_documents({"good_name": "flashgood"}) == 3
+    assert await test_db["wallets"].count_documents({"balance": {"$lt": 0}}) == 0
+
+
+@pytest.mark.asyncio
+async def test_place_multi_item_order(client, admin_token, test_db):
+    """
+    Test an order of several goods is charged once and is all-or-nothing.
+    """
+    await test_db["goods"].insert_many([
+        {"name": "ordergood_a", "price": 2.0, "count": 5, "description": ""},
+        {"name": "ordergood_b", "price": 3.0, "count": 1, "description": ""},
+    ])
+    [buyer] = await seed_buyers(test_db, "orderbuyer", 1, 20.0)
+
+    response = await client.post("/sales/orders", json={
+        "username": buyer,
+        "items": [{"good_name": "ordergood_a", "quantity": 3}, {"good_name": "ordergood_b", "quantity": 1}],
+    })
+    assert response.status_code == 201, f"Unexpected status code: {response.status_code}"
+    data = response.json()
+    assert data["total"] == 9.0
+    assert data["remaining_balance"] == 11.0
+    assert await test_db["orders"].count_documents({"username": buyer}) == 1
+
+    # ordergood_b is sold out, so the whole order is rejected and no stock is taken
+    response = await client.post("/sales/orders", json={
+        "username": buyer,
+        "items": [{"good_name": "ordergood_a", "quantity": 1}, {"good_name": "ordergood_b", "quantity": 1}],
+    })
+    assert response.status_code == 400
+    good = await test_db["goods"].find_one({"name": "ordergood_a"})
+    assert good["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_sale_idempotency_key(client, admin_token, test_db):
+    """
+    Test retries with the same Idempotency-Key purchase only once.
+    """
+    import asyncio
+
+    await test_db["goods"].insert_one({"name": "idemgood", "price": 5.0, "count": 10, "description": ""})
+    [buyer] = await seed_buyers(test_db, "idembuyer", 1, 50.0)
+
+    sale = {"username": buyer, "good_name": "idemgood"}
+    headers = {"Idempotency-Key": "idem-test-key"}
+    responses = await asyncio.gather(*[client.post("/sales/sales", json=sale, headers=headers) for _ in range(5)])
+    assert all(response.status_code == 200 for response in responses)
+    assert {response.json()["remaining_balance"] for response in responses} == {45.0}
+    assert sum(response.headers.get("Idempotent-Replayed") == "true" for response in responses) == 4
+
+    good = await test_db["goods"].find_one({"name": "idemgood"})
+    assert good["count"] == 9
+    assert await test_db["purchases"].count_documents({"username": buyer}) == 1
+
+    # Reusing the key for a different request is rejected
+    response = await client.post("/sales/sales", json={**sale, "good_name": "othergood"}, headers=headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_stock_slots(client, admin_token, test_db):
+    """
+    Test a good with stock slots sells exactly its stock and reports the summed count.
+    """
+    import asyncio
+
+    await test_db["goods"].insert_one({"name": "slotgood", "price": 1.0, "count": 10, "description": ""})
+    buyers = await seed_buyers(test_db, "slotbuyer", 12, 1.0)
+
+    response = await client.put(
+        "/sales/goods/slotgood/stock-slots",
+        json={"slots": 4},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+    assert response.json()["count"] == 10
+    assert await test_db["stock_slots"].count_documents({}) == 4
+
+    responses = await asyncio.gather(*[
+        client.post("/sales/sales", json={"username": buyer, "good_name": "slotgood"})
+        for buyer in buyers
+    ])
+    assert [response.status_code for response in responses].count(200) == 10
+
+    response = await client.get("/sales/goods/slotgood")
+    assert response.json()["count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_goods_pagination_and_stream(client, admin_token, test_db):
+    """
+    Test paging through /sales/goods and streaming it return the same in-stock goods.
+    """
+    import json
+
+    await test_db["goods"].insert_many([
+        {"name": f"pagegood{i:02d}", "price": float(i), "count": i % 2, "description": "A good."}
+        for i in range(30)
+    ])
+
+    names = []
+    params = {"limit": 7}
+    while True:
+        response = await client.get("/sales/goods", params=params)
+        assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+        names += [good["name"] for good in response.json() if good["name"].startswith("pagegood")]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params = {"limit": 7, "cursor": response.headers["X-Next-Cursor"]}
+
+    expected = [f"pagegood{i:02d}" for i in range(30) if i % 2]
+    assert names == expected
+
+    response = await client.get("/sales/goods", params={"stream": "true"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert [good["name"] for good in streamed if good["name"].startswith("pagegood")] == expected
+    assert set(streamed[0]) == {"name", "price"}
+
+
+@pytest.mark.asyncio
+async def test_goods_cache(client, admin_token, test_db):
+    """
+    Test good details are served from the goods cache and patched by sales.
+    """
+    from app.services.sales import goods_cache
+
+    await test_db["goods"].insert_one({"name": "cachedgood", "price": 4.0, "count": 2, "description": "Cached."})
+    [buyer] = await seed_buyers(test_db, "cachebuyer", 1, 20.0)
+
+    response = await client.get("/sales/goods/cachedgood")
+    assert response.json()["count"] == 2
+    hits = goods_cache.hits
+    response = await client.get("/sales/goods/cachedgood")
+    assert response.status_code == 200
+    assert goods_cache.hits == hits + 1
+
+    # A sale updates the cached count without waiting for it to be re-read
+    response = await client.post("/sales/sales", json={"username": buyer, "good_name": "cachedgood"})
+    assert response.status_code == 200
+    response = await client.get("/sales/goods/cachedgood")
+    assert response.json()["count"] == 1
+    assert response.json()["description"] == "Cached."
+
+
+@pytest.mark.asyncio
+async def test_purchase_history_and_summary(client, admin_token, test_db):
+    """
+    Test paging through a user's purchases and summarizing them.
+    """
+    await test_db["purchases"].insert_many([
+        {"username": "historybuyer", "good_name": f"historygood{i % 3}", "price": float(i % 3 + 1)}
+        for i in range(9)
+    ])
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    ids = []
+    params = {"username": "historybuyer", "limit": 4}
+    while True:
+        response = await client.get("/sales/admin/purchases", params=params, headers=headers)
+        assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+        data = response.json()
+        ids += [purchase["id"] for purchase in data["purchases"]]
+        if not data["next_cursor"]:
+            break
+        params["cursor"] = data["next_cursor"]
+    assert len(ids) == 9
+    assert ids == sorted(ids, reverse=True)
+
+    response = await client.get(
+        "/sales/admin/purchases", params={"username": "historybuyer", "good_name": "historygood2"}, headers=headers
+    )
+    assert len(response.json()["purchases"]) == 3
+
+    response = await client.get(
+        "/sales/admin/purchases/summary", params={"username": "historybuyer"}, headers=headers
+    )
+    assert response.status_code == 200
+    summary = response.json()
+    assert summary["purchases"] == 9
+    assert summary["total_spent"] == 18.0
+    assert {item["good_name"]: item["count"] for item in summary["items"]} == {
+        "historygood0": 3, "historygood1": 3, "historygood2": 3
+    }
+
+
+@pytest.mark.asyncio
+async def test_sales_daily_rollups(client, admin_token, test_db, monkeypatch):
+    """
+    Test sales are rolled up per good and day, reported, and rebuilt by the backfill.
+    """
+    from app.core.config import settings
+    from app.db.rollups import backfill
+
+    monkeypatch.setattr(settings, "SALES_ROLLUP_MODE", "inline")
+    await test_db["goods"].insert_one({"name": "rollupgood", "price": 2.5, "count": 10, "description": ""})
+    [buyer] = await seed_buyers(test_db, "rollupbuyer", 1, 50.0)
+
+    for _ in range(2):
+        response = await client.post("/sales/sales", json={"username": buyer, "good_name": "rollupgood"})
+        assert response.status_code == 200
+    response = await client.post("/sales/orders", json={
+        "username": buyer, "items": [{"good_name": "rollupgood", "quantity": 3}],
+    })
+    assert response.status_code == 201
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await client.get(
+        "/sales/admin/reports/revenue", params={"days": 7, "good_name": "rollupgood"}, headers=headers
+    )
+    assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+    assert response.json()["goods"] == [{"good_name": "rollupgood", "units": 5, "revenue": 12.5}]
+
+    await test_db["sales_daily"].delete_many({})
+    await backfill(test_db, batch_size=1)
+    response = await client.get(
+        "/sales/admin/reports/revenue", params={"days": 7, "good_name": "rollupgood"}, headers=headers
+    )
+    assert response.json()["goods"] == [{"good_name": "rollupgood", "units": 5, "revenue": 12.5}]
+
+
+@pytest.mark.asyncio
+async def test_rollup_buffer_keeps_only_duplicate_key_races(client, admin_token, test_db):
+    """
+    Test increments that lost a duplicate-key race are written by the next flush, other
+    rejected increments are dropped, and drain lets an in-flight flush finish.
+    """
+    import asyncio
+    from pymongo.errors import BulkWriteError
+    from app.db.rollups import RollupBuffer
+
+    class Rollups:
+        def __init__(self):
+            self.writes = []
+
+        def __getitem__(self, name):
+            return self
+
+        async def bulk_write(self, requests, ordered):
+            await asyncio.sleep(0.05)
+            self.writes.append(len(requests))
+            if len(self.writes) == 1:
+                raise BulkWriteError({"writeErrors": [
+                    {"index": 0, "code": 11000, "errmsg": "duplicate key"},
+                    {"index": 1, "code": 121, "errmsg": "document failed validation"},
+                ]})
+
+    buffer = RollupBuffer("sales_daily", interval_ms=10)
+    rollups = Rollups()
+    for good_name in ("racedgood", "invalidgood", "appliedgood"):
+        buffer.add(rollups, good_name, 1, 1.0)
+    await asyncio.sleep(0.03)
+    await buffer.drain()
+
+    assert rollups.writes == [3, 1]
+    stats = buffer.stats()
+    assert stats["updates"] == 2 and stats["dropped"] == 1 and stats["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_top_sellers(client, admin_token, test_db):
+    """
+    Test sales are ranked per sliding window and expire with it.
+    """
+    from app.core.leaderboard import SlidingWindowRanking
+
+    await test_db["goods"].insert_many([
+        {"name": "topgood_a", "price": 1.0, "count": 10, "description": ""},
+        {"name": "topgood_b", "price": 1.0, "count": 10, "description": ""},
+    ])
+    [buyer] = await seed_buyers(test_db, "topbuyer", 1, 10.0)
+
+    response = await client.post("/sales/orders", json={
+        "username": buyer,
+        "items": [{"good_name": "topgood_a", "quantity": 2}, {"good_name": "topgood_b", "quantity": 3}],
+    })
+    assert response.status_code == 201
+    response = await client.post("/sales/sales", json={"username": buyer, "good_name": "topgood_a"})
+    assert response.status_code == 200
+
+    response = await client.get("/sales/top", params={"window": "1h", "n": 100})
+    assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+    ranked = [good for good in response.json()["goods"] if good["good_name"].startswith("topgood")]
+    assert ranked == [{"good_name": "topgood_a", "units": 3}, {"good_name": "topgood_b", "units": 3}]
+
+    ranking = SlidingWindowRanking(window_seconds=3600, bucket_seconds=60)
+    ranking.add("old", 5, at=0)
+    ranking.add("new", 1, at=3599)
+    assert ranking.top(2, at=3599) == [("old", 5), ("new", 1)]
+    ranking.add("new", 1, at=3600)
+    assert ranking.top(2, at=3600) == [("new", 2)]
+
+
+@pytest.mark.asyncio
+async def test_products_also_bought(client, admin_token, test_db, tmp_path, monkeypatch):
+    """
+    Test also-bought recommendations are served from the index file and follow a rebuild.
+    """
+    from app.core.also_bought import NO_NEIGHBOUR, RECORD, write_index
+    from app.core.config import settings
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    path = str(tmp_path / "also_bought.idx")
+    monkeypatch.setattr(settings, "ALSO_BOUGHT_PATH", path)
+    result = await test_db["products"].insert_one({"name": "Phone", "price": 100.0, "quantity": 1})
+    product_id = str(result.inserted_id)
+
+    response = await client.get(f"/products/{product_id}/also-bought", headers=headers)
+    assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+    assert response.json()["items"] == []
+
+    names = ["Case", "Charger", "Phone"]
+    records = b"".join([
+        RECORD.pack(2, 3.0), RECORD.pack(NO_NEIGHBOUR, 0.0),
+        RECORD.pack(2, 1.0), RECORD.pack(NO_NEIGHBOUR, 0.0),
+        RECORD.pack(0, 3.0), RECORD.pack(1, 1.0),
+    ])
+    write_index(path, names, 2, records)
+    response = await client.get(f"/products/{product_id}/also-bought", headers=headers)
+    assert response.json()["items"] == [{"name": "Case", "score": 3.0}, {"name": "Charger", "score": 1.0}]
+
+    write_index(path, names, 2, records[:-RECORD.size] + RECORD.pack(NO_NEIGHBOUR, 0.0))
+    response = await client.get(f"/products/{product_id}/also-bought", params={"limit": 5}, headers=headers)
+    assert response.json()["items"] == [{"name": "Case", "score": 3.0}]
+
+    response = await client.get(f"/products/{product_id}/also-bought")
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_products_listing_pagination_and_fields(client, admin_token, test_db):
+    """
+    Test the product listing is keyset-paginated, sorted and projected on the requested fields.
+    """
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    await test_db["products"].insert_many([
+        {"name": f"listed{i}", "description": "A product.", "price": 10000.0 + i, "quantity": 1}
+        for i in range(5)
+    ])
+
+    params = {"limit": 2, "sort": "-price", "fields": "name"}
+    response = await client.get("/products/", params=params, headers=headers)
+    assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+    page = response.json()
+    assert [set(product) for product in page["products"]] == [{"_id", "name"}] * 2
+    assert [product["name"] for product in page["products"]] == ["listed4", "listed3"]
+
+    response = await client.get("/products/", params={**params, "cursor": page["next_cursor"]}, headers=headers)
+    assert [product["name"] for product in response.json()["products"]] == ["listed2", "listed1"]
+
+    response = await client.get("/products/", params={"fields": "name,secret"}, headers=headers)
+    assert response.status_code == 400
+    response = await client.get("/products/", params={"limit": 1000}, headers=headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_products_export(client, admin_token, test_db):
+    """
+    Test the product catalog is exported as NDJSON and as CSV.
+    """
+    import csv
+    import json
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    await test_db["products"].insert_many([
+        {"name": f"exported{i}", "price": 5.0, "quantity": 2, "tags": ["a", "b"]} for i in range(3)
+    ])
+
+    response = await client.get("/products/export", headers=headers)
+    assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+    assert response.headers["content-type"] == "application/x-ndjson"
+    products = [json.loads(line) for line in response.text.splitlines()]
+    exported = [product for product in products if product["name"].startswith("exported")]
+    assert [product["name"] for product in exported] == ["exported0", "exported1", "exported2"]
+    assert exported[0]["tags"] == ["a", "b"] and isinstance(exported[0]["_id"], str)
+
+    response = await client.get("/products/export", params={"format": "csv"}, headers=headers)
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(response.text.splitlines()))
+    assert len(rows) == len(products)
+    assert {"name": "exported0", "tags": "a|b"}.items() <= rows[-3].items()
+
+
+@pytest.mark.asyncio
+async def test_products_search(client, admin_token, test_db):
+    """
+    Test product search ranks name over tag over description matches and applies the filters.
+    """
+    from app.db.indexes import INDEXES
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    await test_db["products"].create_indexes(
+        [model for model in INDEXES["products"] if model.document["name"] == "text_search"]
+    )
+    await test_db["products"].insert_many([
+        {"name": "Plain lamp", "description": "Shines like a zephyr.", "price": 30.0, "quantity": 1, "category": "home"},
+        {"name": "Zephyr lamp", "description": "A lamp.", "price": 50.0, "quantity": 1, "category": "home"},
+        {"name": "Desk lamp", "description": "A lamp.", "price": 20.0, "quantity": 1, "category": "office", "tags": ["zephyr"]},
+    ])
+
+    response = await client.get("/products/search", params={"q": "zephyr"}, headers=headers)
+    assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+    result = response.json()
+    assert [product["name"] for product in result["products"]] == ["Zephyr lamp", "Desk lamp", "Plain lamp"]
+    assert result["has_more"] is False
+
+    response = await client.get("/products/search", params={"q": "zephyr", "limit": 1, "page": 2}, headers=headers)
+    assert [product["name"] for product in response.json()["products"]] == ["Desk lamp"]
+    assert response.json()["has_more"] is True
+
+    response = await client.get("/products/search", params={"q": "zephyr", "category": "home", "max_price": 40}, headers=headers)
+    assert [product["name"] for product in response.json()["products"]] == ["Plain lamp"]
+
+
+@pytest.mark.asyncio
+async def test_cached_principal_rejected_after_synced_revocation(client, admin_token, test_db, monkeypatch):
+    """
+    Test a cached principal is rejected once another worker's revocation has been synced.
+    """
+    from datetime import timedelta
+    from app.core import security
+    from app.core.security import create_access_token
+    from app.services.users import UserService
+
+    user = await UserService.create_user(test_db, UserCreate(
+        username="revokeduser",
+        email="revokeduser@example.com",
+        password="revokedpassword",
+    ))
+    token = create_access_token({"sub": "revokeduser", "uid": str(user.id), "ver": 0}, timedelta(minutes=5))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get("/sales/purchases", headers=headers)
+    assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+
+    # As loaded by sync_token_versions; invalidate_principal never ran on this worker
+    monkeypatch.setattr(security, "token_versions", {str(user.id): 1})
+    response = await client.get("/sales/purchases", headers=headers)
+    assert response.status_code == 401
+
+    # Revoked on another worker and not synced yet: the user's token_version still applies
+    monkeypatch.setattr(security, "token_versions", {})
+    await test_db["users"].update_one({"_id": user.id}, {"$set": {"token_version": 1}})
+    stale = create_access_token({"sub": "revokeduser", "uid": str(user.id), "ver": 0}, timedelta(minutes=6))
+    response = await client.get("/sales/purchases", headers={"Authorization": f"Bearer {stale}"})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_write_buffer_fails_batch_on_unencodable_document(client, admin_token, test_db):
+    """
+    Test a batch failing with a non-MongoDB error fails its futures and the writer keeps running.
+    """
+    import asyncio
+    from bson.errors import InvalidDocument
+    from app.db.write_buffer import WriteBuffer
+
+    buffer = WriteBuffer("buffered_writes", max_batch=10, interval_ms=5)
+    bad = buffer.add(test_db, {"value": object()})
+    with pytest.raises(InvalidDocument):
+        await asyncio.wait_for(bad, timeout=1)
+    assert buffer.stats()["dropped"] == 1 and buffer.stats()["retries"] == 0
+
+    good = buffer.add(test_db, {"value": 1})
+    document_id = await asyncio.wait_for(good, timeout=1)
+    assert await test_db["buffered_writes"].count_documents({"_id": document_id}) == 1
+    await buffer.drain()
+
+
+@pytest.mark.asyncio
+async def test_write_buffer_retries_transient_errors(client, admin_token, test_db, tmp_path):
+    """
+    Test a batch failing with transient errors is retried, and a document failing for
+    longer than the retry budget is dead-lettered and can be replayed.
+    """
+    import asyncio
+    from pymongo.errors import AutoReconnect
+    from app.db.write_buffer import WriteBuffer, replay
+
+    class Election:
+        failures = 2
+
+        def __getitem__(self, name):
+            return self
+
+        async def insert_many(self, documents, ordered):
+            if self.failures:
+                self.failures -= 1
+                raise AutoReconnect("not primary")
+            return await test_db["buffered_writes"].insert_many(documents, ordered=ordered)
+
+    path = str(tmp_path / "dead_letters.jsonl")
+    buffer = WriteBuffer("buffered_writes", max_batch=10, interval_ms=5, retry_seconds=5, dead_letter_path=path)
+    election = Election()
+    document_id = await asyncio.wait_for(buffer.add(election, {"value": "retried"}), timeout=2)
+    assert buffer.stats()["retries"] == 2 and buffer.stats()["dropped"] == 0
+    assert await test_db["buffered_writes"].count_documents({"_id": document_id}) == 1
+
+    buffer.retry_seconds = 0.1
+    election.failures = 100
+    with pytest.raises(AutoReconnect):
+        await asyncio.wait_for(buffer.add(election, {"value": "dead-lettered"}), timeout=2)
+    assert buffer.stats()["dropped"] == 1
+    await buffer.drain()
+
+    assert await replay(test_db, "buffered_writes", path) == 1
+    assert await test_db["buffered_writes"].count_documents({"value": "dead-lettered"}) == 1
+
+
+@pytest.mark.asyncio
+async def test_sale_fails_when_purchase_record_is_lost(client, admin_token, test_db, monkeypatch):
+    """
+    Test a sale in "flush" mode responds with 500 when its purchase record cannot be written.
+    """
+    import asyncio
+    from pymongo.errors import AutoReconnect
+    from app.db.write_buffer import purchase_writes
+
+    def lost(db, document):
+        document.setdefault("_id", ObjectId())
+        future = asyncio.get_running_loop().create_future()
+        future.set_exception(AutoReconnect("not primary"))
+        return future
+
+    monkeypatch.setattr(purchase_writes, "add", lost)
+    await test_db["goods"].insert_one({"name": "lostgood", "price": 1.0, "count": 1, "description": ""})
+    [buyer] = await seed_buyers(test_db, "lostbuyer", 1, 1.0)
+
+    response = await client.post("/sales/sales", json={"username": buyer, "good_name": "lostgood"})
+    assert response.status_code == 500
+    assert (await test_db["goods"].find_one({"name": "lostgood"}))["count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stock_gate_rejects_sold_out_good_without_database(client, admin_token, test_db):
+    """
+    Test a sold-out good is rejected without a database call and re-admitted after a restock.
+    """
+    from fastapi import HTTPException
+    from app.core.stock_gate import stock_gate
+    from app.schemas.sales import SaleRequest
+    from app.services.sales import SalesService
+
+    class NoDatabase:
+        def __getitem__(self, name):
+            raise AssertionError(f"'{name}' was read for a sold-out good")
+
+    await test_db["goods"].insert_one({"name": "gatedgood", "price": 1.0, "count": 0, "description": "A good."})
+    await stock_gate.refresh(test_db)
+
+    with pytest.raises(HTTPException) as error:
+        await SalesService.process_sale(NoDatabase(), SaleRequest(username="anyone", good_name="gatedgood"))
+    assert error.value.status_code == 400
+
+    await test_db["goods"].update_one({"name": "gatedgood"}, {"$set": {"count": 3}})
+    await stock_gate.refresh(test_db)
+    assert not stock_gate.is_sold_out("gatedgood")
+
+
+@pytest.mark.asyncio
+async def test_goods_cache_concurrent_reads_of_slotted_good(client, admin_token, test_db, monkeypatch):
+    """
+    Test concurrent first reads of a slotted good never see a partially built cache entry.
+    """
+    import asyncio
+    from app.services.sales import SalesService, goods_cache
+
+    await test_db["goods"].insert_one({"name": "slotreadgood", "price": 1.0, "count": 8, "description": ""})
+    await SalesService.set_stock_slots(test_db, "slotreadgood", 4)
+    goods_cache.pop("slotreadgood")
+
+    slot_counts = SalesService._slot_counts
+
+    async def slow_slot_counts(db, good_ids):
+        await asyncio.sleep(0.05)
+        return await slot_counts(db, good_ids)
+
+    monkeypatch.setattr(SalesService, "_slot_counts", staticmethod(slow_slot_counts))
+
+    async def staggered_read(delay):
+        await asyncio.sleep(delay)
+        return await client.get("/sales/goods/slotreadgood")
+
+    responses = await asyncio.gather(staggered_read(0), staggered_read(0.02))
+    assert [response.status_code for response in responses] == [200, 200]
+    assert [response.json()["count"] for response in responses] == [8, 8]
+
+
+@pytest.mark.asyncio
+async def test_also_bought_build(client, admin_token, test_db, tmp_path, monkeypatch):
+    """
+    Test the also-bought build ranks the items bought together most often first.
+    """
+    pytest.importorskip("scipy")
+    from app.core.also_bought import AlsoBoughtIndex, build
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "ALSO_BOUGHT_PATH", str(tmp_path / "also_bought.idx"))
+    # alsoA is bought with alsoB by two users and with alsoC by one
+    await test_db["purchases"].insert_many([
+        {"username": "basket1", "good_name": "alsoA", "price": 1.0},
+        {"username": "basket1", "good_name": "alsoB", "price": 1.0},
+        {"username": "basket3", "good_name": "alsoA", "price": 1.0},
+        {"username": "basket3", "good_name": "alsoC", "price": 1.0},
+    ])
+    await test_db["orders"].insert_one({
+        "username": "basket2",
+        "items": [{"good_name": "alsoA", "quantity": 1, "price": 1.0}, {"good_name": "alsoB", "quantity": 2, "price": 1.0}],
+    })
+
+    await build(test_db, k=2)
+    index = AlsoBoughtIndex()
+    assert index.neighbours("alsoA", 5) == [("alsoB", 2.0), ("alsoC", 1.0)]
+    assert index.neighbours("alsoC", 5) == [("alsoA", 1.0)]